@@ -15,11 +15,24 @@ def create_app(config_class=Config):
     # Disable strict slashes to prevent redirects that break CORS preflight
     app.url_map.strict_slashes = False
     
+    from .json_provider import init_json_provider
+    init_json_provider(app)
+    
     # Initialize extensions
     db.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
-    CORS(app, origins=app.config["CORS_ORIGINS"], supports_credentials=True)
+    # X-Next-Cursor carries the session list's pagination cursor
+    CORS(app, origins=app.config["CORS_ORIGINS"], supports_credentials=True, expose_headers=["X-Next-Cursor"])
+    
+    from .cache import init_stats_cache
+    init_stats_cache(app)
+    
+    from .presence import init_presence
+    init_presence(app)
+    
+    from .leaderboard_store import init_leaderboards
+    init_leaderboards(app)
     
     # JWT error handlers for better debugging
     @jwt.expired_token_loader
@@ -44,6 +57,7 @@ def create_app(config_class=Config):
     from .routes.friends import friends_bp
     from .routes.leaderboard import leaderboard_bp
     from .routes.stats import stats_bp
+    from .routes.presence import presence_bp
     
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(users_bp, url_prefix="/api/users")
@@ -52,6 +66,11 @@ def create_app(config_class=Config):
     app.register_blueprint(friends_bp, url_prefix="/api/friends")
     app.register_blueprint(leaderboard_bp, url_prefix="/api/leaderboard")
     app.register_blueprint(stats_bp, url_prefix="/api/stats")
+    app.register_blueprint(presence_bp, url_prefix="/api/presence")
+    
+    # Register CLI commands (flask rollups backfill, ...)
+    from .commands import register_commands
+    register_commands(app)
     
     # Health check route
     @app.get("/api/ping")
@@ -0,0 +1,80 @@
+from collections import defaultdict
+from sqlalchemy import literal, select, union_all
+from app import db
+from app.models import User, Friend, bump_data_version
+from app.cache import MemoryCache
+
+# (viewer, target) friendship decisions for private profiles. Keys include the
+# target's data version, which friendship and privacy changes bump, so a stale
+# decision is never read back - even by another worker with its own cache.
+_decisions = MemoryCache(max_entries=4096, ttl=600)
+
+def are_friends(user_id, other_id):
+    """True if the two users have an accepted friendship (either direction)."""
+    return Friend.query.filter(
+        Friend.status == "accepted",
+        ((Friend.requester_id == user_id) & (Friend.addressee_id == other_id)) |
+        ((Friend.requester_id == other_id) & (Friend.addressee_id == user_id))
+    ).first() is not None
+
+def friend_ids(user_id, include_self=False):
+    """
+    Select of the ids of the user's accepted friends (either direction), plus the user's own id
+    if include_self. Use as User.id.in_(friend_ids(...)) or run it with db.session.scalars().
+    """
+    parts = [
+        select(Friend.addressee_id).where(Friend.requester_id == user_id, Friend.status == "accepted"),
+        select(Friend.requester_id).where(Friend.addressee_id == user_id, Friend.status == "accepted")
+    ]
+    if include_self:
+        parts.insert(0, select(literal(user_id)))
+    return union_all(*parts)
+
+def friends_by_user():
+    """{user_id: set of accepted friends' ids} for every user with a friend - one scan, for batch jobs."""
+    friends = defaultdict(set)
+    pairs = db.session.query(Friend.requester_id, Friend.addressee_id).filter(Friend.status == "accepted")
+    for requester_id, addressee_id in pairs.yield_per(1000):
+        friends[requester_id].add(addressee_id)
+        friends[addressee_id].add(requester_id)
+    return friends
+
+def can_view(viewer_id, target):
+    """Whether viewer_id (None when anonymous) may see the target user's profile and stats."""
+    if viewer_id == target.id or target.privacy_opt_in:
+        return True
+    if viewer_id is None:
+        return False
+
+    key = (viewer_id, target.data_version)
+    allowed = _decisions.get(target.id, key)
+    if allowed is None:
+        allowed = are_friends(viewer_id, target.id)
+        _decisions.set(target.id, key, allowed)
+    return allowed
+
+def resolve_target(viewer, username=None, user_id=None):
+    """
+    Look up the user a request is about (default: the viewer) and apply the privacy check.
+    Returns None if the user does not exist or is not visible to the viewer.
+    """
+    if username:
+        target = User.query.filter_by(username=username).first()
+    elif user_id:
+        target = User.query.get(user_id)
+    else:
+        return viewer
+
+    if not target or not can_view(viewer.id, target):
+        return None
+    return target
+
+def friendship_changed(friend):
+    """
+    Record that a friendship was accepted or removed. Bumps both users' data
+    versions (dropping cached visibility decisions and stats ETags). Does not commit.
+    """
+    bump_data_version(friend.requester_id)
+    bump_data_version(friend.addressee_id)
+    _decisions.invalidate_user(friend.requester_id)
+    _decisions.invalidate_user(friend.addressee_id)
@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from app.redis_client import RedisError, get_redis
+
+class MemoryCache:
+    """
+    In-process cache with per-entry TTL and LRU eviction once max_entries is reached.
+    Keys are grouped by user so one user's entries can be dropped together.
+    """
+    backend = "memory"
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # (user_id, key) -> (expires_at, value)
+        self._user_keys = {}  # user_id -> set of keys
+        self._lock = threading.Lock()
+
+    def _drop(self, entry_key):
+        self._entries.pop(entry_key, None)
+        user_id, key = entry_key
+        keys = self._user_keys.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[user_id]
+
+    def get(self, user_id, key):
+        entry_key = (user_id, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._drop(entry_key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry_key)
+            self.hits += 1
+            return value
+
+    def set(self, user_id, key, value):
+        entry_key = (user_id, key)
+        with self._lock:
+            self._entries[entry_key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(entry_key)
+            self._user_keys.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._user_keys.get(user_id, ())):
+                self._drop((user_id, key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl
+            }
+
+class RedisCache:
+    """
+    Cache stored in Redis (or anything speaking its protocol), shared across workers.
+    Entries expire via SET EX; LRU eviction is left to the server's maxmemory-policy
+    (allkeys-lru). A per-user set indexes keys for invalidation.
+    Hit/miss counters are per process. Redis errors count as misses and never fail a request.
+    """
+    backend = "redis"
+
+    def __init__(self, client, ttl=300, prefix="stats"):
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._client = client
+        self._lock = threading.Lock()
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _entry_key(self, user_id, key):
+        return f"{self.prefix}:{user_id}:{key}"
+
+    def _index_key(self, user_id):
+        return f"{self.prefix}:{user_id}:keys"
+
+    def get(self, user_id, key):
+        try:
+            value = self._client.get(self._entry_key(user_id, key))
+        except RedisError as e:
+            print(f"⚠️ Stats cache read failed: {e}")
+            self._count("errors")
+            value = None
+        self._count("misses" if value is None else "hits")
+        return value
+
+    def set(self, user_id, key, value):
+        entry_key = self._entry_key(user_id, key)
+        index_key = self._index_key(user_id)
+        try:
+            pipe = self._client.pipeline()
+            pipe.set(entry_key, value, ex=self.ttl)
+            pipe.sadd(index_key, entry_key)
+            pipe.expire(index_key, self.ttl)
+            pipe.execute()
+        except RedisError as e:
+            print(f"⚠️ Stats cache write failed: {e}")
+            self._count("errors")
+
+    def invalidate_user(self, user_id):
+        index_key = self._index_key(user_id)
+        try:
+            keys = self._client.smembers(index_key)
+            self._client.delete(index_key, *keys)
+        except RedisError as e:
+            print(f"⚠️ Stats cache invalidation failed: {e}")
+            self._count("errors")
+
+    def clear(self):
+        try:
+            keys = list(self._client.scan_iter(match=f"{self.prefix}:*"))
+            if keys:
+                self._client.delete(*keys)
+        except RedisError as e:
+            print(f"⚠️ Stats cache clear failed: {e}")
+            self._count("errors")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "ttl_seconds": self.ttl
+            }
+
+def init_stats_cache(app):
+    """Create the stats cache from STATS_CACHE_URL ("memory://" or "redis://...")."""
+    url = app.config.get("STATS_CACHE_URL") or "memory://"
+    ttl = app.config.get("STATS_CACHE_TTL", 300)
+
+    client = get_redis(url, "STATS_CACHE_URL")
+    if client is not None:
+        cache = RedisCache(client, ttl=ttl)
+    else:
+        cache = MemoryCache(app.config.get("STATS_CACHE_MAX_ENTRIES", 1024), ttl)
+
+    app.extensions["stats_cache"] = cache
+    return cache
+
+def get_stats_cache():
+    return current_app.extensions["stats_cache"]
+
+def invalidate_user_stats(user_id):
+    """Drop every cached stats response for a user. Call after committing a change to their data."""
+    get_stats_cache().invalidate_user(user_id)
@@ -0,0 +1,124 @@
+import os
+import click
+from flask.cli import AppGroup
+from app.models import User
+
+rollups_cli = AppGroup("rollups", help="Maintain the daily_rollups table.")
+
+@rollups_cli.command("backfill")
+@click.option("--username", default=None, help="Only rebuild this user's rollups.")
+def backfill_rollups_command(username):
+    """Rebuild daily rollups from raw focus sessions."""
+    from app.rollups import backfill_rollups
+    
+    users = None
+    if username:
+        user = User.query.filter_by(username=username).first()
+        if not user:
+            raise click.ClickException(f"User not found: {username}")
+        users = [user]
+    
+    user_count, row_count = backfill_rollups(users)
+    click.echo(f"✅ Rebuilt {row_count} rollup rows for {user_count} users")
+
+sessions_cli = AppGroup("sessions", help="Focus session maintenance.")
+
+@sessions_cli.command("report-overlaps")
+@click.option("--username", default=None, help="Only report this user's sessions.")
+@click.option("--limit", default=50, show_default=True, help="Maximum overlapping sessions to list.")
+def report_overlaps_command(username, limit):
+    """List stored sessions that overlap an earlier session of the same user."""
+    from app import db
+    from app.overlaps import overlap_report_query
+    
+    user_id = None
+    if username:
+        user = User.query.filter_by(username=username).first()
+        if not user:
+            raise click.ClickException(f"User not found: {username}")
+        user_id = user.id
+    
+    rows = db.session.execute(overlap_report_query(user_id)).all()
+    for row in rows[:limit]:
+        click.echo(f"  user={row.user_id} session={row.id} {row.started_at} -> {row.ended_at} (earlier session ends {row.previous_end})")
+    users = len({row.user_id for row in rows})
+    click.echo(f"{'⚠️' if rows else '✅'} {len(rows)} overlapping sessions across {users} users")
+
+plans_cli = AppGroup("plans", help="Query plan checks.")
+
+@plans_cli.command("check")
+def check_plans_command():
+    """Run tests/test_query_plans.py (needs the dev requirements)."""
+    try:
+        import pytest
+    except ImportError:
+        raise click.ClickException("pytest is not installed - pip install -r requirements-dev.txt")
+    
+    test_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "tests", "test_query_plans.py")
+    exit_code = pytest.main(["-q", test_file])
+    if exit_code != 0:
+        raise click.ClickException("query plan checks failed")
+
+partitions_cli = AppGroup("partitions", help="Monthly focus_sessions partitions (Postgres, opt-in).")
+
+def require_partitioning():
+    from app.partitions import partitioning_enabled
+    if not partitioning_enabled():
+        click.echo("ℹ️ focus_sessions is not partitioned (SQLite, or PARTITION_FOCUS_SESSIONS was not set for the migration) - nothing to do")
+        return False
+    return True
+
+@partitions_cli.command("create")
+@click.option("--months-ahead", default=3, show_default=True, help="Create partitions through this many months from now.")
+def create_partitions_command(months_ahead):
+    """Create upcoming monthly partitions (run regularly, e.g. from a daily scheduler)."""
+    from app.partitions import ensure_partitions
+    if not require_partitioning():
+        return
+    created = ensure_partitions(months_ahead)
+    click.echo(f"✅ Created {len(created)} partitions" + (f": {', '.join(created)}" if created else ""))
+
+@partitions_cli.command("archive")
+@click.option("--keep-months", default=24, show_default=True, help="Keep this many months (including the current one) attached.")
+def archive_partitions_command(keep_months):
+    """
+    Detach old monthly partitions into the archive schema. Stats and leaderboards keep their
+    totals via daily rollups, but archived sessions no longer appear in session lists or in
+    GET /api/sessions/export.
+    """
+    from datetime import datetime, timezone
+    from app.partitions import archive_partitions, add_months, month_start
+    if not require_partitioning():
+        return
+    if keep_months < 1:
+        raise click.ClickException("--keep-months must be at least 1")
+    before = add_months(month_start(datetime.now(timezone.utc).date()), 1 - keep_months)
+    archived = archive_partitions(before)
+    click.echo(f"✅ Archived {len(archived)} partitions before {before}" + (f": {', '.join(archived)}" if archived else ""))
+
+leaderboard_cli = AppGroup("leaderboard", help="Leaderboard maintenance.")
+
+@leaderboard_cli.command("snapshot")
+@click.option("--weeks", default=1, show_default=True, help="Freeze this many of the most recent finished weeks.")
+def snapshot_leaderboards_command(weeks):
+    """Freeze finished weeks' leaderboards (run after each week ends, e.g. from a daily scheduler)."""
+    from app import db
+    from app.leaderboard_snapshots import finished_weeks, snapshot_week
+    
+    if weeks < 1:
+        raise click.ClickException("--weeks must be at least 1")
+    for week_start in finished_weeks(weeks):
+        written = snapshot_week(week_start)
+        if written is None:
+            click.echo(f"  {week_start}: already frozen")
+            continue
+        db.session.commit()
+        click.echo(f"✅ {week_start}: froze {written} leaderboard rows")
+
+def register_commands(app):
+    """Attach the maintenance command groups to the Flask CLI."""
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(sessions_cli)
+    app.cli.add_command(plans_cli)
+    app.cli.add_command(partitions_cli)
+    app.cli.add_command(leaderboard_cli)
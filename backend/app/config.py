@@ -24,3 +24,19 @@ class Config:
     FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
     FLASK_PORT = int(os.getenv("FLASK_PORT", "5001"))
     GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID", "")
+    # Stats response cache: "memory://" (per process) or a redis:// URL shared by all workers
+    STATS_CACHE_URL = os.getenv("STATS_CACHE_URL", "memory://")
+    STATS_CACHE_TTL = int(os.getenv("STATS_CACHE_TTL", "300"))
+    STATS_CACHE_MAX_ENTRIES = int(os.getenv("STATS_CACHE_MAX_ENTRIES", "1024"))
+    # GET /api/stats/cache (hit/miss counters) is off unless this is "1" - it is operator data, not per-user
+    STATS_CACHE_ENDPOINT = os.getenv("STATS_CACHE_ENDPOINT") == "1"
+    # Live-session registry: "memory://" (per process) or a redis:// URL shared by all workers;
+    # a live session expires PRESENCE_TTL seconds after its last heartbeat
+    PRESENCE_URL = os.getenv("PRESENCE_URL", os.getenv("STATS_CACHE_URL", "memory://"))
+    PRESENCE_TTL = int(os.getenv("PRESENCE_TTL", "90"))
+    # Weekly leaderboard store: "memory://" (per process, rebuilt every LEADERBOARD_MAX_AGE seconds)
+    # or a redis:// URL shared by all workers
+    LEADERBOARD_URL = os.getenv("LEADERBOARD_URL", os.getenv("STATS_CACHE_URL", "memory://"))
+    LEADERBOARD_MAX_AGE = int(os.getenv("LEADERBOARD_MAX_AGE", "60"))
+    # Response JSON encoder: "orjson" (required dependency) or "stdlib" (slower, for debugging)
+    JSON_PROVIDER = os.getenv("JSON_PROVIDER", "orjson")
@@ -0,0 +1,18 @@
+import hashlib
+from flask import current_app, request
+
+def make_etag(*parts):
+    """Strong ETag value from the inputs a response depends on (user id, data version, params...)."""
+    return hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()
+
+def with_etag(response, etag, private=True):
+    """Attach the ETag and ask clients (and, unless private, shared caches) to revalidate before reusing the body."""
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"{'private' if private else 'public'}, no-cache"
+    return response
+
+def not_modified(etag, private=True):
+    """Return a 304 response if the client already has this ETag, else None."""
+    if request.if_none_match.contains(etag):
+        return with_etag(current_app.response_class(status=304), etag, private)
+    return None
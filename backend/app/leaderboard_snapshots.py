@@ -0,0 +1,95 @@
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy import func, insert
+from app import db
+from app.models import User, LeaderboardSnapshot, FrozenLeaderboardWeek
+from app.access import friends_by_user
+from app.leaderboard_store import current_week_start, week_totals_subquery
+from app.routes.leaderboard import compute_rank_tier
+
+def finished_weeks(count):
+    """Start days of the last count finished leaderboard weeks, oldest first."""
+    latest = current_week_start() - timedelta(days=7)
+    return [latest - timedelta(days=7 * n) for n in reversed(range(count))]
+
+def is_snapshotted(week_start):
+    return db.session.get(FrozenLeaderboardWeek, week_start) is not None
+
+def board_rows(week_start, board, board_key, entries, names):
+    """
+    Snapshot rows for one board; entries are (user_id, total_ms) pairs in any order and
+    names maps user ids to (username, display_name, email_domain).
+    """
+    rows = []
+    rank, previous_ms = 1, None
+    for position, (user_id, total_ms) in enumerate(sorted(entries, key=lambda e: (-e[1], e[0])), start=1):
+        if previous_ms is not None and total_ms != previous_ms:
+            rank = position
+        previous_ms = total_ms
+        username, display_name, email_domain = names[user_id]
+        rows.append({
+            "week_start": week_start,
+            "board": board,
+            "board_key": board_key,
+            "position": position,
+            "rank": rank,
+            "user_id": user_id,
+            "username": username,
+            "display_name": display_name,
+            "email_domain": email_domain,
+            "total_ms": total_ms,
+            "tier": compute_rank_tier(total_ms / 3600000)
+        })
+    return rows
+
+def snapshot_week(week_start, chunk_size=5000):
+    """
+    Freeze a finished week's global, domain and friends boards into leaderboard_snapshots,
+    matching the live boards: global and domain list public users with time logged, friends
+    boards list every member (friendships and names as of now). Returns the number of rows written,
+    or None if the week was already frozen. Does not commit.
+    """
+    if is_snapshotted(week_start):
+        return None
+    
+    # Every user's total for the week in one pass (friends boards include users without time)
+    totals = week_totals_subquery(week_start, week_start + timedelta(days=6))
+    users = db.session.query(
+        User.id, User.username, User.display_name, User.email_domain, User.privacy_opt_in,
+        func.coalesce(totals.c.total_ms, 0)
+    ).outerjoin(totals, totals.c.user_id == User.id).yield_per(1000)
+    
+    week_ms = {}
+    names = {}
+    public_entries = []
+    domain_entries = defaultdict(list)
+    for user_id, username, display_name, email_domain, public, total_ms in users:
+        total_ms = int(total_ms)
+        week_ms[user_id] = total_ms
+        names[user_id] = (username, display_name, email_domain)
+        if public and total_ms > 0:
+            public_entries.append((user_id, total_ms))
+            domain_entries[email_domain].append((user_id, total_ms))
+    
+    friends = friends_by_user()
+    
+    boards = [("global", "", public_entries)]
+    boards += [("domain", email_domain, entries) for email_domain, entries in domain_entries.items()]
+    boards += [
+        ("friends", str(owner_id), [(user_id, week_ms.get(user_id, 0)) for user_id in members | {owner_id}])
+        for owner_id, members in friends.items()
+    ]
+    
+    written, pending = 0, []
+    for board, board_key, entries in boards:
+        pending.extend(board_rows(week_start, board, board_key, entries, names))
+        if len(pending) >= chunk_size:
+            db.session.execute(insert(LeaderboardSnapshot), pending)
+            written, pending = written + len(pending), []
+    if pending:
+        db.session.execute(insert(LeaderboardSnapshot), pending)
+        written += len(pending)
+    # Marks the week frozen even when it has no rows (a concurrent run fails on the primary key)
+    db.session.add(FrozenLeaderboardWeek(week_start=week_start, row_count=written))
+    db.session.flush()
+    return written
@@ -0,0 +1,514 @@
+import threading
+import time
+import uuid
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import func, select
+from app import db
+from app.models import User, UserDailyTotal
+from app.redis_client import RedisError, get_redis
+
+# Optional: SortedList gives O(log n) inserts; without it a plain sorted list is used
+# (O(log n) lookups, O(n) inserts - fine for tens of thousands of users)
+try:
+    from sortedcontainers import SortedList
+except ImportError:
+    class SortedList:
+        def __init__(self, iterable=()):
+            self._items = sorted(iterable)
+
+        def add(self, value):
+            insort(self._items, value)
+
+        def remove(self, value):
+            del self._items[bisect_left(self._items, value)]
+
+        def bisect_left(self, value):
+            return bisect_left(self._items, value)
+
+        def __getitem__(self, index):
+            return self._items[index]
+
+        def __len__(self):
+            return len(self._items)
+
+def week_start_for(day):
+    """Leaderboard weeks run Sunday to Saturday, UTC."""
+    return day - timedelta(days=(day.weekday() + 1) % 7)
+
+def current_week_start():
+    return week_start_for(datetime.now(timezone.utc).date())
+
+def week_bounds(week_start):
+    """UTC [start, end) datetimes of a leaderboard week."""
+    start_dt = datetime.combine(week_start, datetime.min.time(), tzinfo=timezone.utc)
+    return start_dt, start_dt + timedelta(days=7)
+
+def week_period(week_start):
+    return f"week:{week_start.isoformat()}"
+
+# Board scopes. Per-domain boards rank users like the global one; DOMAINS and DOMAIN_USERS
+# are keyed by domain name and hold each domain's total time and number of active users.
+GLOBAL = "global"
+DOMAINS = "domains"
+DOMAIN_USERS = "domain-users"
+NAMED_SCOPES = (DOMAINS, DOMAIN_USERS)
+
+def domain_scope(email_domain):
+    return f"domain:{email_domain}"
+
+def cumulative_through(day):
+    """
+    Correlated subquery for User rows: the user's running total at their latest day <= day
+    (0 if none) - one seek on unique_user_daily_total.
+    """
+    latest = select(UserDailyTotal.cumulative_ms).where(
+        UserDailyTotal.user_id == User.id,
+        UserDailyTotal.day <= day
+    ).order_by(UserDailyTotal.day.desc()).limit(1).correlate(User).scalar_subquery()
+    return func.coalesce(latest, 0)
+
+def window_total(first_day, last_day):
+    """
+    Each user's time over the UTC days [first_day, last_day] (first_day None: all time) as a
+    difference of two running totals, so a 90-day window costs the same as a week.
+    """
+    total = cumulative_through(last_day)
+    if first_day is not None:
+        total = total - cumulative_through(first_day - timedelta(days=1))
+    return total
+
+class BoardUnavailable(Exception):
+    """The board store could not be reached, or another worker is building the board."""
+
+class MemoryBoards:
+    """
+    In-process sorted boards of (user_id -> total_ms), one per (period, scope).
+    Each worker only sees its own writes, so a board is rebuilt from the database
+    once it is max_age seconds old - use Redis to share boards between workers.
+    """
+    backend = "memory"
+
+    def __init__(self, max_age=60):
+        self.max_age = max_age
+        self._boards = {}  # (period, scope) -> (built_at, {user_id: total_ms}, SortedList of (-total_ms, user_id))
+        self._lock = threading.Lock()
+
+    def exists(self, period, scope):
+        with self._lock:
+            board = self._boards.get((period, scope))
+            return board is not None and board[0] + self.max_age > time.monotonic()
+
+    def replace(self, period, scope, entries):
+        """
+        Swap in a freshly built board from (user_id, total_ms) pairs and drop boards of
+        older periods. Returns the board's size.
+        """
+        scores = dict(entries)
+        order = SortedList((-total_ms, user_id) for user_id, total_ms in scores.items())
+        with self._lock:
+            for key in [key for key in self._boards if key[0] < period]:
+                del self._boards[key]
+            self._boards[(period, scope)] = (time.monotonic(), scores, order)
+        return len(scores)
+
+    def _set(self, board, user_id, total_ms):
+        _, scores, order = board
+        if user_id in scores:
+            order.remove((-scores.pop(user_id), user_id))
+        if total_ms > 0:
+            scores[user_id] = total_ms
+            order.add((-total_ms, user_id))
+
+    def set(self, period, scope, user_id, total_ms):
+        """Set a user's total (0 or less removes them). Ignored if the board is not built."""
+        with self._lock:
+            board = self._boards.get((period, scope))
+            if board is not None:
+                self._set(board, user_id, total_ms)
+
+    def add(self, period, scope, user_id, delta_ms):
+        """Add to a user's total; returns the new total, or None if the board is not built."""
+        with self._lock:
+            board = self._boards.get((period, scope))
+            if board is None:
+                return None
+            total_ms = board[1].get(user_id, 0) + delta_ms
+            self._set(board, user_id, total_ms)
+            return total_ms
+
+    def discard(self, period, scope):
+        """Drop a board so the next read rebuilds it."""
+        with self._lock:
+            self._boards.pop((period, scope), None)
+
+    def top(self, period, scope, limit, offset=0):
+        """[(user_id, total_ms), ...] from position offset, highest first."""
+        with self._lock:
+            board = self._boards.get((period, scope))
+            if board is None:
+                return []
+            return [(user_id, -negative_ms) for negative_ms, user_id in board[2][offset:offset + limit]]
+
+    def rank_of(self, period, scope, total_ms):
+        """Rank a total would have: 1 + the number of strictly higher totals (ties share a rank)."""
+        # (-total_ms,) sorts before every (-total_ms, member), whether members are ids or domain names
+        with self._lock:
+            board = self._boards.get((period, scope))
+            return board[2].bisect_left((-total_ms,)) + 1 if board else 1
+
+    def rank(self, period, scope, user_id):
+        """(rank, total_ms) with ties sharing a rank, or None if the user has no time on the board."""
+        with self._lock:
+            board = self._boards.get((period, scope))
+            if board is None or user_id not in board[1]:
+                return None
+            total_ms = board[1][user_id]
+            return board[2].bisect_left((-total_ms,)) + 1, total_ms
+
+    def position(self, period, scope, user_id):
+        """0-based index of the user in top() order, or None."""
+        with self._lock:
+            board = self._boards.get((period, scope))
+            if board is None or user_id not in board[1]:
+                return None
+            return board[2].bisect_left((-board[1][user_id], user_id))
+
+    def size(self, period, scope):
+        with self._lock:
+            board = self._boards.get((period, scope))
+            return len(board[1]) if board else 0
+
+# Writes and the final swap of a build run as scripts so "is the board built, or being built?"
+# and the write it decides on happen atomically. KEYS are the board's key, :built, :lock,
+# :pending (ZINCRBYs made during a build, replayed after it) and :stale (a set or discard
+# during a build, which cancels it).
+ADD_SCRIPT = """
+if redis.call('exists', KEYS[2]) == 1 then
+  return redis.call('zincrby', KEYS[1], ARGV[2], ARGV[1])
+end
+if redis.call('exists', KEYS[3]) == 1 then
+  redis.call('hincrby', KEYS[4], ARGV[1], ARGV[2])
+  redis.call('pexpire', KEYS[4], redis.call('pttl', KEYS[3]))
+end
+return false
+"""
+
+SET_SCRIPT = """
+if redis.call('exists', KEYS[2]) == 1 then
+  if tonumber(ARGV[2]) > 0 then
+    redis.call('zadd', KEYS[1], ARGV[2], ARGV[1])
+  else
+    redis.call('zrem', KEYS[1], ARGV[1])
+  end
+elseif redis.call('exists', KEYS[3]) == 1 then
+  redis.call('set', KEYS[5], 1, 'PX', redis.call('pttl', KEYS[3]))
+end
+return false
+"""
+
+DISCARD_SCRIPT = """
+redis.call('del', KEYS[1], KEYS[2])
+if redis.call('exists', KEYS[3]) == 1 then
+  redis.call('set', KEYS[5], 1, 'PX', redis.call('pttl', KEYS[3]))
+end
+return false
+"""
+
+# KEYS: board, :built, :lock, :pending, :stale, staging. ARGV: lock token, keep_seconds.
+# Returns the board's size, or -1 if the lock was lost or the build went stale.
+SWAP_SCRIPT = """
+if redis.call('get', KEYS[3]) ~= ARGV[1] then
+  redis.call('del', KEYS[6])
+  return -1
+end
+if redis.call('exists', KEYS[5]) == 1 then
+  redis.call('del', KEYS[6], KEYS[4], KEYS[5], KEYS[3])
+  return -1
+end
+local pending = redis.call('hgetall', KEYS[4])
+for i = 1, #pending, 2 do
+  redis.call('zincrby', KEYS[6], pending[i + 1], pending[i])
+end
+if redis.call('exists', KEYS[6]) == 1 then
+  redis.call('rename', KEYS[6], KEYS[1])
+  redis.call('expire', KEYS[1], ARGV[2])
+else
+  redis.call('del', KEYS[1])
+end
+redis.call('set', KEYS[2], 1, 'EX', ARGV[2])
+redis.call('del', KEYS[4], KEYS[3])
+return redis.call('zcard', KEYS[1])
+"""
+
+# KEYS: :lock, staging. ARGV: lock token. Drops a failed build's staging set and lock.
+RELEASE_SCRIPT = """
+redis.call('del', KEYS[2])
+if redis.call('get', KEYS[1]) == ARGV[1] then
+  redis.call('del', KEYS[1])
+end
+return false
+"""
+
+class RedisBoards:
+    """
+    Boards stored as Redis sorted sets (ZINCRBY on writes, ZREVRANGE/ZCOUNT on reads,
+    all O(log n)), shared across workers. Boards expire two weeks after they are built.
+    One worker builds a board at a time (SET NX lock); increments made while it builds
+    are journaled and replayed onto the new board when it is swapped in.
+    Read and build failures raise BoardUnavailable; write failures are logged and ignored.
+    """
+    backend = "redis"
+
+    def __init__(self, client, prefix="leaderboard", keep_seconds=14 * 24 * 3600, lock_seconds=60):
+        self.prefix = prefix
+        self.keep_seconds = keep_seconds
+        self.lock_seconds = lock_seconds
+        self._client = client
+        self._add = client.register_script(ADD_SCRIPT)
+        self._set = client.register_script(SET_SCRIPT)
+        self._discard = client.register_script(DISCARD_SCRIPT)
+        self._swap = client.register_script(SWAP_SCRIPT)
+        self._release = client.register_script(RELEASE_SCRIPT)
+
+    def _key(self, period, scope):
+        return f"{self.prefix}:{period}:{scope}"
+
+    def _keys(self, period, scope):
+        key = self._key(period, scope)
+        return [key, key + ":built", key + ":lock", key + ":pending", key + ":stale"]
+
+    def _call(self, action, *args):
+        try:
+            return action(*args)
+        except RedisError as e:
+            print(f"⚠️ Leaderboard store unavailable: {e}")
+            raise BoardUnavailable(str(e))
+
+    def exists(self, period, scope):
+        return bool(self._call(self._client.exists, self._key(period, scope) + ":built"))
+
+    def replace(self, period, scope, entries, chunk_size=1000):
+        """
+        Load (user_id, total_ms) pairs into this build's own staging set in chunks, then swap it
+        in. Returns the board's size, or None if another worker holds the build lock (entries
+        is not consumed then) or a set/discard during the build made it stale.
+        """
+        keys = self._keys(period, scope)
+        token = uuid.uuid4().hex
+        staging = f"{keys[0]}:staging:{token}"
+        locked = self._call(lambda: self._client.set(keys[2], token, px=int(self.lock_seconds * 1000), nx=True))
+        if not locked:
+            return None
+        try:
+            chunk = {}
+            for user_id, total_ms in entries:
+                chunk[str(user_id)] = total_ms
+                if len(chunk) >= chunk_size:
+                    self._load(staging, chunk)
+                    chunk = {}
+            if chunk:
+                self._load(staging, chunk)
+            size = self._swap(keys=keys + [staging], args=[token, self.keep_seconds])
+        except Exception as e:
+            print(f"⚠️ Leaderboard build failed: {e}")
+            try:
+                self._release(keys=[keys[2], staging], args=[token])
+            except RedisError:
+                pass  # the lock and staging set expire on their own
+            if isinstance(e, RedisError):
+                raise BoardUnavailable(str(e))
+            raise
+        return None if size < 0 else size
+
+    def _load(self, staging, chunk):
+        pipe = self._client.pipeline()
+        pipe.zadd(staging, chunk)
+        pipe.expire(staging, self.lock_seconds)
+        pipe.execute()
+
+    def set(self, period, scope, user_id, total_ms):
+        try:
+            self._set(keys=self._keys(period, scope), args=[str(user_id), total_ms])
+        except RedisError as e:
+            print(f"⚠️ Leaderboard store write failed: {e}")
+
+    def add(self, period, scope, user_id, delta_ms):
+        try:
+            total_ms = self._add(keys=self._keys(period, scope), args=[str(user_id), delta_ms])
+        except RedisError as e:
+            print(f"⚠️ Leaderboard store write failed: {e}")
+            return None
+        return int(float(total_ms)) if total_ms is not None else None
+
+    def discard(self, period, scope):
+        try:
+            self._discard(keys=self._keys(period, scope))
+        except RedisError as e:
+            print(f"⚠️ Leaderboard store write failed: {e}")
+
+    def top(self, period, scope, limit, offset=0):
+        members = self._call(
+            self._client.zrevrange, self._key(period, scope), offset, offset + limit - 1, True
+        )
+        if scope in NAMED_SCOPES:
+            return [(member.decode(), int(score)) for member, score in members]
+        return [(int(member), int(score)) for member, score in members]
+
+    def rank_of(self, period, scope, total_ms):
+        """Rank a total would have: 1 + the number of strictly higher totals (ties share a rank)."""
+        return self._call(self._client.zcount, self._key(period, scope), f"({total_ms}", "+inf") + 1
+
+    def rank(self, period, scope, user_id):
+        score = self._call(self._client.zscore, self._key(period, scope), str(user_id))
+        if not score:
+            return None
+        return self.rank_of(period, scope, int(score)), int(score)
+
+    def position(self, period, scope, user_id):
+        return self._call(self._client.zrevrank, self._key(period, scope), str(user_id))
+
+    def size(self, period, scope):
+        return self._call(self._client.zcard, self._key(period, scope))
+
+def init_leaderboards(app):
+    """Create the leaderboard store from LEADERBOARD_URL ("memory://" or "redis://...")."""
+    url = app.config.get("LEADERBOARD_URL") or "memory://"
+
+    client = get_redis(url, "LEADERBOARD_URL")
+    if client is not None:
+        boards = RedisBoards(client)
+    else:
+        boards = MemoryBoards(app.config.get("LEADERBOARD_MAX_AGE", 60))
+
+    app.extensions["leaderboards"] = boards
+    return boards
+
+def get_boards():
+    return current_app.extensions["leaderboards"]
+
+def week_totals_subquery(first_day, last_day):
+    """Each user's summed daily totals over the UTC days [first_day, last_day] (covering index range scan)."""
+    return db.session.query(
+        UserDailyTotal.user_id,
+        func.sum(UserDailyTotal.total_ms).label("total_ms")
+    ).filter(
+        UserDailyTotal.day >= first_day,
+        UserDailyTotal.day <= last_day
+    ).group_by(UserDailyTotal.user_id).subquery()
+
+def board_totals(first_day, last_day, user_filter=None):
+    """
+    (user_id, total_ms) for users with time in the UTC days [first_day, last_day], highest
+    first: one query of users joined to their summed daily totals, filtered and ordered in
+    SQL and streamed in batches - no id lists, however many users there are.
+    """
+    totals = week_totals_subquery(first_day, last_day)
+    query = db.session.query(User.id, totals.c.total_ms).join(
+        totals, totals.c.user_id == User.id
+    ).filter(totals.c.total_ms > 0)
+    if user_filter is not None:
+        query = query.filter(user_filter)
+    rows = query.order_by(totals.c.total_ms.desc(), User.id).yield_per(1000)
+    return ((user_id, int(total_ms)) for user_id, total_ms in rows)
+
+def weekly_totals(week_start, email_domain=None):
+    """Board entries for public users (of one domain) with time in the week, highest first (see board_totals)."""
+    user_filter = User.privacy_opt_in == True
+    if email_domain is not None:
+        user_filter = user_filter & (User.email_domain == email_domain)
+    return board_totals(week_start, week_start + timedelta(days=6), user_filter)
+
+def weekly_domain_totals(week_start):
+    """[(email_domain, total_ms, active_users), ...] over public users with time in the week - one grouped query."""
+    totals = week_totals_subquery(week_start, week_start + timedelta(days=6))
+    rows = db.session.query(
+        User.email_domain,
+        func.sum(totals.c.total_ms),
+        func.count()
+    ).join(totals, totals.c.user_id == User.id).filter(
+        totals.c.total_ms > 0,
+        User.privacy_opt_in == True
+    ).group_by(User.email_domain).all()
+    return [(email_domain, int(total_ms), active_users) for email_domain, total_ms, active_users in rows]
+
+def ensure_board(scope, build):
+    """Period key of the current week's board for scope, built with build(week_start) on cold start or rollover."""
+    week_start = current_week_start()
+    period = week_period(week_start)
+    boards = get_boards()
+    if not boards.exists(period, scope):
+        size = boards.replace(period, scope, build(week_start))
+        if size is None:
+            raise BoardUnavailable(f"{period} {scope} is being rebuilt")
+        print(f"📊 Built weekly leaderboard {period} {scope}: {size} entries")
+    return period
+
+def weekly_board():
+    """Period key of the current week's global board."""
+    return ensure_board(GLOBAL, weekly_totals)
+
+def domain_board(email_domain):
+    """Period key of the current week's board for one email domain."""
+    return ensure_board(domain_scope(email_domain), lambda week_start: weekly_totals(week_start, email_domain))
+
+def domains_board():
+    """Period key of the current week's DOMAINS and DOMAIN_USERS boards, built together from one query."""
+    week_start = current_week_start()
+    period = week_period(week_start)
+    boards = get_boards()
+    if not (boards.exists(period, DOMAINS) and boards.exists(period, DOMAIN_USERS)):
+        rows = weekly_domain_totals(week_start)
+        built = [
+            boards.replace(period, DOMAIN_USERS, ((email_domain, active) for email_domain, _, active in rows)),
+            boards.replace(period, DOMAINS, ((email_domain, total_ms) for email_domain, total_ms, _ in rows))
+        ]
+        if None in built:
+            raise BoardUnavailable(f"{period} domain ranking is being rebuilt")
+        print(f"📊 Built weekly domain ranking {period}: {len(rows)} domains")
+    return period
+
+def record_weekly_sessions(user_id, email_domain, public, sessions):
+    """
+    Add newly committed sessions [(started_at, duration_ms), ...] to the current week's
+    global and domain boards and the domain ranking. Boards that are not built yet pick
+    the sessions up when they are built.
+    """
+    if not public:
+        return
+    week_start = current_week_start()
+    start_dt, end_dt = week_bounds(week_start)
+    delta_ms = sum(duration_ms for started_at, duration_ms in sessions if start_dt <= started_at < end_dt)
+    if not delta_ms:
+        return
+
+    period = week_period(week_start)
+    boards = get_boards()
+    total_ms = boards.add(period, GLOBAL, user_id, delta_ms)
+    boards.add(period, domain_scope(email_domain), user_id, delta_ms)
+    boards.add(period, DOMAINS, email_domain, delta_ms)
+    if total_ms is None:
+        # Can't tell whether this is the user's first time this week - recount on next read
+        boards.discard(period, DOMAIN_USERS)
+    elif total_ms == delta_ms:
+        boards.add(period, DOMAIN_USERS, email_domain, 1)
+
+def weekly_user_changed(user_id, email_domain, public):
+    """Re-place a user on the current boards after a privacy change."""
+    week_start = current_week_start()
+    total_ms = 0
+    if public:
+        total_ms = db.session.query(func.sum(UserDailyTotal.total_ms)).filter(
+            UserDailyTotal.user_id == user_id,
+            UserDailyTotal.day >= week_start,
+            UserDailyTotal.day <= week_start + timedelta(days=6)
+        ).scalar() or 0
+
+    period = week_period(week_start)
+    boards = get_boards()
+    boards.set(period, GLOBAL, user_id, int(total_ms))
+    boards.set(period, domain_scope(email_domain), user_id, int(total_ms))
+    # The domain's totals and head count change too; one grouped query rebuilds them
+    boards.discard(period, DOMAINS)
+    boards.discard(period, DOMAIN_USERS)
@@ -1,5 +1,6 @@
 from datetime import datetime, timezone
 from . import db
+from .periods import as_utc
 
 def utc_now():
     """Return timezone-aware UTC datetime."""
@@ -18,6 +19,12 @@ class User(db.Model):
     timezone = db.Column(db.String(50), default="UTC")
     privacy_opt_in = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime(timezone=True), default=utc_now, nullable=False)
+    data_version = db.Column(db.Integer, default=0, nullable=False)  # bumped whenever the user's stats change
+    
+    __table_args__ = (
+        # Domain leaderboards: public users of one email domain
+        db.Index("ix_users_domain_privacy", "email_domain", "privacy_opt_in"),
+    )
     
     # Relationships
     sessions = db.relationship(
@@ -49,9 +56,16 @@ class User(db.Model):
             "email_domain": self.email_domain,
             "privacy_opt_in": self.privacy_opt_in,
             "timezone": self.timezone,
-            "username_changed_at": self.username_changed_at.isoformat() if self.username_changed_at else None
+            "username_changed_at": self.username_changed_at
         }
 
+def bump_data_version(user_id):
+    """Atomically increment a user's data version (changes their stats ETags). Does not commit."""
+    User.query.filter_by(id=user_id).update(
+        {User.data_version: User.data_version + 1},
+        synchronize_session=False
+    )
+
 class Subject(db.Model):
     __tablename__ = "subjects"
     
@@ -63,12 +77,17 @@ class Subject(db.Model):
     
     user = db.relationship("User", backref="subjects")
     
+    __table_args__ = (
+        # Subject lists, duplicate-name checks and the "All Subjects" lookup
+        db.Index("ix_subjects_user_name", "user_id", "name"),
+    )
+    
     def to_dict(self):
         return {
             "id": self.id,
             "name": self.name,
             "color": self.color,
-            "createdAt": self.created_at.isoformat()
+            "createdAt": self.created_at
         }
 
 class FocusSession(db.Model):
@@ -85,21 +104,28 @@ class FocusSession(db.Model):
     user = db.relationship("User", back_populates="sessions")
     subject = db.relationship("Subject", backref="sessions")
     
+    __table_args__ = (
+        # Keyset pagination and date-range scans: WHERE user_id = ? ORDER BY started_at DESC, id DESC
+        db.Index("ix_focus_sessions_user_started", "user_id", "started_at", "id"),
+        # Overlap checks: latest session starting before a time, and its end, from the index alone
+        db.Index("ix_focus_sessions_user_interval", "user_id", "started_at", "ended_at"),
+        # Leaderboards: everyone's sessions in a time window
+        db.Index("ix_focus_sessions_started", "started_at"),
+        # Re-pointing sessions when a subject is deleted
+        db.Index("ix_focus_sessions_subject", "subject_id"),
+    )
+    
     def to_dict(self):
-        # Get subject name if available
-        subject_name = None
-        if self.subject_id:
-            subject = Subject.query.get(self.subject_id)
-            if subject:
-                subject_name = subject.name
+        # Get subject name if available (eager-load `subject` when serializing lists)
+        subject_name = self.subject.name if self.subject_id and self.subject else None
         
         return {
             "id": self.id,
             "subject_id": self.subject_id,
             "subject": subject_name or "All Subjects",
             "duration_ms": self.duration_ms,
-            "started_at": self.started_at.isoformat(),
-            "ended_at": self.ended_at.isoformat()
+            "started_at": as_utc(self.started_at),
+            "ended_at": as_utc(self.ended_at)
         }
 
 class Friend(db.Model):
@@ -125,4 +151,78 @@ class Friend(db.Model):
     
     __table_args__ = (
         db.UniqueConstraint("requester_id", "addressee_id", name="unique_friend_pair"),
+        # Incoming requests and friend lookups from the addressee side (the unique pair covers the requester side)
+        db.Index("ix_friends_addressee_status", "addressee_id", "status"),
+    )
+
+class DailyRollup(db.Model):
+    """Pre-aggregated focus time per (user, subject, local day), maintained on session writes."""
+    __tablename__ = "daily_rollups"
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    subject_id = db.Column(db.Integer, db.ForeignKey("subjects.id"), nullable=True)  # null means "All Subjects"/general
+    # subject_id with 0 for null: unique constraints treat nulls as distinct, so upserts key on this
+    subject_key = db.Column(db.Integer, default=0, nullable=False)
+    local_day = db.Column(db.Date, nullable=False)  # calendar day in the user's timezone
+    total_ms = db.Column(db.BigInteger, default=0, nullable=False)
+    session_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "subject_key", "local_day", name="unique_daily_rollup"),
+        db.Index("ix_daily_rollups_user_day", "user_id", "local_day"),
     )
+
+class UserDailyTotal(db.Model):
+    """
+    Focus time per (user, UTC day) plus a running total through that day, for leaderboards.
+    Any window's total is cumulative_ms at its last day minus cumulative_ms before its first.
+    """
+    __tablename__ = "user_daily_totals"
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    day = db.Column(db.Date, nullable=False)  # UTC calendar day, like leaderboard weeks
+    total_ms = db.Column(db.BigInteger, default=0, nullable=False)
+    cumulative_ms = db.Column(db.BigInteger, default=0, nullable=False)  # all of the user's time up to and including day
+    
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "day", name="unique_user_daily_total"),
+        # Building a whole board: every user's rows for a range of days
+        db.Index("ix_user_daily_totals_day_user", "day", "user_id", "total_ms"),
+    )
+
+class LeaderboardSnapshot(db.Model):
+    """
+    A finished week's leaderboard, frozen by `flask leaderboard snapshot`: one row per user
+    per board. board is "global" (board_key ""), "domain" (the email domain) or "friends"
+    (the owner's user id). Names are copied as they were that week. Rows are never updated once written.
+    """
+    __tablename__ = "leaderboard_snapshots"
+    
+    id = db.Column(db.Integer, primary_key=True)
+    week_start = db.Column(db.Date, nullable=False)  # Sunday (UTC) the week began
+    board = db.Column(db.String(16), nullable=False)
+    board_key = db.Column(db.String(255), nullable=False, default="")
+    position = db.Column(db.Integer, nullable=False)  # 1-based order on the board (rank with ties broken)
+    rank = db.Column(db.Integer, nullable=False)  # ties share a rank
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    username = db.Column(db.String(32), nullable=False)
+    display_name = db.Column(db.String(80), nullable=True)
+    email_domain = db.Column(db.String(255), nullable=False)
+    total_ms = db.Column(db.BigInteger, nullable=False)
+    tier = db.Column(db.String(20), nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint("week_start", "board", "board_key", "position", name="unique_snapshot_position"),
+        # around=me on a frozen board
+        db.Index("ix_leaderboard_snapshots_user", "week_start", "board", "board_key", "user_id"),
+    )
+
+class FrozenLeaderboardWeek(db.Model):
+    """A week whose leaderboards have been frozen into leaderboard_snapshots - even if no one had time that week."""
+    __tablename__ = "frozen_leaderboard_weeks"
+    
+    week_start = db.Column(db.Date, primary_key=True)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    frozen_at = db.Column(db.DateTime(timezone=True), default=utc_now, nullable=False)
@@ -0,0 +1,97 @@
+from bisect import bisect_left
+from datetime import timedelta
+from sqlalchemy import func, select, text
+from app import db
+from app.models import FocusSession
+from app.periods import as_utc
+
+# Sessions are capped at 10 hours, so anything overlapping [start, end) started after start - 10h
+MAX_SESSION_SPAN = timedelta(hours=10)
+
+# First key of the two-key advisory locks taken by lock_user_sessions (second key: the user id)
+SESSION_LOCK_NAMESPACE = 7201
+
+def lock_user_sessions(user_id):
+    """
+    Serialize session writes for one user until the transaction ends, so two requests can't
+    both pass the overlap check and insert overlapping sessions. PostgreSQL only
+    (pg_advisory_xact_lock); SQLite already allows a single writer at a time.
+    """
+    if db.engine.dialect.name == "postgresql":
+        db.session.execute(
+            text("SELECT pg_advisory_xact_lock(:namespace, :user_id)"),
+            {"namespace": SESSION_LOCK_NAMESPACE, "user_id": user_id}
+        )
+
+def find_overlap(user_id, started_at, ended_at):
+    """
+    Return (id, started_at, ended_at) of the user's earliest session overlapping
+    [started_at, ended_at), or None.
+
+    One bounded range probe on (user_id, started_at, ended_at): only sessions starting in
+    [started_at - MAX_SESSION_SPAN, ended_at) can intersect, and the ended_at test is
+    answered from the same index. Correct even if stored sessions already overlap each other.
+    """
+    return db.session.query(
+        FocusSession.id, FocusSession.started_at, FocusSession.ended_at
+    ).filter(
+        FocusSession.user_id == user_id,
+        FocusSession.started_at >= started_at - MAX_SESSION_SPAN,
+        FocusSession.started_at < ended_at,
+        FocusSession.ended_at > started_at
+    ).order_by(FocusSession.started_at).first()
+
+def existing_intervals(user_id, started_at, ended_at):
+    """
+    Sorted (started_at, ended_at, id) of the user's sessions that could overlap anything
+    in [started_at, ended_at). One bounded range scan, answered from the index.
+    """
+    rows = db.session.query(
+        FocusSession.started_at, FocusSession.ended_at, FocusSession.id
+    ).filter(
+        FocusSession.user_id == user_id,
+        FocusSession.started_at >= started_at - MAX_SESSION_SPAN,
+        FocusSession.started_at < ended_at
+    ).order_by(FocusSession.started_at).all()
+    return [(as_utc(start), as_utc(end), session_id) for start, end, session_id in rows]
+
+def overlapping_interval(intervals, started_at, ended_at):
+    """
+    Same check as find_overlap, against a sorted list from existing_intervals. Returns the id
+    of the latest-starting overlapping session, or None. Walks back from the last session
+    starting before ended_at, at most MAX_SESSION_SPAN, so overlapping stored sessions can't
+    hide one another.
+    """
+    earliest = started_at - MAX_SESSION_SPAN
+    position = bisect_left(intervals, (ended_at,)) - 1
+    while position >= 0 and intervals[position][0] >= earliest:
+        if intervals[position][1] > started_at:
+            return intervals[position][2]
+        position -= 1
+    return None
+
+def overlap_report_query(user_id=None):
+    """
+    Existing sessions that overlap an earlier session of the same user.
+
+    A session overlaps iff it starts before the latest end among the user's earlier
+    sessions, i.e. MAX(ended_at) over the preceding rows - one ordered pass over the index.
+    """
+    previous_end = func.max(FocusSession.ended_at).over(
+        partition_by=FocusSession.user_id,
+        order_by=(FocusSession.started_at, FocusSession.id),
+        rows=(None, -1)
+    )
+    ordered = select(
+        FocusSession.id,
+        FocusSession.user_id,
+        FocusSession.started_at,
+        FocusSession.ended_at,
+        previous_end.label("previous_end")
+    )
+    if user_id is not None:
+        ordered = ordered.where(FocusSession.user_id == user_id)
+    ordered = ordered.subquery("ordered")
+    return select(ordered).where(
+        ordered.c.started_at < ordered.c.previous_end
+    ).order_by(ordered.c.user_id, ordered.c.started_at)
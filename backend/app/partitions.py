@@ -0,0 +1,93 @@
+import re
+from datetime import date, datetime, timezone
+from sqlalchemy import text
+from app import db
+
+# Monthly partitions of focus_sessions are named focus_sessions_y2026m01 etc.
+PARTITION_PREFIX = "focus_sessions_y"
+PARTITION_NAME = re.compile(r"^focus_sessions_y(\d{4})m(\d{2})$")
+ARCHIVE_SCHEMA = "archive"
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month):
+    return f"{PARTITION_PREFIX}{month.year:04d}m{month.month:02d}"
+
+def partitioning_enabled():
+    """True if focus_sessions is a partitioned table (Postgres only; see migration b7e2d4a9c815)."""
+    if db.engine.dialect.name != "postgresql":
+        return False
+    return bool(db.session.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('focus_sessions')"
+    )).scalar())
+
+def list_partitions(schema="public"):
+    """Months that have a focus_sessions partition in the given schema, sorted."""
+    names = db.session.execute(text(
+        "SELECT tablename FROM pg_tables WHERE schemaname = :schema AND tablename LIKE :pattern"
+    ), {"schema": schema, "pattern": PARTITION_PREFIX + "%"}).scalars()
+    months = []
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+def ensure_partitions(months_ahead=3, today=None):
+    """
+    Create monthly partitions from the current month through months_ahead. Returns the names created.
+    Run this before a month begins: once rows for a month have landed in the default
+    partition, Postgres refuses to create that month's partition.
+    """
+    if today is None:
+        today = datetime.now(timezone.utc).date()
+    existing = set(list_partitions()) | set(list_partitions(ARCHIVE_SCHEMA))
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(month_start(today), offset)
+        if month in existing:
+            continue
+        name = partition_name(month)
+        # Bounds are literal timestamps; identifiers come from partition_name(), never user input
+        db.session.execute(text(
+            f"CREATE TABLE {name} PARTITION OF focus_sessions "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+        ))
+        created.append(name)
+    db.session.commit()
+    return created
+
+def archive_partitions(before_month):
+    """
+    Detach every monthly partition that ends on or before before_month and move it
+    into the archive schema (still queryable as archive.focus_sessions_y...).
+    Returns the names archived.
+    """
+    db.session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+    archived = []
+    for month in list_partitions():
+        if add_months(month, 1) > before_month:
+            continue
+        name = partition_name(month)
+        db.session.execute(text(f"ALTER TABLE focus_sessions DETACH PARTITION {name}"))
+        db.session.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        archived.append(name)
+    db.session.commit()
+    return archived
+
+def archive_cutoff():
+    """
+    First day still held in focus_sessions when older months have been archived, else None.
+    Code that rebuilds from raw sessions must keep derived data before this day.
+    """
+    if not partitioning_enabled():
+        return None
+    archived = list_partitions(ARCHIVE_SCHEMA)
+    if not archived:
+        return None
+    return add_months(archived[-1], 1)
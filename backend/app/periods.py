@@ -0,0 +1,61 @@
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from sqlalchemy import Date, cast, func
+from app import db
+
+def user_zone(user):
+    """Return the tzinfo for a user's stored timezone (UTC if missing or unknown)."""
+    try:
+        return ZoneInfo(user.timezone or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+def is_valid_timezone(name):
+    """Check that a timezone name is a known IANA zone."""
+    try:
+        ZoneInfo(name)
+        return True
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+
+def zone_name(zone):
+    """IANA name for a tzinfo returned by user_zone()."""
+    return getattr(zone, "key", "UTC")
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD query parameter (raises ValueError on bad input)."""
+    return date.fromisoformat(value)
+
+def as_utc(dt):
+    """Treat naive datetimes (SQLite drops offsets) as UTC and convert aware ones to UTC."""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+def local_date(dt, zone):
+    """Calendar day of a stored timestamp in the given timezone."""
+    return as_utc(dt).astimezone(zone).date()
+
+def local_today(zone):
+    """Today's date in the given timezone."""
+    return datetime.now(zone).date()
+
+def local_day_bounds(start_date, end_date, zone):
+    """
+    Convert an inclusive range of local days into UTC timestamps [start, end).
+    Use as `started_at >= start AND started_at < end` so an index on started_at applies.
+    """
+    start = datetime.combine(start_date, time.min, tzinfo=zone).astimezone(timezone.utc)
+    end = datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=zone).astimezone(timezone.utc)
+    return start, end
+
+def sql_day_bucketing():
+    """Whether the database can bucket timestamps into local days itself (PostgreSQL)."""
+    return db.engine.dialect.name == "postgresql"
+
+def local_day_expr(column, zone):
+    """
+    SQL expression for the local calendar day of a timestamptz column (PostgreSQL only).
+    SQLite has no timezone database, so callers bucket rows with local_date() instead.
+    """
+    return cast(func.timezone(zone_name(zone), column), Date)
@@ -0,0 +1,183 @@
+import json
+import threading
+import time
+from flask import current_app
+from app.redis_client import RedisError, get_redis
+
+class PresenceError(Exception):
+    """The registry backend could not be reached."""
+
+# Entries are plain dicts: {"subject_id", "subject" (name), "started_at", "last_seen"} with times
+# as epoch seconds. An entry expires when no heartbeat arrives for ttl seconds.
+
+def new_entry(subject_id, subject_name, started_at):
+    return {
+        "subject_id": subject_id,
+        "subject": subject_name,
+        "started_at": started_at.timestamp(),
+        "last_seen": time.time()
+    }
+
+class MemoryPresence:
+    """
+    In-process registry of live sessions, keyed by user id.
+    Only sees sessions started through this worker - use Redis with several gunicorn workers.
+    """
+    backend = "memory"
+
+    def __init__(self, ttl=90):
+        self.ttl = ttl
+        self._entries = {}  # user_id -> entry
+        self._lock = threading.Lock()
+
+    def _live(self, user_id, now):
+        entry = self._entries.get(user_id)
+        if entry is not None and entry["last_seen"] + self.ttl <= now:
+            del self._entries[user_id]
+            return None
+        return entry
+
+    def start(self, user_id, entry):
+        with self._lock:
+            self._entries[user_id] = dict(entry)
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._live(user_id, time.time())
+            return dict(entry) if entry else None
+
+    def heartbeat(self, user_id):
+        now = time.time()
+        with self._lock:
+            entry = self._live(user_id, now)
+            if entry is None:
+                return None
+            entry["last_seen"] = now
+            return dict(entry)
+
+    def stop(self, user_id):
+        with self._lock:
+            entry = self._live(user_id, time.time())
+            self._entries.pop(user_id, None)
+            return entry
+
+    def count(self):
+        now = time.time()
+        with self._lock:
+            for user_id in list(self._entries):
+                self._live(user_id, now)
+            return len(self._entries)
+
+    def active(self, user_ids):
+        """{user_id: entry} for the given users that have a live session."""
+        now = time.time()
+        with self._lock:
+            found = {}
+            for user_id in user_ids:
+                entry = self._live(user_id, now)
+                if entry is not None:
+                    found[user_id] = dict(entry)
+            return found
+
+class RedisPresence:
+    """
+    Registry stored in Redis, shared across workers. Each live session is a JSON value
+    with a TTL refreshed by heartbeats; a sorted set of user ids scored by last heartbeat
+    answers the "studying now" count without scanning keys.
+    """
+    backend = "redis"
+
+    def __init__(self, client, ttl=90, prefix="presence"):
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = client
+
+    def _key(self, user_id):
+        return f"{self.prefix}:user:{user_id}"
+
+    @property
+    def _index_key(self):
+        return f"{self.prefix}:active"
+
+    def _call(self, action, *args):
+        try:
+            return action(*args)
+        except RedisError as e:
+            print(f"⚠️ Presence registry unavailable: {e}")
+            raise PresenceError(str(e))
+
+    def _write(self, user_id, entry, only_existing=False):
+        pipe = self._client.pipeline()
+        pipe.set(self._key(user_id), json.dumps(entry), ex=self.ttl, xx=only_existing)
+        pipe.zadd(self._index_key, {str(user_id): entry["last_seen"]})
+        written, _ = pipe.execute()
+        return bool(written)
+
+    def start(self, user_id, entry):
+        self._call(self._write, user_id, entry)
+
+    def get(self, user_id):
+        value = self._call(self._client.get, self._key(user_id))
+        return json.loads(value) if value else None
+
+    def heartbeat(self, user_id):
+        entry = self.get(user_id)
+        if entry is None:
+            return None
+        entry["last_seen"] = time.time()
+        # XX: don't resurrect a session stopped by another worker in the meantime
+        if not self._call(self._write, user_id, entry, True):
+            return None
+        return entry
+
+    def stop(self, user_id):
+        def pop():
+            pipe = self._client.pipeline()
+            pipe.get(self._key(user_id))
+            pipe.delete(self._key(user_id))
+            pipe.zrem(self._index_key, str(user_id))
+            return pipe.execute()[0]
+        value = self._call(pop)
+        return json.loads(value) if value else None
+
+    def count(self):
+        def prune_and_count():
+            pipe = self._client.pipeline()
+            pipe.zremrangebyscore(self._index_key, "-inf", time.time() - self.ttl)
+            pipe.zcard(self._index_key)
+            return pipe.execute()[1]
+        return self._call(prune_and_count)
+
+    def active(self, user_ids):
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        values = self._call(self._client.mget, [self._key(user_id) for user_id in user_ids])
+        return {user_id: json.loads(value) for user_id, value in zip(user_ids, values) if value}
+
+def init_presence(app):
+    """Create the live-session registry from PRESENCE_URL ("memory://" or "redis://...")."""
+    url = app.config.get("PRESENCE_URL") or "memory://"
+    ttl = app.config.get("PRESENCE_TTL", 90)
+
+    client = get_redis(url, "PRESENCE_URL")
+    if client is not None:
+        presence = RedisPresence(client, ttl=ttl)
+    else:
+        presence = MemoryPresence(ttl)
+
+    app.extensions["presence"] = presence
+    return presence
+
+def get_presence():
+    return current_app.extensions["presence"]
+
+def end_live_session(user_id, ended_at):
+    """Drop the user's live session if a session saved up to ended_at covers it. Never raises."""
+    presence = get_presence()
+    try:
+        entry = presence.get(user_id)
+        if entry and entry["started_at"] <= ended_at.timestamp():
+            presence.stop(user_id)
+    except PresenceError:
+        pass
@@ -0,0 +1,38 @@
+import threading
+
+# Optional: Redis client shared by the stats cache, presence registry and leaderboard store
+try:
+    import redis
+    REDIS_AVAILABLE = True
+    RedisError = redis.RedisError
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+    class RedisError(Exception):
+        """Stand-in so `except RedisError` works without redis installed."""
+
+REDIS_SCHEMES = ("redis://", "rediss://", "unix://")
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def is_redis_url(url):
+    return bool(url) and url.startswith(REDIS_SCHEMES)
+
+def get_redis(url, setting="Redis URL"):
+    """
+    Client for a redis:// (rediss://, unix://) URL, or None for anything else ("memory://")
+    or when redis is not installed. Clients are shared per URL, so features pointed at the
+    same server share one connection pool. `setting` names the config key in the warning.
+    """
+    if not is_redis_url(url):
+        return None
+    if not REDIS_AVAILABLE:
+        print(f"⚠️ {setting} points at Redis but redis is not installed - using the in-process backend")
+        return None
+    with _clients_lock:
+        client = _clients.get(url)
+        if client is None:
+            client = _clients[url] = redis.Redis.from_url(url)
+        return client
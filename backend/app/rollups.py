@@ -0,0 +1,280 @@
+from collections import defaultdict
+from datetime import timedelta, timezone
+from sqlalchemy import func, insert, select
+from app import db
+from app.models import User, Subject, FocusSession, DailyRollup, UserDailyTotal
+from app.periods import as_utc, user_zone, local_date, local_day_bounds, local_day_expr, sql_day_bucketing
+from app.partitions import archive_cutoff
+
+def upsert(model):
+    """INSERT ... ON CONFLICT builder for the current dialect (PostgreSQL and SQLite both support it)."""
+    if db.engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(model)
+
+def _rollup_upsert():
+    """One statement that adds a row's time and sessions to its (user, subject, day) rollup, creating it if needed."""
+    stmt = upsert(DailyRollup)
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "subject_key", "local_day"],
+        set_={
+            "total_ms": DailyRollup.total_ms + stmt.excluded.total_ms,
+            "session_count": DailyRollup.session_count + stmt.excluded.session_count
+        }
+    )
+
+def _rollup_row(user_id, subject_id, local_day, total_ms, session_count):
+    return {
+        "user_id": user_id,
+        "subject_id": subject_id,
+        "subject_key": subject_id or 0,
+        "local_day": local_day,
+        "total_ms": total_ms,
+        "session_count": session_count
+    }
+
+def bump_rollup(user_id, subject_id, local_day, total_ms, session_count=1):
+    """
+    Add time and sessions to one (user, subject, day) rollup row, creating it if needed.
+    Runs inside the caller's transaction and does not commit.
+    """
+    db.session.execute(_rollup_upsert(), [_rollup_row(user_id, subject_id, local_day, total_ms, session_count)])
+
+def add_daily_total(user_id, day, total_ms):
+    """
+    Add time to a user's UTC day and to the running totals of that day and every later one
+    (usually none - sessions are logged as they happen). Does not commit.
+    """
+    UserDailyTotal.query.filter(
+        UserDailyTotal.user_id == user_id,
+        UserDailyTotal.day > day
+    ).update({UserDailyTotal.cumulative_ms: UserDailyTotal.cumulative_ms + total_ms}, synchronize_session=False)
+    
+    # A new day's running total continues from the latest earlier day
+    previous_ms = select(UserDailyTotal.cumulative_ms).where(
+        UserDailyTotal.user_id == user_id,
+        UserDailyTotal.day < day
+    ).order_by(UserDailyTotal.day.desc()).limit(1).scalar_subquery()
+    stmt = upsert(UserDailyTotal).values(
+        user_id=user_id,
+        day=day,
+        total_ms=total_ms,
+        cumulative_ms=func.coalesce(previous_ms, 0) + total_ms
+    )
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id", "day"],
+        set_={
+            "total_ms": UserDailyTotal.total_ms + stmt.excluded.total_ms,
+            "cumulative_ms": UserDailyTotal.cumulative_ms + stmt.excluded.total_ms
+        }
+    ))
+
+def record_session(session, zone):
+    """Fold a newly inserted FocusSession into its owner's daily rollups and daily totals."""
+    bump_rollup(
+        session.user_id,
+        session.subject_id,
+        local_date(session.started_at, zone),
+        session.duration_ms
+    )
+    add_daily_total(session.user_id, as_utc(session.started_at).date(), session.duration_ms)
+
+def record_sessions(user_id, sessions, zone):
+    """
+    Fold many new sessions (dicts of FocusSession columns) for one user into rollups:
+    one executemany upsert for every (subject, day) touched. Does not commit.
+    """
+    totals = defaultdict(lambda: [0, 0])
+    for session in sessions:
+        bucket = totals[(session["subject_id"], local_date(session["started_at"], zone))]
+        bucket[0] += session["duration_ms"]
+        bucket[1] += 1
+    if not totals:
+        return
+
+    db.session.execute(_rollup_upsert(), [
+        _rollup_row(user_id, subject_id, day, total_ms, session_count)
+        for (subject_id, day), (total_ms, session_count) in totals.items()
+    ])
+
+    day_totals = defaultdict(int)
+    for session in sessions:
+        day_totals[as_utc(session["started_at"]).date()] += session["duration_ms"]
+    for day, total_ms in day_totals.items():
+        add_daily_total(user_id, day, total_ms)
+
+def move_subject_rollups(user_id, subject_id, new_subject_id=None):
+    """Merge a subject's rollups into another subject (default: the null "All Subjects" bucket)."""
+    rows = db.session.query(
+        DailyRollup.local_day, DailyRollup.total_ms, DailyRollup.session_count
+    ).filter(
+        DailyRollup.user_id == user_id,
+        DailyRollup.subject_id == subject_id
+    ).all()
+
+    DailyRollup.query.filter(
+        DailyRollup.user_id == user_id,
+        DailyRollup.subject_id == subject_id
+    ).delete(synchronize_session=False)
+
+    if rows:
+        db.session.execute(_rollup_upsert(), [
+            _rollup_row(user_id, new_subject_id, row.local_day, row.total_ms, row.session_count)
+            for row in rows
+        ])
+
+    return len(rows)
+
+def rebuild_user_rollups(user):
+    """
+    Recompute a user's rollups from raw sessions (e.g. after a timezone change). Does not commit.
+    Days before an archive cutoff (see app.partitions) have no raw sessions left, so their rollups are kept.
+    """
+    zone = user_zone(user)
+    totals = defaultdict(lambda: [0, 0])
+    
+    session_filters = [FocusSession.user_id == user.id]
+    rollup_filters = [DailyRollup.user_id == user.id]
+    cutoff = archive_cutoff()
+    if cutoff:
+        # Skip the cutoff day itself: part of it may already be archived in this timezone
+        first_day = cutoff + timedelta(days=1)
+        session_filters.append(FocusSession.started_at >= local_day_bounds(first_day, first_day, zone)[0])
+        rollup_filters.append(DailyRollup.local_day >= first_day)
+
+    if sql_day_bucketing():
+        # Postgres converts to the user's timezone and groups by local day itself
+        day_expr = local_day_expr(FocusSession.started_at, zone)
+        grouped = db.session.query(
+            FocusSession.subject_id,
+            day_expr.label("local_day"),
+            func.sum(FocusSession.duration_ms),
+            func.count()
+        ).filter(
+            *session_filters
+        ).group_by(FocusSession.subject_id, day_expr)
+        for subject_id, day, total_ms, session_count in grouped:
+            totals[(subject_id, day)] = [int(total_ms), session_count]
+    else:
+        sessions = db.session.query(
+            FocusSession.subject_id, FocusSession.started_at, FocusSession.duration_ms
+        ).filter(
+            *session_filters
+        ).yield_per(1000)
+        for subject_id, started_at, duration_ms in sessions:
+            bucket = totals[(subject_id, local_date(started_at, zone))]
+            bucket[0] += duration_ms
+            bucket[1] += 1
+
+    DailyRollup.query.filter(*rollup_filters).delete(synchronize_session=False)
+
+    rows = [
+        _rollup_row(user.id, subject_id, local_day, total_ms, session_count)
+        for (subject_id, local_day), (total_ms, session_count) in totals.items()
+    ]
+    if rows:
+        db.session.execute(insert(DailyRollup), rows)
+
+    return len(rows)
+
+def rebuild_daily_totals(user_id):
+    """
+    Recompute a user's daily totals and running totals from raw sessions. Does not commit.
+    Like rebuild_user_rollups, days before the archive cutoff are kept and the running totals continue from them.
+    """
+    totals = defaultdict(int)
+    session_filters = [FocusSession.user_id == user_id]
+    total_filters = [UserDailyTotal.user_id == user_id]
+    cutoff = archive_cutoff()
+    cumulative_ms = 0
+    if cutoff:
+        first_day = cutoff + timedelta(days=1)
+        session_filters.append(FocusSession.started_at >= local_day_bounds(first_day, first_day, timezone.utc)[0])
+        total_filters.append(UserDailyTotal.day >= first_day)
+        cumulative_ms = db.session.query(UserDailyTotal.cumulative_ms).filter(
+            UserDailyTotal.user_id == user_id,
+            UserDailyTotal.day < first_day
+        ).order_by(UserDailyTotal.day.desc()).limit(1).scalar() or 0
+
+    sessions = db.session.query(
+        FocusSession.started_at, FocusSession.duration_ms
+    ).filter(
+        *session_filters
+    ).yield_per(1000)
+    for started_at, duration_ms in sessions:
+        totals[as_utc(started_at).date()] += duration_ms
+
+    UserDailyTotal.query.filter(*total_filters).delete(synchronize_session=False)
+
+    rows = []
+    for day in sorted(totals):
+        cumulative_ms += totals[day]
+        rows.append({"user_id": user_id, "day": day, "total_ms": totals[day], "cumulative_ms": cumulative_ms})
+    if rows:
+        db.session.execute(insert(UserDailyTotal), rows)
+
+    return len(rows)
+
+def backfill_rollups(users=None):
+    """Rebuild rollups and daily totals for the given users (default: everyone), committing per user."""
+    if users is None:
+        users = User.query.order_by(User.id).all()
+
+    total_rows = 0
+    for user in users:
+        total_rows += rebuild_user_rollups(user)
+        total_rows += rebuild_daily_totals(user.id)
+        db.session.commit()
+    return len(users), total_rows
+
+def rollup_totals(user_id, start_date, end_date, subject_id=None):
+    """Return (total_ms, session_count) for a user over an inclusive range of local days."""
+    query = db.session.query(
+        func.coalesce(func.sum(DailyRollup.total_ms), 0),
+        func.coalesce(func.sum(DailyRollup.session_count), 0)
+    ).filter(
+        DailyRollup.user_id == user_id,
+        DailyRollup.local_day >= start_date,
+        DailyRollup.local_day <= end_date
+    )
+    if subject_id is not None:
+        query = query.filter(DailyRollup.subject_id == subject_id)
+    total_ms, session_count = query.one()
+    return int(total_ms), int(session_count)
+
+def rollup_days(user_id, start_date, end_date, subject_id=None):
+    """Return {local_day: total_ms} for a user over an inclusive range of local days."""
+    query = db.session.query(
+        DailyRollup.local_day,
+        func.sum(DailyRollup.total_ms).label("total_ms")
+    ).filter(
+        DailyRollup.user_id == user_id,
+        DailyRollup.local_day >= start_date,
+        DailyRollup.local_day <= end_date
+    )
+    if subject_id is not None:
+        query = query.filter(DailyRollup.subject_id == subject_id)
+    rows = query.group_by(DailyRollup.local_day).all()
+    return {row.local_day: int(row.total_ms or 0) for row in rows}
+
+def rollup_rows(user_id, start_date, end_date):
+    """
+    All of a user's rollup rows in a range of local days, with subject name and color.
+    Lets one scan feed several views (see /api/stats/dashboard).
+    """
+    return db.session.query(
+        DailyRollup.local_day,
+        DailyRollup.subject_id,
+        Subject.name.label("subject_name"),
+        Subject.color.label("subject_color"),
+        DailyRollup.total_ms,
+        DailyRollup.session_count
+    ).outerjoin(
+        Subject, Subject.id == DailyRollup.subject_id
+    ).filter(
+        DailyRollup.user_id == user_id,
+        DailyRollup.local_day >= start_date,
+        DailyRollup.local_day <= end_date
+    ).all()
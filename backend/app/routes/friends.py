@@ -3,6 +3,9 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import User, Friend
 from app.models import utc_now
+from app.access import friendship_changed
+from app.serializers import FriendSerializer, IncomingRequestSerializer, OutgoingRequestSerializer
+from app.cache import invalidate_user_stats
 
 friends_bp = Blueprint("friends", __name__)
 
@@ -22,22 +25,10 @@ def get_friends():
     friendships = Friend.query.filter(
         Friend.status == "accepted",
         ((Friend.requester_id == user.id) | (Friend.addressee_id == user.id))
-    ).all()
-    
-    print(f"👥 User {user.id} ({user.username}) has {len(friendships)} friends")
-    
-    # Format response
-    friends = []
-    for friendship in friendships:
-        if friendship.requester_id == user.id:
-            friend_user = friendship.addressee
-        else:
-            friend_user = friendship.requester
-        
-        friends.append({
-            "id": friendship.id,
-            "user": friend_user.to_dict()
-        })
+    )
+    friends = FriendSerializer.dump_all(friendships, viewer_id=user.id)
+    
+    print(f"👥 User {user.id} ({user.username}) has {len(friends)} friends")
     
     return jsonify(friends), 200
 
@@ -114,13 +105,9 @@ def get_incoming_requests():
     requests = Friend.query.filter(
         Friend.addressee_id == user.id,
         Friend.status == "pending"
-    ).all()
+    )
     
-    return jsonify([{
-        "id": req.id,
-        "requester": req.requester.to_dict(),
-        "created_at": req.created_at.isoformat()
-    } for req in requests]), 200
+    return jsonify(IncomingRequestSerializer.dump_all(requests)), 200
 
 @friends_bp.route("/requests/outgoing", methods=["GET"])
 @jwt_required()
@@ -131,13 +118,9 @@ def get_outgoing_requests():
     requests = Friend.query.filter(
         Friend.requester_id == user.id,
         Friend.status == "pending"
-    ).all()
+    )
     
-    return jsonify([{
-        "id": req.id,
-        "addressee": req.addressee.to_dict(),
-        "created_at": req.created_at.isoformat()
-    } for req in requests]), 200
+    return jsonify(OutgoingRequestSerializer.dump_all(requests)), 200
 
 @friends_bp.route("/accept/<int:id>", methods=["POST"])
 @jwt_required()
@@ -153,7 +136,10 @@ def accept_friend(id):
         return jsonify({"error": "Request is not pending"}), 400
     
     friend.status = "accepted"
+    friendship_changed(friend)
     db.session.commit()
+    invalidate_user_stats(friend.requester_id)
+    invalidate_user_stats(friend.addressee_id)
     
     return jsonify({"ok": True}), 200
 
@@ -184,8 +170,15 @@ def remove_friend(id):
     if friend.requester_id != user.id and friend.addressee_id != user.id:
         return jsonify({"error": "Not authorized"}), 403
     
+    # Removing an accepted friend revokes access to private profiles
+    was_accepted = friend.status == "accepted"
+    if was_accepted:
+        friendship_changed(friend)
     db.session.delete(friend)
     db.session.commit()
+    if was_accepted:
+        invalidate_user_stats(friend.requester_id)
+        invalidate_user_stats(friend.addressee_id)
     
     return jsonify({"ok": True}), 200
 
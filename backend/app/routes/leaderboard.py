@@ -1,9 +1,15 @@
+from datetime import date, datetime, timedelta, timezone
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import date, datetime, timedelta, timezone
 from sqlalchemy import func
 from app import db
-from app.models import User, FocusSession, Friend
+from app.models import User, LeaderboardSnapshot, FrozenLeaderboardWeek
+from app.http_cache import make_etag, not_modified, with_etag
+from app.access import friend_ids
+from app.leaderboard_store import (
+    weekly_board, domain_board, domains_board, get_boards, current_week_start, week_start_for, window_total,
+    weekly_domain_totals, BoardUnavailable, GLOBAL, DOMAINS, DOMAIN_USERS, domain_scope
+)
 
 leaderboard_bp = Blueprint("leaderboard", __name__)
 
@@ -26,161 +32,416 @@ def compute_rank_tier(weekly_hours):
     else:
         return "Taus"
 
-def get_leaderboard_data(user_ids=None, days=7):
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+MAX_RADIUS = 50
+MAX_WINDOW_DAYS = 366
+
+def window_param():
+    """
+    Parse ?days=N (the last N UTC days, today included) or ?days=all. Returns None without
+    days (the current Sunday-Saturday week) or (first_day, last_day, days), with first_day
+    and days None for all time. Raises ValueError with a client-facing message.
+    """
+    days = request.args.get("days")
+    if days is None:
+        return None
+    today = datetime.now(timezone.utc).date()
+    if days == "all":
+        return None, today, None
+    try:
+        days = int(days)
+    except ValueError:
+        raise ValueError("days must be a number of days or 'all'")
+    if not 1 <= days <= MAX_WINDOW_DAYS:
+        raise ValueError(f"days must be between 1 and {MAX_WINDOW_DAYS}")
+    return today - timedelta(days=days - 1), today, days
+
+def page_params():
+    """
+    Parse paging params: ?limit=&offset= (a page, in rank order) or ?around=me&radius=N
+    (the caller and N neighbours each side). Returns (limit, offset, around, radius).
+    Raises ValueError with a client-facing message.
+    """
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    offset = request.args.get("offset", 0, type=int)
+    around = request.args.get("around")
+    radius = request.args.get("radius", 5, type=int)
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    if offset < 0:
+        raise ValueError("offset must not be negative")
+    if around is not None and around != "me":
+        raise ValueError("around only supports 'me'")
+    if not 0 <= radius <= MAX_RADIUS:
+        raise ValueError(f"radius must be between 0 and {MAX_RADIUS}")
+    return limit, offset, around == "me", radius
+
+def board_entry(user, total_ms, rank, days=7):
     """
-    Common aggregation function for leaderboards.
-    Returns list of user stats sorted by weeklyHours descending.
-    Includes users with 0 hours.
-    Uses Monday-to-Sunday week (matching dashboard).
+    One leaderboard row. user is a User or a row with username/display_name/email_domain.
+    hours/minutes are the board's total; the per-week figures average it over days (null for all time).
     """
-    # Calculate current week in UTC (Sunday to Saturday)
-    # Use UTC to ensure everyone is on the same timezone basis
-    today_utc = datetime.now(timezone.utc).date()
-    days_since_sunday = (today_utc.weekday() + 1) % 7  # Sunday -> 0
-    week_start = today_utc - timedelta(days=days_since_sunday)
-    week_end = week_start + timedelta(days=6)
+    minutes = total_ms / 60000
+    weekly_minutes = minutes * 7 / days if days else None
+    return {
+        "name": user.display_name if user.display_name else user.username,
+        "username": user.username,
+        "email_domain": user.email_domain,
+        "hours": round(minutes / 60, 1),
+        "minutes": round(minutes, 0),
+        "hoursPerWeek": round(weekly_minutes / 60, 1) if days else None,
+        "minutesPerWeek": round(weekly_minutes, 0) if days else None,
+        "rank": rank
+    }
+
+def ranked_board(user_filter, limit, offset=0, around_user_id=None, radius=0, window=None, with_time_only=False):
+    """
+    Leaderboard rows for the users matching user_filter, in one query: each user's total for
+    the window (see window_param; default the current week) from their daily running totals,
+    ranked in SQL with RANK() OVER (ties share a rank) and cut to a page, or to the window of
+    positions around around_user_id (empty if that user is not on the board).
+    Users with no time are included unless with_time_only (then around_user_id without time gets []).
+    """
+    if window is None:
+        week_start = current_week_start()
+        window = (week_start, week_start + timedelta(days=6), 7)
+    first_day, last_day, days = window
     
-    print(f"📊 Leaderboard query: {len(user_ids) if user_ids else 'all'} users, week {week_start} to {week_end} (UTC)")
+    total_ms = window_total(first_day, last_day)
+    ranked = db.session.query(
+        User.id,
+        User.username,
+        User.display_name,
+        User.email_domain,
+        total_ms.label("total_ms"),
+        func.rank().over(order_by=total_ms.desc()).label("rank"),
+        func.row_number().over(order_by=(total_ms.desc(), User.id)).label("position")
+    ).filter(user_filter).subquery()
     
-    # First, get all users (or filtered users)
-    if user_ids:
-        all_users = User.query.filter(User.id.in_(user_ids)).all()
+    query = db.session.query(ranked).order_by(ranked.c.position)
+    if with_time_only:
+        # Users without time sort last, so this keeps positions and ranks contiguous from 1
+        query = query.filter(ranked.c.total_ms > 0)
+    if around_user_id is not None:
+        # Without a position for the caller (not on the board) the BETWEEN matches nothing
+        me = db.session.query(ranked.c.position).filter(ranked.c.id == around_user_id)
+        if with_time_only:
+            me = me.filter(ranked.c.total_ms > 0)
+        me = me.scalar_subquery()
+        query = query.filter(ranked.c.position.between(me - radius, me + radius))
     else:
-        all_users = User.query.all()
-    
-    # Get session totals for each user
-    # Use UTC datetime for comparison (sessions are stored in UTC)
-    user_totals = {}
-    if all_users:
-        # Use UTC timezone for start and end of day
-        start_dt = datetime.combine(week_start, datetime.min.time(), tzinfo=timezone.utc)
-        end_dt = datetime.combine(week_end, datetime.max.time(), tzinfo=timezone.utc)
-        
-        results = db.session.query(
-            FocusSession.user_id,
-            func.sum(FocusSession.duration_ms).label("total_ms")
-        ).filter(
-            FocusSession.started_at >= start_dt,
-            FocusSession.started_at <= end_dt
-        )
-        
-        if user_ids:
-            results = results.filter(FocusSession.user_id.in_(user_ids))
-        
-        results = results.group_by(FocusSession.user_id).all()
-        
-        print(f"📊 Leaderboard query: start_dt={start_dt}, end_dt={end_dt}")
-        print(f"📊 Leaderboard found {len(results)} users with sessions")
-        for row in results:
-            total_minutes = int(row.total_ms) / 60000 if row.total_ms else 0
-            user_totals[row.user_id] = int(row.total_ms) if row.total_ms else 0
-            print(f"📊 User {row.user_id}: {total_minutes:.2f} minutes ({int(row.total_ms)} ms)")
-    
-    # Build leaderboard entries for all users (including those with 0 hours)
+        query = query.offset(offset).limit(limit)
+    rows = query.all()
+    return [board_entry(row, int(row.total_ms), row.rank, days) for row in rows]
+
+def ranked_place(user_filter, user_id):
+    """
+    ((rank, total_ms) or None, board size) for user_id among the users matching user_filter
+    with time this week, straight from SQL - the fallback when the board store is unavailable.
+    """
+    week_start = current_week_start()
+    total_ms = window_total(week_start, week_start + timedelta(days=6))
+    size = db.session.query(func.count(User.id)).filter(user_filter, total_ms > 0).scalar()
+    mine = db.session.query(total_ms).filter(User.id == user_id, user_filter).scalar()
+    if not mine:
+        return None, size
+    higher = db.session.query(func.count(User.id)).filter(user_filter, total_ms > mine).scalar()
+    return (higher + 1, int(mine)), size
+
+def board_page(entries, first_rank=1):
+    """
+    Leaderboard rows for [(user_id, total_ms), ...] in board order. Ties share a rank
+    (like SQL RANK()); first_rank is the rank of the first entry.
+    """
+    users = {u.id: u for u in User.query.filter(User.id.in_([user_id for user_id, _ in entries]))} if entries else {}
     rows = []
-    for user in all_users:
-        total_ms = user_totals.get(user.id, 0)
-        total_minutes = total_ms / 60000
-        # Don't normalize - just use actual minutes for the current week
-        weekly_minutes = total_minutes
-        weekly_hours = total_minutes / 60
-        
-        print(f"📊 User {user.username} ({user.id}): {weekly_minutes:.2f} minutes ({total_ms} ms)")
-        
-        rows.append({
-            "user_id": user.id,
-            "name": user.display_name if user.display_name else user.username,
-            "username": user.username,
-            "email": user.email,
-            "email_domain": user.email_domain,
-            "hoursPerWeek": round(weekly_hours, 1),
-            "minutesPerWeek": round(weekly_minutes, 0),  # Total minutes for ranking/display
-            "total_ms": total_ms  # For sorting
-        })
-    
-    # Sort by total_ms (milliseconds) descending for precise ranking
-    rows.sort(key=lambda x: x["total_ms"], reverse=True)
-    
-    # Add ranks
-    for i, row in enumerate(rows):
-        row["rank"] = i + 1
-        del row["total_ms"]  # Remove temporary field
-        del row["user_id"]  # Remove temporary field
-    
-    print(f"📊 Leaderboard query returned {len(rows)} entries")
-    
+    rank, previous_ms = first_rank, None
+    for position, (user_id, total_ms) in enumerate(entries):
+        if previous_ms is not None and total_ms != previous_ms:
+            rank = first_rank + position
+        previous_ms = total_ms
+        if user_id in users:
+            rows.append(board_entry(users[user_id], total_ms, rank))
     return rows
 
+def stored_page(period, scope, limit, offset=0, around_user_id=None, radius=0):
+    """A page of a materialized board, or the positions around around_user_id (empty if not on the board)."""
+    boards = get_boards()
+    if around_user_id is not None:
+        position = boards.position(period, scope, around_user_id)
+        if position is None:
+            return []
+        offset = max(position - radius, 0)
+        limit = position - offset + radius + 1
+    
+    entries = boards.top(period, scope, limit, offset)
+    if not entries:
+        return []
+    # Ranked by the score top() returned, so a user dropped in between can't break the page
+    first_rank = boards.rank_of(period, scope, entries[0][1])
+    return board_page(entries, first_rank)
+
 @leaderboard_bp.route("/global", methods=["GET"])
 @jwt_required(optional=True)
 def leaderboard_global():
-    """Global leaderboard (public users only)."""
-    days = request.args.get("days", 7, type=int)
-    
-    # Get all public user IDs
-    public_users = User.query.filter_by(privacy_opt_in=True).all()
-    user_ids = [u.id for u in public_users]
+    """
+    Global leaderboard of public users with time logged. The current week is served from
+    the materialized board; ?days=N|all ranks a rolling window in SQL instead.
+    ?limit=&offset= for a page, ?around=me&radius=N for the caller's neighbourhood (requires a token).
+    """
+    try:
+        limit, offset, around, radius = page_params()
+        window = window_param()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    print(f"📊 Global leaderboard: {len(user_ids)} public users, days={days}")
+    identity = get_jwt_identity()
+    if around and identity is None:
+        return jsonify({"error": "around=me requires authentication"}), 401
     
-    if not user_ids:
-        return jsonify([]), 200
+    if window is not None:
+        rows = ranked_board(
+            User.privacy_opt_in == True,
+            limit, offset, int(identity) if around else None, radius,
+            window=window, with_time_only=True
+        )
+        print(f"✅ Global leaderboard ({window[2] or 'all'} days): {len(rows)} entries")
+        return jsonify(rows), 200
     
-    rows = get_leaderboard_data(user_ids=user_ids, days=days)
+    around_user_id = int(identity) if around else None
+    try:
+        rows = stored_page(weekly_board(), GLOBAL, limit, offset, around_user_id, radius)
+    except BoardUnavailable:
+        rows = ranked_board(User.privacy_opt_in == True, limit, offset, around_user_id, radius, with_time_only=True)
     
-    print(f"✅ Global leaderboard: {len(rows)} entries")
+    print(f"✅ Global leaderboard: {len(rows)} entries from position {offset}")
     return jsonify(rows), 200
 
+@leaderboard_bp.route("/rank", methods=["GET"])
+@jwt_required()
+def leaderboard_rank():
+    """The current user's place on this week's global board (rank is null without time logged or when private)."""
+    user_id = int(get_jwt_identity())
+    try:
+        period = weekly_board()
+        boards = get_boards()
+        placed = boards.rank(period, GLOBAL, user_id)
+        size = boards.size(period, GLOBAL)
+    except BoardUnavailable:
+        placed, size = ranked_place(User.privacy_opt_in == True, user_id)
+    rank, total_ms = placed if placed else (None, 0)
+    weekly_hours = total_ms / 3600000
+    return jsonify({
+        "rank": rank,
+        "of": size,
+        "hoursPerWeek": round(weekly_hours, 1),
+        "minutesPerWeek": round(total_ms / 60000, 0),
+        "tier": compute_rank_tier(weekly_hours)
+    }), 200
+
 @leaderboard_bp.route("/domain", methods=["GET"])
 @jwt_required()
 def leaderboard_domain():
-    """Domain-based leaderboard (current user's email domain)."""
+    """
+    Leaderboard of public users of the current user's email domain with time logged.
+    The current week is served from the domain's materialized board; paged and windowed like /global.
+    """
     user = get_current_user()
-    days = request.args.get("days", 7, type=int)
+    try:
+        limit, offset, around, radius = page_params()
+        window = window_param()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    # Get public users from same domain
-    public_users = User.query.filter(
-        User.email_domain == user.email_domain,
-        User.privacy_opt_in == True
-    ).all()
-    user_ids = [u.id for u in public_users]
+    around_user_id = user.id if around else None
+    if window is not None:
+        rows = ranked_board(
+            (User.email_domain == user.email_domain) & (User.privacy_opt_in == True),
+            limit, offset, around_user_id, radius, window, with_time_only=True
+        )
+    else:
+        try:
+            period = domain_board(user.email_domain)
+            rows = stored_page(period, domain_scope(user.email_domain), limit, offset, around_user_id, radius)
+        except BoardUnavailable:
+            rows = ranked_board(
+                (User.email_domain == user.email_domain) & (User.privacy_opt_in == True),
+                limit, offset, around_user_id, radius, with_time_only=True
+            )
+    return jsonify(rows), 200
+
+DOMAIN_SORTS = {
+    "total": lambda domain: domain["hours"],
+    "per_capita": lambda domain: domain["perCapitaHours"],
+    "active": lambda domain: domain["activeUsers"],
+}
+
+@leaderboard_bp.route("/domains", methods=["GET"])
+@jwt_required(optional=True)
+def leaderboard_domains():
+    """
+    This week's email domains ranked against each other by ?sort=total (hours, default),
+    per_capita (hours per active user) or active (users with time logged). Counts public
+    users only and is served from the materialized domain totals. Paged with ?limit=&offset=.
+    """
+    try:
+        limit, offset, around, _ = page_params()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    sort = request.args.get("sort", "total")
+    if sort not in DOMAIN_SORTS:
+        return jsonify({"error": f"sort must be one of: {', '.join(DOMAIN_SORTS)}"}), 400
+    if around:
+        return jsonify({"error": "around is not supported for the domain ranking"}), 400
     
-    if not user_ids:
-        return jsonify([]), 200
+    try:
+        period = domains_board()
+        boards = get_boards()
+        totals = dict(boards.top(period, DOMAINS, boards.size(period, DOMAINS)))
+        actives = dict(boards.top(period, DOMAIN_USERS, boards.size(period, DOMAIN_USERS)))
+    except BoardUnavailable:
+        rows = weekly_domain_totals(current_week_start())
+        totals = {email_domain: total_ms for email_domain, total_ms, _ in rows}
+        actives = {email_domain: active_users for email_domain, _, active_users in rows}
     
-    rows = get_leaderboard_data(user_ids=user_ids, days=days)
+    domains = []
+    for email_domain, total_ms in totals.items():
+        active_users = actives.get(email_domain, 0)
+        if not active_users:
+            continue
+        domains.append({
+            "email_domain": email_domain,
+            "hours": round(total_ms / 3600000, 1),
+            "perCapitaHours": round(total_ms / active_users / 3600000, 1),
+            "activeUsers": active_users
+        })
+    key = DOMAIN_SORTS[sort]
+    domains.sort(key=lambda domain: (-key(domain), domain["email_domain"]))
     
-    return jsonify(rows), 200
+    # Ties share a rank, like the user boards
+    rank, previous = 1, None
+    for position, domain in enumerate(domains):
+        if previous is not None and key(domain) != previous:
+            rank = position + 1
+        previous = key(domain)
+        domain["rank"] = rank
+    
+    print(f"✅ Domain ranking by {sort}: {len(domains)} domains")
+    return jsonify(domains[offset:offset + limit]), 200
 
 @leaderboard_bp.route("/friends", methods=["GET"])
 @jwt_required()
 def leaderboard_friends():
-    """Friends-only leaderboard (includes current user)."""
-    user = get_current_user()
-    days = request.args.get("days", 7, type=int)
+    """Friends-only leaderboard (includes current user). Paged and windowed like /global."""
+    user_id = int(get_jwt_identity())
+    try:
+        limit, offset, around, radius = page_params()
+        window = window_param()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    print(f"📊 Friends leaderboard: user={user.id}, days={days}")
+    rows = ranked_board(
+        User.id.in_(friend_ids(user_id, include_self=True)),
+        limit, offset, user_id if around else None, radius, window
+    )
     
-    # Find all accepted friends
-    friendships = Friend.query.filter(
-        Friend.status == "accepted",
-        ((Friend.requester_id == user.id) | (Friend.addressee_id == user.id))
+    print(f"✅ Friends leaderboard: {len(rows)} entries")
+    return jsonify(rows), 200
+
+@leaderboard_bp.route("/history", methods=["GET"])
+def leaderboard_history():
+    """Weeks with frozen leaderboards (see `flask leaderboard snapshot`), newest first."""
+    weeks = db.session.query(FrozenLeaderboardWeek.week_start).order_by(
+        FrozenLeaderboardWeek.week_start.desc()
     ).all()
+    response = jsonify([week_start for week_start, in weeks])
+    response.headers["Cache-Control"] = "public, max-age=3600"
+    return response, 200
+
+ANONYMOUS_ENTRY = {"name": "Private user", "username": None, "email_domain": None}
+
+def snapshot_page(week, board, board_key, around_user_id=None):
+    """
+    A page of a frozen board as a response. Ranks and names are as they were that week, but
+    users who have since gone private are shown anonymously (their place is kept) unless the
+    caller is them or their friend - so responses revalidate by ETag instead of being immutable.
+    """
+    try:
+        week_start = date.fromisoformat(week)
+        if week_start_for(week_start) != week_start:
+            raise ValueError("week must be the Sunday a leaderboard week starts on")
+        limit, offset, around, radius = page_params()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if db.session.get(FrozenLeaderboardWeek, week_start) is None:
+        return jsonify({"error": "No frozen leaderboard for that week"}), 404
     
-    # Collect friend IDs
-    friend_ids = [user.id]  # Include current user
-    for friendship in friendships:
-        if friendship.requester_id == user.id:
-            friend_ids.append(friendship.addressee_id)
-        else:
-            friend_ids.append(friendship.requester_id)
-    
-    print(f"📊 Friends leaderboard: {len(friend_ids)} friends (including self)")
+    filters = (
+        LeaderboardSnapshot.week_start == week_start,
+        LeaderboardSnapshot.board == board,
+        LeaderboardSnapshot.board_key == board_key
+    )
+    query = db.session.query(
+        LeaderboardSnapshot.user_id,
+        LeaderboardSnapshot.rank,
+        LeaderboardSnapshot.total_ms,
+        LeaderboardSnapshot.tier,
+        LeaderboardSnapshot.username,
+        LeaderboardSnapshot.display_name,
+        LeaderboardSnapshot.email_domain,
+        User.privacy_opt_in
+    ).join(User, User.id == LeaderboardSnapshot.user_id).filter(*filters).order_by(LeaderboardSnapshot.position)
+    if around:
+        if around_user_id is None:
+            return jsonify({"error": "around=me requires authentication"}), 401
+        position = db.session.query(LeaderboardSnapshot.position).filter(
+            *filters, LeaderboardSnapshot.user_id == around_user_id
+        ).scalar()
+        rows = [] if position is None else query.filter(
+            LeaderboardSnapshot.position.between(position - radius, position + radius)
+        ).all()
+    else:
+        rows = query.offset(offset).limit(limit).all()
     
-    if not friend_ids:
-        return jsonify([]), 200
+    # Only the global page without around=me is the same for every caller
+    private = board != "global" or around
+    visible = set()
+    if private and any(not row.privacy_opt_in for row in rows):
+        visible = set(db.session.scalars(friend_ids(around_user_id, include_self=True)))
+    hidden = {row.user_id for row in rows if not row.privacy_opt_in and row.user_id not in visible}
     
-    rows = get_leaderboard_data(user_ids=friend_ids, days=days)
+    etag = make_etag("snapshot", week_start, board, board_key, limit, offset, around_user_id if private else "",
+                     radius if around else "", *sorted(hidden))
+    cached = not_modified(etag, private)
+    if cached:
+        return cached
     
-    print(f"✅ Friends leaderboard: {len(rows)} entries")
-    return jsonify(rows), 200
+    entries = []
+    for row in rows:
+        entry = {**board_entry(row, row.total_ms, row.rank), "tier": row.tier}
+        if row.user_id in hidden:
+            entry.update(ANONYMOUS_ENTRY)
+        entries.append(entry)
+    return with_etag(jsonify(entries), etag, private), 200
+
+@leaderboard_bp.route("/history/<week>/global", methods=["GET"])
+@jwt_required(optional=True)
+def leaderboard_history_global(week):
+    """The frozen global board of the week starting on <week> (YYYY-MM-DD). Paged like /global."""
+    identity = get_jwt_identity()
+    return snapshot_page(week, "global", "", int(identity) if identity is not None else None)
+
+@leaderboard_bp.route("/history/<week>/domain", methods=["GET"])
+@jwt_required()
+def leaderboard_history_domain(week):
+    """The current user's frozen domain board for a past week."""
+    user = get_current_user()
+    return snapshot_page(week, "domain", user.email_domain, user.id)
+
+@leaderboard_bp.route("/history/<week>/friends", methods=["GET"])
+@jwt_required()
+def leaderboard_history_friends(week):
+    """The current user's frozen friends board for a past week."""
+    user_id = int(get_jwt_identity())
+    return snapshot_page(week, "friends", str(user_id), user_id)
@@ -0,0 +1,172 @@
+from datetime import datetime, timezone
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import db
+from app.models import User, Subject
+from app.models import utc_now
+from app.presence import get_presence, new_entry, PresenceError
+from app.access import friend_ids
+from app.overlaps import MAX_SESSION_SPAN
+from app.routes.sessions import parse_session_payload, save_session
+
+presence_bp = Blueprint("presence", __name__)
+
+def get_current_user():
+    """Helper to get current user from JWT."""
+    user_id = get_jwt_identity()
+    # Convert string identity back to int
+    return User.query.get_or_404(int(user_id))
+
+def describe(entry, now=None):
+    """Registry entry -> response dict."""
+    now = now or utc_now()
+    started_at = datetime.fromtimestamp(entry["started_at"], timezone.utc)
+    return {
+        "subject_id": entry["subject_id"],
+        "subject": entry["subject"] or "All Subjects",
+        "started_at": started_at,
+        "last_seen": datetime.fromtimestamp(entry["last_seen"], timezone.utc),
+        "elapsed_ms": int((now - started_at).total_seconds() * 1000)
+    }
+
+def unavailable():
+    return jsonify({"error": "Live sessions are temporarily unavailable"}), 503
+
+@presence_bp.route("/start", methods=["POST"])
+@jwt_required()
+def start_live_session():
+    """Start the current user's live session. Body: {"subject_id": <optional>}."""
+    user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+    subject_id = data.get("subject_id") or None
+
+    subject_name = None
+    if subject_id is not None:
+        if not isinstance(subject_id, int) or isinstance(subject_id, bool):
+            return jsonify({"error": "subject_id must be an integer or null"}), 400
+        subject_name = db.session.query(Subject.name).filter(
+            Subject.id == subject_id,
+            Subject.user_id == user_id
+        ).scalar()
+        if subject_name is None:
+            return jsonify({"error": "Invalid subject_id - subject does not belong to you"}), 400
+
+    presence = get_presence()
+    try:
+        running = presence.get(user_id)
+        if running:
+            return jsonify({"error": "A live session is already running", "live": describe(running)}), 409
+        entry = new_entry(subject_id, subject_name, utc_now())
+        presence.start(user_id, entry)
+    except PresenceError:
+        return unavailable()
+
+    print(f"🟢 User {user_id} started a live session")
+    return jsonify({"ok": True, "live": describe(entry)}), 201
+
+@presence_bp.route("/heartbeat", methods=["POST"])
+@jwt_required()
+def heartbeat_live_session():
+    """Keep the live session alive. Clients should call this well within PRESENCE_TTL."""
+    user_id = int(get_jwt_identity())
+    try:
+        entry = get_presence().heartbeat(user_id)
+    except PresenceError:
+        return unavailable()
+    if entry is None:
+        return jsonify({"error": "No live session (never started, stopped, or expired)"}), 404
+    return jsonify({"ok": True, "live": describe(entry)}), 200
+
+@presence_bp.route("/stop", methods=["POST"])
+@jwt_required()
+def stop_live_session():
+    """
+    End the live session and save it as a FocusSession ending now, or after
+    MAX_SESSION_SPAN if it ran longer (the response then has "capped": true).
+    Body: {"discard": true} drops it without saving. If saving fails (too short,
+    overlap) the live session is kept, so the client can discard it or retry.
+    """
+    user = get_current_user()
+    user_id = user.id
+    data = request.get_json(silent=True) or {}
+    presence = get_presence()
+
+    try:
+        entry = presence.get(user_id)
+        if entry is None:
+            return jsonify({"error": "No live session (never started, stopped, or expired)"}), 404
+        if data.get("discard"):
+            presence.stop(user_id)
+            return jsonify({"ok": True, "discarded": True}), 200
+    except PresenceError:
+        return unavailable()
+
+    started_at = datetime.fromtimestamp(entry["started_at"], timezone.utc)
+    # Sessions can't exceed 10 hours; keep the first 10 rather than refusing to save any of it
+    now, latest_end = utc_now(), started_at + MAX_SESSION_SPAN
+    ended_at = min(now, latest_end)
+    capped = now > latest_end
+    try:
+        fields = parse_session_payload({
+            "subject_id": entry["subject_id"],
+            "duration_ms": int((ended_at - started_at).total_seconds() * 1000),
+            "started_at": started_at.isoformat(),
+            "ended_at": ended_at.isoformat()
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    payload, error = save_session(user, fields)
+    if error:
+        return error
+    try:
+        presence.stop(user_id)
+    except PresenceError:
+        pass  # the entry expires on its own
+
+    print(f"🔴 User {user_id} stopped a live session ({payload['duration_ms']} ms)")
+    return jsonify({"ok": True, "session": payload, "capped": capped}), 201
+
+@presence_bp.route("/me", methods=["GET"])
+@jwt_required()
+def get_live_session():
+    """The current user's live session, or null."""
+    user_id = int(get_jwt_identity())
+    try:
+        entry = get_presence().get(user_id)
+    except PresenceError:
+        return unavailable()
+    return jsonify({"live": describe(entry) if entry else None}), 200
+
+@presence_bp.route("/now", methods=["GET"])
+@jwt_required()
+def studying_now():
+    """How many users have a live session right now (answered from the registry)."""
+    try:
+        count = get_presence().count()
+    except PresenceError:
+        return unavailable()
+    return jsonify({"studying_now": count}), 200
+
+@presence_bp.route("/friends", methods=["GET"])
+@jwt_required()
+def friends_studying():
+    """Friends of the current user with a live session, longest-running first."""
+    user_id = int(get_jwt_identity())
+
+    try:
+        live = get_presence().active(db.session.scalars(friend_ids(user_id)).all())
+    except PresenceError:
+        return unavailable()
+    if not live:
+        return jsonify([]), 200
+
+    # Names only for the friends who are studying
+    users = db.session.query(User.id, User.username, User.display_name).filter(User.id.in_(live)).all()
+    now = utc_now()
+    result = [{
+        "user": {"id": friend.id, "username": friend.username, "display_name": friend.display_name},
+        "live": describe(live[friend.id], now)
+    } for friend in users]
+    result.sort(key=lambda item: item["live"]["started_at"])
+    return jsonify(result), 200
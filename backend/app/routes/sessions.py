@@ -1,10 +1,21 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
+import base64
+import csv
+import io
 from datetime import datetime, date, timedelta
-from sqlalchemy import func
+from sqlalchemy import func, insert, tuple_
 from app import db
-from app.models import User, FocusSession
-from app.models import utc_now
+from app.models import User, FocusSession, Subject
+from app.models import utc_now, bump_data_version
+from app.cache import invalidate_user_stats
+from app.periods import user_zone, as_utc, parse_date, local_day_bounds
+from app.http_cache import make_etag, not_modified, with_etag
+from app.rollups import record_session, record_sessions
+from app.serializers import SessionSerializer
+from app.overlaps import lock_user_sessions, find_overlap, existing_intervals, overlapping_interval
+from app.presence import end_live_session
+from app.leaderboard_store import record_weekly_sessions
 
 sessions_bp = Blueprint("sessions", __name__)
 
@@ -14,15 +25,66 @@ def get_current_user():
     # Convert string identity back to int
     return User.query.get_or_404(int(user_id))
 
-@sessions_bp.route("/", methods=["POST"])
-@jwt_required()
-def create_session():
-    """Create a new study session."""
-    user = get_current_user()
-    data = request.get_json()
+def filter_sessions(query, user):
+    """
+    Apply the start_date/end_date/subject_id query params to a FocusSession query.
+    Dates are the user's local days, applied as index-friendly UTC bounds.
+    Raises ValueError with a client-facing message on a bad date.
+    """
+    zone = user_zone(user)
     
-    if not data:
-        return jsonify({"error": "No JSON data provided"}), 400
+    start_date_str = request.args.get("start_date")
+    if start_date_str:
+        try:
+            start_date = parse_date(start_date_str)
+        except ValueError:
+            raise ValueError("Invalid start_date format")
+        start_dt, _ = local_day_bounds(start_date, start_date, zone)
+        query = query.filter(FocusSession.started_at >= start_dt)
+    
+    end_date_str = request.args.get("end_date")
+    if end_date_str:
+        try:
+            end_date = parse_date(end_date_str)
+        except ValueError:
+            raise ValueError("Invalid end_date format")
+        _, end_dt = local_day_bounds(end_date, end_date, zone)
+        query = query.filter(FocusSession.started_at < end_dt)
+    
+    subject_id = request.args.get("subject_id", type=int)
+    if subject_id is not None:
+        query = query.filter(FocusSession.subject_id == subject_id)
+    
+    return query
+
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(started_at, session_id):
+    """Opaque pagination cursor for the position just after (started_at, id)."""
+    raw = f"{as_utc(started_at).isoformat()}|{session_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        started_at, session_id = raw.split("|")
+        return as_utc(datetime.fromisoformat(started_at)), int(session_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+MIN_SESSION_MS = 30000  # 30 seconds
+MAX_SESSION_MS = 36000000  # 10 hours
+
+def parse_session_payload(data, require_times=False):
+    """
+    Validate one session payload (as sent to POST /api/sessions) and return its
+    columns: subject_id, started_at, ended_at (UTC) and duration_ms. Without timestamps
+    the session ends now, unless require_times. Raises ValueError with a client-facing
+    message. Subject ownership is checked by the caller.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Session must be a JSON object")
     
     duration_ms = data.get("duration_ms")
     subject_id = data.get("subject_id")  # optional, can be null
@@ -30,59 +92,93 @@ def create_session():
     ended_at_str = data.get("ended_at")
     
     if not duration_ms:
-        return jsonify({"error": "duration_ms is required"}), 400
+        raise ValueError("duration_ms is required")
+    if not isinstance(duration_ms, (int, float)) or isinstance(duration_ms, bool):
+        raise ValueError("duration_ms must be a number")
+    duration_ms = int(duration_ms)
     
     # Validate duration (at least 30 seconds = 30000 ms)
-    if duration_ms < 30000:
-        return jsonify({"error": "I am not paying for this short ahh session in my database 💀"}), 400
+    if duration_ms < MIN_SESSION_MS:
+        raise ValueError("I am not paying for this short ahh session in my database 💀")
     
     # Max 10 hours = 36,000,000 ms
-    if duration_ms > 36000000:
-        return jsonify({"error": "Session cannot exceed 10 hours"}), 400
+    if duration_ms > MAX_SESSION_MS:
+        raise ValueError("Session cannot exceed 10 hours")
+    
+    if subject_id is not None and (not isinstance(subject_id, int) or isinstance(subject_id, bool)):
+        raise ValueError("subject_id must be an integer or null")
     
     # Parse timestamps (UTC-aware)
     if started_at_str and ended_at_str:
         try:
-            started_at = datetime.fromisoformat(started_at_str.replace('Z', '+00:00'))
-            ended_at = datetime.fromisoformat(ended_at_str.replace('Z', '+00:00'))
-        except ValueError:
-            return jsonify({"error": "Invalid datetime format"}), 400
+            # Store UTC so range filters on started_at compare like with like (naive input = UTC)
+            started_at = as_utc(datetime.fromisoformat(started_at_str.replace('Z', '+00:00')))
+            ended_at = as_utc(datetime.fromisoformat(ended_at_str.replace('Z', '+00:00')))
+        except (ValueError, AttributeError):
+            raise ValueError("Invalid datetime format")
         
         # Validate ended_at after started_at
         if ended_at <= started_at:
-            return jsonify({"error": "ended_at must be after started_at"}), 400
+            raise ValueError("ended_at must be after started_at")
+    elif require_times:
+        raise ValueError("started_at and ended_at are required")
     else:
         # Default: use current time
         ended_at = utc_now()
         started_at = ended_at - timedelta(milliseconds=duration_ms)
     
-    # Ensure user has "All Subjects" (for existing users who might not have it)
-    from app.models import Subject
-    all_subjects = Subject.query.filter_by(user_id=user.id, name="All Subjects").first()
-    if not all_subjects:
-        print(f"⚠️ User {user.id} missing 'All Subjects', creating it now...")
-        all_subjects = Subject(
-            user_id=user.id,
-            name="All Subjects",
-            color="#f59f0a",
-            created_at=utc_now()
-        )
-        db.session.add(all_subjects)
-        db.session.commit()
-        print(f"✅ Created 'All Subjects' (id={all_subjects.id}) for user {user.id}")
+    return {
+        # 0 was always treated as "no subject"
+        "subject_id": subject_id or None,
+        "started_at": started_at,
+        "ended_at": ended_at,
+        "duration_ms": duration_ms
+    }
+
+def serialize_session(row, subject_names):
+    """FocusSession.to_dict() for a row/object, taking subject names from a preloaded {id: name} map."""
+    return {
+        "id": row.id,
+        "subject_id": row.subject_id,
+        "subject": subject_names.get(row.subject_id, "All Subjects"),
+        "duration_ms": row.duration_ms,
+        "started_at": as_utc(row.started_at),
+        "ended_at": as_utc(row.ended_at)
+    }
+
+def save_session(user, fields):
+    """
+    Check subject ownership and overlaps for parsed session fields, then write the session
+    with its rollups and commit. Returns (payload, None) or (None, (response, status)).
+    """
+    subject_id = fields["subject_id"]
+    started_at, ended_at, duration_ms = fields["started_at"], fields["ended_at"], fields["duration_ms"]
     
-    # Verify subject belongs to user if provided
+    # "All Subjects" is created at signup (and by GET /api/subjects for older accounts),
+    # and sessions without a subject just store null, so the write path never touches it.
+    subject_names = {}
     if subject_id:
-        subject = Subject.query.get(subject_id)
-        if not subject:
-            print(f"❌ Subject {subject_id} not found in database")
-            return jsonify({"error": f"Subject {subject_id} not found"}), 400
-        if subject.user_id != user.id:
-            print(f"❌ Subject {subject_id} belongs to user {subject.user_id}, but current user is {user.id}")
-            return jsonify({"error": "Invalid subject_id - subject does not belong to you"}), 400
-        print(f"✅ Subject {subject_id} ({subject.name}) validated for user {user.id}")
-    
-    # Create session
+        # Existence and ownership in one indexed lookup; the name is reused for the response
+        subject_name = db.session.query(Subject.name).filter(
+            Subject.id == subject_id,
+            Subject.user_id == user.id
+        ).scalar()
+        if subject_name is None:
+            return None, (jsonify({"error": "Invalid subject_id - subject does not belong to you"}), 400)
+        subject_names[subject_id] = subject_name
+    
+    lock_user_sessions(user.id)
+    conflict = find_overlap(user.id, started_at, ended_at)
+    if conflict:
+        return None, (jsonify({
+            "error": "Session overlaps an existing session",
+            "conflict": {
+                "id": conflict.id,
+                "started_at": as_utc(conflict.started_at),
+                "ended_at": as_utc(conflict.ended_at)
+            }
+        }), 409)
+    
     session = FocusSession(
         user_id=user.id,
         subject_id=subject_id,
@@ -90,50 +186,263 @@ def create_session():
         ended_at=ended_at,
         duration_ms=duration_ms
     )
-    
     db.session.add(session)
+    # Keep the daily rollups in step with the raw sessions (same transaction)
+    record_session(session, user_zone(user))
+    bump_data_version(user.id)
+    
+    # Serialize before commit: commit expires loaded objects, and reading them back would cost a SELECT each
+    db.session.flush()
+    payload = serialize_session(session, subject_names)
+    user_id, email_domain, public = user.id, user.email_domain, user.privacy_opt_in
     db.session.commit()
+    invalidate_user_stats(user_id)
+    record_weekly_sessions(user_id, email_domain, public, [(started_at, duration_ms)])
+    return payload, None
+
+@sessions_bp.route("/", methods=["POST"])
+@jwt_required()
+def create_session():
+    """Create a new study session."""
+    user = get_current_user()
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({"error": "No JSON data provided"}), 400
+    
+    try:
+        fields = parse_session_payload(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    user_id = user.id
+    payload, error = save_session(user, fields)
+    if error:
+        return error
+    # A timer saved client-side ends the user's live session, if it was that session
+    end_live_session(user_id, fields["ended_at"])
     
     return jsonify({
         "ok": True,
-        "session": session.to_dict()
+        "session": payload
     }), 201
 
+MAX_BATCH_SIZE = 500
+
+@sessions_bp.route("/batch", methods=["POST"])
+@jwt_required()
+def create_sessions_batch():
+    """
+    Create many sessions at once (e.g. a tracker flushing sessions queued while offline).
+    
+    Body: {"sessions": [<same fields as POST /api/sessions, started_at and ended_at required>, ...]}
+    Every item is validated (including overlaps with stored sessions and with each other);
+    valid items are inserted together in one transaction and
+    invalid ones are reported by index, so clients can drop what was accepted and retry the rest.
+    """
+    user = get_current_user()
+    data = request.get_json(silent=True)
+    items = data.get("sessions") if isinstance(data, dict) else None
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "sessions must be a non-empty list"}), 400
+    if len(items) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} sessions per batch"}), 400
+    
+    errors = {}
+    parsed = {}
+    for index, item in enumerate(items):
+        try:
+            # Queued sessions all flush at once, so "now" would give them the same times
+            parsed[index] = parse_session_payload(item, require_times=True)
+        except ValueError as e:
+            errors[index] = str(e)
+    
+    # Subject ownership for the whole batch in one query
+    subject_ids = {fields["subject_id"] for fields in parsed.values() if fields["subject_id"]}
+    subject_names = {}
+    if subject_ids:
+        subject_names = dict(db.session.query(Subject.id, Subject.name).filter(
+            Subject.user_id == user.id,
+            Subject.id.in_(subject_ids)
+        ).all())
+    for index, fields in list(parsed.items()):
+        if fields["subject_id"] and fields["subject_id"] not in subject_names:
+            errors[index] = "Invalid subject_id - subject does not belong to you"
+            del parsed[index]
+    
+    # Overlaps with stored sessions: one range scan covering the whole batch
+    if parsed:
+        lock_user_sessions(user.id)
+        intervals = existing_intervals(
+            user.id,
+            min(fields["started_at"] for fields in parsed.values()),
+            max(fields["ended_at"] for fields in parsed.values())
+        )
+        for index, fields in list(parsed.items()):
+            conflict_id = overlapping_interval(intervals, fields["started_at"], fields["ended_at"])
+            if conflict_id is not None:
+                errors[index] = f"Overlaps existing session {conflict_id}"
+                del parsed[index]
+    
+    # Overlaps within the batch: sweep in start order, tracking the latest end seen so far
+    latest_end, latest_index = None, None
+    for index in sorted(parsed, key=lambda i: (parsed[i]["started_at"], i)):
+        fields = parsed[index]
+        if latest_end is not None and fields["started_at"] < latest_end:
+            errors[index] = f"Overlaps session {latest_index} in this batch"
+            del parsed[index]
+            continue
+        latest_end, latest_index = fields["ended_at"], index
+    
+    created = []
+    if parsed:
+        indexes = sorted(parsed)
+        rows = [{"user_id": user.id, **parsed[index]} for index in indexes]
+        # Multi-row INSERT ... RETURNING for the whole batch, ids in the order of rows
+        ids = db.session.scalars(
+            insert(FocusSession).returning(FocusSession.id, sort_by_parameter_order=True),
+            rows
+        ).all()
+        user_id, email_domain, public = user.id, user.email_domain, user.privacy_opt_in
+        record_sessions(user_id, rows, user_zone(user))
+        bump_data_version(user_id)
+        db.session.commit()
+        invalidate_user_stats(user_id)
+        record_weekly_sessions(user_id, email_domain, public, [(row["started_at"], row["duration_ms"]) for row in rows])
+        
+        for index, row, session_id in zip(indexes, rows, ids):
+            session = FocusSession(id=session_id, **row)
+            created.append({"index": index, "session": serialize_session(session, subject_names)})
+    
+    return jsonify({
+        "ok": not errors,
+        "created": created,
+        "errors": [{"index": index, "error": errors[index]} for index in sorted(errors)]
+    }), 201 if created else 400
+
 @sessions_bp.route("/", methods=["GET"])
 @jwt_required()
 def get_sessions():
     """Get sessions for current user with optional filters."""
     user = get_current_user()
     
-    # Parse query params
-    start_date_str = request.args.get("start_date")
-    end_date_str = request.args.get("end_date")
-    subject_id = request.args.get("subject_id", type=int)
+    # Nothing changed since the client's copy -> 304 without querying sessions
+    etag = make_etag(
+        request.path, user.id, user.data_version, user.timezone,
+        sorted(request.args.items(multi=True))
+    )
+    cached = not_modified(etag)
+    if cached:
+        return cached
     
-    # Build query
-    query = FocusSession.query.filter_by(user_id=user.id)
+    try:
+        query = filter_sessions(FocusSession.query.filter_by(user_id=user.id), user)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    # Apply date filters
-    if start_date_str:
-        try:
-            start_date = datetime.fromisoformat(start_date_str + "T00:00:00+00:00").date()
-            query = query.filter(func.date(FocusSession.started_at) >= start_date)
-        except ValueError:
-            return jsonify({"error": "Invalid start_date format"}), 400
+    limit = request.args.get("limit", type=int)
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
     
-    if end_date_str:
+    cursor = request.args.get("cursor")
+    if cursor:
         try:
-            end_date = datetime.fromisoformat(end_date_str + "T23:59:59+00:00").date()
-            query = query.filter(func.date(FocusSession.started_at) <= end_date)
+            cursor_started_at, cursor_id = decode_cursor(cursor)
         except ValueError:
-            return jsonify({"error": "Invalid end_date format"}), 400
+            return jsonify({"error": "Invalid cursor"}), 400
+        # Seek past the last row of the previous page (uses the (user_id, started_at, id) index)
+        query = query.filter(
+            tuple_(FocusSession.started_at, FocusSession.id) < tuple_(cursor_started_at, cursor_id)
+        )
     
-    # Apply subject filter
-    if subject_id is not None:
-        query = query.filter_by(subject_id=subject_id)
+    # Order by most recent first (id breaks ties so pages never overlap or skip rows)
+    query = SessionSerializer.query(query).order_by(FocusSession.started_at.desc(), FocusSession.id.desc())
     
-    # Order by most recent first
-    sessions = query.order_by(FocusSession.started_at.desc()).all()
+    if limit is None:
+        return with_etag(jsonify(SessionSerializer.dump_all(query)), etag), 200
     
-    return jsonify([s.to_dict() for s in sessions]), 200
+    # Fetch one extra row to learn whether another page exists
+    sessions = query.limit(limit + 1).all()
+    response = with_etag(jsonify([SessionSerializer.dump(s) for s in sessions[:limit]]), etag)
+    if len(sessions) > limit:
+        last = sessions[limit - 1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.started_at, last.id)
+    return response, 200
+
+
+EXPORT_FIELDS = ("id", "subject_id", "subject", "duration_ms", "started_at", "ended_at")
+EXPORT_BATCH_SIZE = 1000
+
+def export_rows(query, subject_names):
+    """Yield lists of export dicts, one list per database batch (same shape as FocusSession.to_dict)."""
+    # yield_per streams from a server-side cursor where the driver supports it
+    result = db.session.execute(query.statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for batch in result.partitions():
+        yield [serialize_session(row, subject_names) for row in batch]
+
+def generate_ndjson(batches):
+    dumps = current_app.json.dumps
+    for rows in batches:
+        yield "".join(dumps(row) + "\n" for row in rows)
 
+def generate_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    yield buffer.getvalue()
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in rows:
+            row["started_at"] = row["started_at"].isoformat()
+            row["ended_at"] = row["ended_at"].isoformat()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+@sessions_bp.route("/export", methods=["GET"])
+@jwt_required()
+def export_sessions():
+    """
+    Stream the current user's sessions, oldest first, as NDJSON (default) or CSV.
+    Accepts the same start_date/end_date/subject_id filters as GET /api/sessions.
+    Rows are read in batches, so memory stays flat regardless of history size.
+    Only sessions still in focus_sessions are exported: months moved out by
+    `flask partitions archive` are not included.
+    """
+    user = get_current_user()
+    
+    output_format = request.args.get("format", "ndjson")
+    if output_format not in ("ndjson", "csv"):
+        return jsonify({"error": "format must be 'ndjson' or 'csv'"}), 400
+    
+    query = db.session.query(
+        FocusSession.id,
+        FocusSession.subject_id,
+        FocusSession.duration_ms,
+        FocusSession.started_at,
+        FocusSession.ended_at
+    ).filter(FocusSession.user_id == user.id)
+    try:
+        query = filter_sessions(query, user)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    query = query.order_by(FocusSession.started_at, FocusSession.id)
+    
+    # Subject names come from one small lookup instead of a join per row
+    subject_names = dict(
+        db.session.query(Subject.id, Subject.name).filter(Subject.user_id == user.id).all()
+    )
+    
+    batches = export_rows(query, subject_names)
+    if output_format == "csv":
+        body, mimetype = generate_csv(batches), "text/csv"
+    else:
+        body, mimetype = generate_ndjson(batches), "application/x-ndjson"
+    
+    filename = f"{user.username or 'sessions'}-sessions.{output_format}"
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
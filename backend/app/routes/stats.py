@@ -1,61 +1,34 @@
-from flask import Blueprint, request, jsonify
+from functools import wraps
+from flask import Blueprint, current_app, request, jsonify, make_response
 from flask_jwt_extended import jwt_required, get_jwt_identity
+import base64
+import struct
+from collections import namedtuple
 from datetime import datetime, date, timedelta
 from sqlalchemy import func, and_, or_
+from sqlalchemy.orm import joinedload
 from app import db
-from app.models import User, FocusSession, Subject, Friend
+from app.models import User, FocusSession, Subject, DailyRollup
 from app.models import utc_now
+from app.periods import user_zone, zone_name, local_date, local_today, local_day_bounds, parse_date, as_utc
+from app.http_cache import make_etag, not_modified, with_etag
+from app.cache import get_stats_cache
+from app.access import resolve_target
+from app.rollups import rollup_totals, rollup_days, rollup_rows
+from app.streaks import compute_streaks
 
 stats_bp = Blueprint("stats", __name__)
 
+# Longest range a per-day payload may cover (the compact heatmap packs 2 bytes per day)
+MAX_DAYS_SPAN = 366
+MAX_COMPACT_DAYS_SPAN = 5 * 366
+
 def get_current_user():
     """Helper to get current user from JWT."""
     user_id = get_jwt_identity()
     # Convert string identity back to int
     return User.query.get_or_404(int(user_id))
 
-def get_target_user(current_user, username=None, user_id=None):
-    """Get target user for stats (with privacy checks)."""
-    if username:
-        target = User.query.filter_by(username=username).first()
-        print(f"🔍 Looking for user by username: {username}")
-    elif user_id:
-        target = User.query.get(user_id)
-        print(f"🔍 Looking for user by id: {user_id}")
-    else:
-        print(f"✅ Returning current user: {current_user.id}")
-        return current_user
-    
-    if not target:
-        print(f"❌ User not found")
-        return None
-    
-    print(f"✅ Found target user: {target.id} ({target.username}), privacy_opt_in: {target.privacy_opt_in}")
-    
-    # Privacy check
-    if target.id == current_user.id:
-        print(f"✅ Target is current user, allowing access")
-        return target
-    
-    if not target.privacy_opt_in:
-        # Check if they're friends
-        print(f"🔒 User is private, checking friendship...")
-        is_friend = Friend.query.filter(
-            Friend.status == "accepted",
-            ((Friend.requester_id == current_user.id) & (Friend.addressee_id == target.id)) |
-            ((Friend.requester_id == target.id) & (Friend.addressee_id == current_user.id))
-        ).first()
-        if is_friend:
-            print(f"✅ Users are friends, allowing access")
-        else:
-            print(f"❌ Users are not friends, denying access")
-        if not is_friend:
-            return None
-    else:
-        print(f"✅ User is public, allowing access")
-    
-    return target
-
 def compute_rank_tier(weekly_hours):
     """Compute rank tier based on weekly hours."""
     if weekly_hours < 5:
@@ -73,18 +46,17 @@ def compute_xp(total_minutes):
     """Compute XP: 1 XP per 3 minutes."""
     return int(total_minutes / 3)
 
-def get_date_range(start_date_str=None, end_date_str=None, default_days=None):
-    """Parse and return date range."""
+def get_date_range(start_date_str=None, end_date_str=None, default_days=None, today=None):
+    """Parse and return date range (defaults are relative to `today`, the target user's local date)."""
     if start_date_str and end_date_str:
         try:
-            start = datetime.fromisoformat(start_date_str + "T00:00:00+00:00").date()
-            end = datetime.fromisoformat(end_date_str + "T23:59:59+00:00").date()
-            return start, end
+            return parse_date(start_date_str), parse_date(end_date_str)
         except ValueError:
             return None, None
     
-    # Default: current week (Mon-Sun) in UTC (matching calendar/dashboard)
-    today = date.today()
+    # Default: current week (Mon-Sun) in the user's timezone (matching calendar/dashboard)
+    if today is None:
+        today = date.today()
     if default_days:
         start = today - timedelta(days=default_days - 1)
         return start, today
@@ -96,289 +68,180 @@ def get_date_range(start_date_str=None, end_date_str=None, default_days=None):
     end = start + timedelta(days=6)  # Monday -> Sunday
     return start, end
 
-def calculate_streak(user_id, end_date=None):
-    """Calculate consecutive days with >0 minutes ending on end_date (or today)."""
-    if end_date is None:
-        end_date = date.today()
-    
-    streak = 0
-    current_date = end_date
-    
-    while True:
-        # Get total minutes for this day
-        day_start = datetime.combine(current_date, datetime.min.time()).replace(tzinfo=datetime.now().astimezone().tzinfo)
-        day_end = datetime.combine(current_date, datetime.max.time()).replace(tzinfo=datetime.now().astimezone().tzinfo)
-        
-        total_ms = db.session.query(func.sum(FocusSession.duration_ms)).filter(
-            FocusSession.user_id == user_id,
-            FocusSession.started_at >= day_start,
-            FocusSession.started_at <= day_end
-        ).scalar() or 0
-        
-        total_minutes = total_ms / 60000
-        
-        if total_minutes > 0:
-            streak += 1
-            current_date -= timedelta(days=1)
-        else:
-            break
-    
-    return streak
+def range_error(start_date, end_date, max_days=MAX_DAYS_SPAN):
+    """
+    Error message for an invalid or over-long per-day range, or None if it is fine.
+    max_days=None skips the length cap (totals over a range cost the same whatever its length).
+    """
+    if start_date is None or end_date is None:
+        return "Invalid date format"
+    if end_date < start_date:
+        return "end_date must not be before start_date"
+    if max_days is not None and (end_date - start_date).days + 1 > max_days:
+        return f"Date range must not exceed {max_days} days"
+    return None
 
-@stats_bp.route("/summary", methods=["GET"])
-@jwt_required()
-def get_summary():
-    """Get summary stats for current user (or specified user)."""
-    try:
+def conditional_stats(view):
+    """
+    Resolve the (privacy-checked) target user once and pass it to the view.
+    GET responses carry an ETag derived from the target's data version, and a
+    matching If-None-Match is answered with 304 before any aggregation runs.
+    Otherwise the body is served from the stats cache, keyed by the same ETag
+    (target, endpoint, normalized params, data version), so every viewer of a
+    profile shares one computed copy.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
         current_user = get_current_user()
-        username = request.args.get("username")
-        user_id = request.args.get("user_id", type=int)
-        
-        print(f"📊 Summary request - current_user: {current_user.id}, username: {username}, user_id: {user_id}")
-        
-        target_user = get_target_user(current_user, username, user_id)
+        target_user = resolve_target(
+            current_user,
+            request.args.get("username"),
+            request.args.get("user_id", type=int)
+        )
         if not target_user:
-            print(f"❌ Target user not found or not accessible")
             return jsonify({"error": "User not found or not accessible"}), 404
-    except Exception as e:
-        print(f"❌ Error in get_summary: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"error": f"Internal error: {str(e)}"}), 500
-    
-    # Get date range (default: current week)
-    start_date, end_date = get_date_range(
-        request.args.get("start_date"),
-        request.args.get("end_date")
-    )
-    
-    # Query sessions in range
-    start_dt = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=datetime.now().astimezone().tzinfo)
-    end_dt = datetime.combine(end_date, datetime.max.time()).replace(tzinfo=datetime.now().astimezone().tzinfo)
-    
-    print(f"📊 Summary stats for user {target_user.id} ({target_user.username})")
-    print(f"   Date range: {start_date} to {end_date}")
-    print(f"   DateTime range: {start_dt} to {end_dt}")
-    
-    # Query with optional subject filter
-    subject_id = request.args.get("subject_id", type=int)
-    query = FocusSession.query.filter(
-        FocusSession.user_id == target_user.id,
-        FocusSession.started_at >= start_dt,
-        FocusSession.started_at <= end_dt
-    )
-    
-    if subject_id is not None:
-        query = query.filter(FocusSession.subject_id == subject_id)
-        print(f"   Filtering by subject_id: {subject_id}")
-    
-    sessions = query.all()
-    print(f"   Found {len(sessions)} sessions in range")
-    
-    # Calculate stats
-    total_ms = sum(s.duration_ms for s in sessions)
+        
+        # Default ranges are relative to the target's local today, so it is part of the key too
+        zone = user_zone(target_user)
+        etag = make_etag(
+            request.path, target_user.id, target_user.data_version,
+            zone_name(zone), local_today(zone), sorted(request.args.items(multi=True))
+        )
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
+        cache = get_stats_cache()
+        body = cache.get(target_user.id, etag)
+        if body is not None:
+            response = current_app.response_class(body, mimetype="application/json")
+            return with_etag(response, etag)
+        
+        response = make_response(view(target_user, *args, **kwargs))
+        if response.status_code == 200:
+            cache.set(target_user.id, etag, response.get_data())
+            with_etag(response, etag)
+        return response
+    return wrapper
+
+def calculate_streak(user_id, end_date=None):
+    """Calculate consecutive days with >0 minutes ending on end_date (or today)."""
+    current_streak, _ = compute_streaks(user_id, end_date)
+    return current_streak
+
+def get_week_start(week_start_str, today):
+    """Parse a week start date, defaulting to the Monday of `today`'s week (raises ValueError)."""
+    if week_start_str:
+        return parse_date(week_start_str)
+    days_since_monday = today.weekday()  # 0 = Monday, 6 = Sunday
+    return today - timedelta(days=days_since_monday)
+
+def get_heatmap_range(start_date_str, end_date_str, today):
+    """Parse a heatmap range, defaulting to Jan 1 of `today`'s year through today (raises ValueError)."""
+    if start_date_str and end_date_str:
+        return parse_date(start_date_str), parse_date(end_date_str)
+    return date(today.year, 1, 1), today
+
+def build_summary(total_ms, sessions_count, streak_days, longest_streak_days):
+    """Summary payload from range totals and streaks."""
     total_minutes = total_ms / 60000
-    sessions_count = len(sessions)
     weekly_hours = total_minutes / 60
-    rank = compute_rank_tier(weekly_hours)
-    xp = compute_xp(total_minutes)
-    streak_days = calculate_streak(target_user.id)
-    
-    print(f"   Total minutes: {total_minutes}, Sessions: {sessions_count}, Hours: {weekly_hours}")
-    
-    return jsonify({
+    return {
         "totalMinutes": int(total_minutes),
         "streakDays": streak_days,
+        "longestStreakDays": longest_streak_days,
         "sessionsCount": sessions_count,
         "weeklyHours": round(weekly_hours, 1),
-        "rank": rank,
-        "xp": xp
-    }), 200
+        "rank": compute_rank_tier(weekly_hours),
+        "xp": compute_xp(total_minutes)
+    }
 
-@stats_bp.route("/by-subject", methods=["GET"])
-@jwt_required()
-def get_by_subject():
-    """Get stats aggregated by subject."""
-    current_user = get_current_user()
-    username = request.args.get("username")
-    user_id = request.args.get("user_id", type=int)
-    
-    target_user = get_target_user(current_user, username, user_id)
-    if not target_user:
-        return jsonify({"error": "User not found or not accessible"}), 404
-    
-    # Get date range
-    start_date, end_date = get_date_range(
-        request.args.get("start_date"),
-        request.args.get("end_date")
-    )
-    
-    start_dt = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=datetime.now().astimezone().tzinfo)
-    end_dt = datetime.combine(end_date, datetime.max.time()).replace(tzinfo=datetime.now().astimezone().tzinfo)
-    
-    print(f"📊 Subject stats for user {target_user.id} ({target_user.username})")
-    print(f"   Date range: {start_date} to {end_date}")
-    
-    # Query with optional subject filter
-    subject_id = request.args.get("subject_id", type=int)
-    query = FocusSession.query.filter(
-        FocusSession.user_id == target_user.id,
-        FocusSession.started_at >= start_dt,
-        FocusSession.started_at <= end_dt
-    )
-    
-    if subject_id is not None:
-        query = query.filter(FocusSession.subject_id == subject_id)
-        print(f"   Filtering by subject_id: {subject_id}")
-    
-    sessions = query.all()
-    print(f"   Found {len(sessions)} sessions for subject breakdown")
-    
-    # Aggregate by subject
+def build_by_subject(rows):
+    """By-subject payload from (subject_id, subject_name, subject_color, total_ms) rows."""
+    # Merge by display name (sessions without a subject count as "All Subjects")
     by_subject = {}
-    for session in sessions:
-        if session.subject_id:
-            subject = Subject.query.get(session.subject_id)
-            subject_name = subject.name if subject else "Unknown"
-            subject_id_val = session.subject_id
+    for row in rows:
+        if row.subject_id:
+            subject_name = row.subject_name or "Unknown"
+            subject_id_val = row.subject_id
         else:
             subject_name = "All Subjects"
             subject_id_val = None
         
         if subject_name not in by_subject:
-            # Get subject color if available
-            color = "#3b82f6"  # default
-            if session.subject_id:
-                subject_obj = Subject.query.get(session.subject_id)
-                if subject_obj and subject_obj.color:
-                    color = subject_obj.color
-            
             by_subject[subject_name] = {
                 "subject": subject_name,
                 "minutes": 0,
                 "subject_id": subject_id_val,
-                "color": color
+                "color": (row.subject_color if row.subject_id else None) or "#3b82f6"
             }
         
-        by_subject[subject_name]["minutes"] += session.duration_ms / 60000
+        by_subject[subject_name]["minutes"] += (row.total_ms or 0) / 60000
     
     # Convert to list and sort
     result = list(by_subject.values())
     result.sort(key=lambda x: x["minutes"], reverse=True)
-    
-    return jsonify(result), 200
+    return result
 
-@stats_bp.route("/daily", methods=["GET"])
-@jwt_required()
-def get_daily():
-    """Get daily stats for last 30 days (or specified range)."""
-    current_user = get_current_user()
-    username = request.args.get("username")
-    user_id = request.args.get("user_id", type=int)
-    subject_id = request.args.get("subject_id", type=int)
-    
-    target_user = get_target_user(current_user, username, user_id)
-    if not target_user:
-        return jsonify({"error": "User not found or not accessible"}), 404
-    
-    # Get date range (default: last 30 days)
-    start_date, end_date = get_date_range(
-        request.args.get("start_date"),
-        request.args.get("end_date"),
-        default_days=30
-    )
-    
-    # Build query
-    query = db.session.query(
-        func.date(FocusSession.started_at).label("date"),
-        func.sum(FocusSession.duration_ms).label("total_ms")
-    ).filter(
-        FocusSession.user_id == target_user.id,
-        func.date(FocusSession.started_at) >= start_date,
-        func.date(FocusSession.started_at) <= end_date
-    )
-    
-    # Filter by subject if provided
-    if subject_id is not None:
-        query = query.filter(FocusSession.subject_id == subject_id)
-    
-    # Group by date
-    results = query.group_by(
-        func.date(FocusSession.started_at)
-    ).all()
-    
-    # Create dict for lookup
-    data_dict = {str(row.date): row.total_ms for row in results}
-    
-    # Build complete list
+def build_days(day_totals, start_date, end_date):
+    """Daily/heatmap payload: one entry per day in range from a {date: total_ms} dict."""
     days = []
     current_date = start_date
     while current_date <= end_date:
-        date_str = current_date.isoformat()
-        total_ms = data_dict.get(date_str, 0)
+        total_ms = day_totals.get(current_date, 0)
         minutes = int(total_ms / 60000) if total_ms else 0
         days.append({
-            "date": date_str,
+            "date": current_date,
             "minutes": minutes
         })
         current_date += timedelta(days=1)
-    
-    return jsonify(days), 200
+    return days
 
-@stats_bp.route("/weekly", methods=["GET"])
-@jwt_required()
-def get_weekly():
-    """Get weekly stats with daily breakdown."""
-    current_user = get_current_user()
-    username = request.args.get("username")
-    user_id = request.args.get("user_id", type=int)
-    
-    target_user = get_target_user(current_user, username, user_id)
-    if not target_user:
-        return jsonify({"error": "User not found or not accessible"}), 404
-    
-    # Get week start (default: current week Monday, UTC-based to align with dashboard/calendar)
-    week_start_str = request.args.get("start_date")
-    if week_start_str:
-        try:
-            week_start = datetime.fromisoformat(week_start_str + "T00:00:00+00:00").date()
-        except ValueError:
-            return jsonify({"error": "Invalid start_date format"}), 400
-    else:
-        today = date.today()
-        days_since_monday = today.weekday()  # 0 = Monday, 6 = Sunday
-        week_start = today - timedelta(days=days_since_monday)
+def build_compact_days(day_totals, start_date, end_date):
+    """
+    Compact heatmap payload: the start date plus per-day minutes packed as
+    little-endian uint16 values and base64-encoded (2 bytes per day, any range length).
+    """
+    minutes = []
+    current_date = start_date
+    while current_date <= end_date:
+        total_ms = day_totals.get(current_date, 0)
+        minutes.append(min(int(total_ms / 60000), 0xFFFF))
+        current_date += timedelta(days=1)
     
+    return {
+        "start": start_date.isoformat(),
+        "days": len(minutes),
+        "encoding": "base64-uint16le",
+        "minutes": base64.b64encode(struct.pack(f"<{len(minutes)}H", *minutes)).decode("ascii")
+    }
+
+def build_weekly(target_user, zone, week_start, subject_id, prev_total_ms):
+    """Weekly payload: the week's sessions grouped by local day, plus the previous week's total."""
     week_end = week_start + timedelta(days=6)  # Monday -> Sunday
     
-    # Previous week for comparison
-    prev_week_start = week_start - timedelta(days=7)
-    prev_week_end = week_start - timedelta(days=1)
-    
-    # Query current week sessions
-    start_dt = datetime.combine(week_start, datetime.min.time()).replace(tzinfo=datetime.now().astimezone().tzinfo)
-    end_dt = datetime.combine(week_end, datetime.max.time()).replace(tzinfo=datetime.now().astimezone().tzinfo)
-    
-    # Get optional subject filter
-    subject_id = request.args.get("subject_id", type=int)
+    # Query current week sessions (UTC bounds of the user's local week)
+    start_dt, end_dt = local_day_bounds(week_start, week_end, zone)
     
     query = FocusSession.query.filter(
         FocusSession.user_id == target_user.id,
         FocusSession.started_at >= start_dt,
-        FocusSession.started_at <= end_dt
+        FocusSession.started_at < end_dt
     )
     
     if subject_id is not None:
         query = query.filter(FocusSession.subject_id == subject_id)
         print(f"📊 Weekly stats filtering by subject_id: {subject_id}")
     
-    sessions = query.order_by(FocusSession.started_at).all()
+    sessions = query.options(
+        joinedload(FocusSession.subject)
+    ).order_by(FocusSession.started_at).all()
     print(f"📊 Weekly stats: found {len(sessions)} sessions")
     
     # Group by date
     by_date = {}
     for session in sessions:
-        date_str = session.started_at.date().isoformat()
+        date_str = local_date(session.started_at, zone).isoformat()
         if date_str not in by_date:
             by_date[date_str] = {
                 "date": date_str,
@@ -388,27 +251,21 @@ def get_weekly():
         
         by_date[date_str]["totalMinutes"] += session.duration_ms / 60000
         
-        # Get subject name
+        # Subject name and color come from the eager-loaded relationship
         subject_name = "All Subjects"
-        if session.subject_id:
-            subject = Subject.query.get(session.subject_id)
-            if subject:
-                subject_name = subject.name
-        
-        # Get subject color
         subject_color = "#3b82f6"  # default
-        if session.subject_id:
-            subject_obj = Subject.query.get(session.subject_id)
-            if subject_obj and subject_obj.color:
-                subject_color = subject_obj.color
+        if session.subject:
+            subject_name = session.subject.name
+            if session.subject.color:
+                subject_color = session.subject.color
         
         by_date[date_str]["sessions"].append({
             "id": session.id,
             "subject_id": session.subject_id,
             "subject": subject_name,
             "color": subject_color,
-            "started_at": session.started_at.isoformat(),
-            "ended_at": session.ended_at.isoformat(),
+            "started_at": as_utc(session.started_at),
+            "ended_at": as_utc(session.ended_at),
             "durationMinutes": int(session.duration_ms / 60000)
         })
     
@@ -431,79 +288,300 @@ def get_weekly():
             })
         current_date += timedelta(days=1)
     
-    # Query previous week total
-    prev_start_dt = datetime.combine(prev_week_start, datetime.min.time()).replace(tzinfo=datetime.now().astimezone().tzinfo)
-    prev_end_dt = datetime.combine(prev_week_end, datetime.max.time()).replace(tzinfo=datetime.now().astimezone().tzinfo)
-    
-    prev_total_ms = db.session.query(func.sum(FocusSession.duration_ms)).filter(
-        FocusSession.user_id == target_user.id,
-        FocusSession.started_at >= prev_start_dt,
-        FocusSession.started_at <= prev_end_dt
-    ).scalar() or 0
-    
-    prev_week_total_minutes = int(prev_total_ms / 60000)
-    
-    return jsonify({
+    return {
         "weekStart": week_start.isoformat(),
         "days": days,
         "weeklyTotalMinutes": int(weekly_total_minutes),
-        "prevWeekTotalMinutes": prev_week_total_minutes
-    }), 200
+        "prevWeekTotalMinutes": int(prev_total_ms / 60000)
+    }
 
-@stats_bp.route("/heatmap", methods=["GET"])
+@stats_bp.route("/summary", methods=["GET"])
 @jwt_required()
-def get_heatmap():
-    """Get heatmap data for last year (or specified range)."""
-    current_user = get_current_user()
-    username = request.args.get("username")
-    user_id = request.args.get("user_id", type=int)
+@conditional_stats
+def get_summary(target_user):
+    """Get summary stats for current user (or specified user)."""
+    # Get date range (default: current week, in the target user's local days)
+    zone = user_zone(target_user)
+    today = local_today(zone)
+    start_date, end_date = get_date_range(
+        request.args.get("start_date"),
+        request.args.get("end_date"),
+        today=today
+    )
+    error = range_error(start_date, end_date, max_days=None)
+    if error:
+        return jsonify({"error": error}), 400
     
-    target_user = get_target_user(current_user, username, user_id)
-    if not target_user:
-        return jsonify({"error": "User not found or not accessible"}), 404
+    print(f"📊 Summary stats for user {target_user.id} ({target_user.username})")
+    print(f"   Date range: {start_date} to {end_date}")
     
-    # Get date range (default: last year from Jan 1)
-    start_date_str = request.args.get("start_date")
-    end_date_str = request.args.get("end_date")
+    # Totals come from the daily rollups (optionally for one subject)
+    subject_id = request.args.get("subject_id", type=int)
+    total_ms, sessions_count = rollup_totals(target_user.id, start_date, end_date, subject_id)
+    streak_days, longest_streak_days = compute_streaks(target_user.id, today)
     
-    if start_date_str and end_date_str:
-        try:
-            start_date = datetime.fromisoformat(start_date_str + "T00:00:00+00:00").date()
-            end_date = datetime.fromisoformat(end_date_str + "T23:59:59+00:00").date()
-        except ValueError:
-            return jsonify({"error": "Invalid date format"}), 400
-    else:
-        today = date.today()
-        start_date = date(today.year, 1, 1)  # Jan 1 of current year
-        end_date = today
+    print(f"   Total minutes: {total_ms / 60000}, Sessions: {sessions_count}")
     
-    # Query sessions grouped by date
-    results = db.session.query(
-        func.date(FocusSession.started_at).label("date"),
-        func.sum(FocusSession.duration_ms).label("total_ms")
+    return jsonify(build_summary(total_ms, sessions_count, streak_days, longest_streak_days)), 200
+
+@stats_bp.route("/by-subject", methods=["GET"])
+@jwt_required()
+@conditional_stats
+def get_by_subject(target_user):
+    """Get stats aggregated by subject."""
+    
+    # Get date range (in the target user's local days)
+    start_date, end_date = get_date_range(
+        request.args.get("start_date"),
+        request.args.get("end_date"),
+        today=local_today(user_zone(target_user))
+    )
+    error = range_error(start_date, end_date, max_days=None)
+    if error:
+        return jsonify({"error": error}), 400
+    
+    print(f"📊 Subject stats for user {target_user.id} ({target_user.username})")
+    print(f"   Date range: {start_date} to {end_date}")
+    
+    # Aggregate the daily rollups per subject in SQL, with optional subject filter
+    subject_id = request.args.get("subject_id", type=int)
+    query = db.session.query(
+        DailyRollup.subject_id,
+        Subject.name.label("subject_name"),
+        Subject.color.label("subject_color"),
+        func.sum(DailyRollup.total_ms).label("total_ms")
+    ).outerjoin(
+        Subject, Subject.id == DailyRollup.subject_id
     ).filter(
-        FocusSession.user_id == target_user.id,
-        func.date(FocusSession.started_at) >= start_date,
-        func.date(FocusSession.started_at) <= end_date
-    ).group_by(
-        func.date(FocusSession.started_at)
-    ).all()
+        DailyRollup.user_id == target_user.id,
+        DailyRollup.local_day >= start_date,
+        DailyRollup.local_day <= end_date
+    )
     
-    # Create dict for lookup
-    data_dict = {str(row.date): row.total_ms for row in results}
+    if subject_id is not None:
+        query = query.filter(DailyRollup.subject_id == subject_id)
+        print(f"   Filtering by subject_id: {subject_id}")
     
-    # Build complete list
-    days = []
-    current_date = start_date
-    while current_date <= end_date:
-        date_str = current_date.isoformat()
-        total_ms = data_dict.get(date_str, 0)
-        minutes = int(total_ms / 60000) if total_ms else 0
-        days.append({
-            "date": date_str,
-            "minutes": minutes
-        })
-        current_date += timedelta(days=1)
+    rows = query.group_by(
+        DailyRollup.subject_id, Subject.name, Subject.color
+    ).order_by(DailyRollup.subject_id).all()
+    print(f"   Found {len(rows)} subjects for subject breakdown")
+    
+    return jsonify(build_by_subject(rows)), 200
+
+@stats_bp.route("/daily", methods=["GET"])
+@jwt_required()
+@conditional_stats
+def get_daily(target_user):
+    """Get daily stats for last 30 days (or specified range)."""
+    subject_id = request.args.get("subject_id", type=int)
+    
+    # Get date range (default: last 30 days, in the target user's local days)
+    start_date, end_date = get_date_range(
+        request.args.get("start_date"),
+        request.args.get("end_date"),
+        default_days=30,
+        today=local_today(user_zone(target_user))
+    )
+    error = range_error(start_date, end_date)
+    if error:
+        return jsonify({"error": error}), 400
+    
+    # Per-day totals from the daily rollups (optionally for one subject)
+    day_totals = rollup_days(target_user.id, start_date, end_date, subject_id)
+    
+    return jsonify(build_days(day_totals, start_date, end_date)), 200
+
+@stats_bp.route("/weekly", methods=["GET"])
+@jwt_required()
+@conditional_stats
+def get_weekly(target_user):
+    """Get weekly stats with daily breakdown."""
+    
+    # Get week start (default: current week Monday in the target user's timezone)
+    zone = user_zone(target_user)
+    try:
+        week_start = get_week_start(request.args.get("start_date"), local_today(zone))
+    except ValueError:
+        return jsonify({"error": "Invalid start_date format"}), 400
+    
+    # Get optional subject filter
+    subject_id = request.args.get("subject_id", type=int)
+    
+    # Previous week total (for comparison) from the daily rollups
+    prev_total_ms, _ = rollup_totals(
+        target_user.id,
+        week_start - timedelta(days=7),
+        week_start - timedelta(days=1)
+    )
+    
+    return jsonify(build_weekly(target_user, zone, week_start, subject_id, prev_total_ms)), 200
+
+@stats_bp.route("/heatmap", methods=["GET"])
+@jwt_required()
+@conditional_stats
+def get_heatmap(target_user):
+    """Get heatmap data for last year (or specified range)."""
     
-    return jsonify(days), 200
+    # Get date range (default: last year from Jan 1)
+    zone = user_zone(target_user)
+    try:
+        start_date, end_date = get_heatmap_range(
+            request.args.get("start_date"),
+            request.args.get("end_date"),
+            local_today(zone)
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid date format"}), 400
+    
+    output_format = request.args.get("format", "json")
+    if output_format not in ("json", "compact"):
+        return jsonify({"error": "format must be 'json' or 'compact'"}), 400
+    max_days = MAX_COMPACT_DAYS_SPAN if output_format == "compact" else MAX_DAYS_SPAN
+    error = range_error(start_date, end_date, max_days)
+    if error:
+        return jsonify({"error": error}), 400
+    
+    # Per-day totals from the daily rollups
+    day_totals = rollup_days(target_user.id, start_date, end_date)
+    
+    if output_format == "compact":
+        payload = build_compact_days(day_totals, start_date, end_date)
+    else:
+        payload = build_days(day_totals, start_date, end_date)
+    return jsonify(payload), 200
 
+DASHBOARD_SECTIONS = ("summary", "by_subject", "daily", "weekly", "heatmap")
+
+SubjectTotal = namedtuple("SubjectTotal", "subject_id subject_name subject_color total_ms")
+
+@stats_bp.route("/dashboard", methods=["GET"])
+@jwt_required()
+@conditional_stats
+def get_dashboard(target_user):
+    """
+    Get several stats views in one request (privacy check and rollup scan run once).
+
+    Query params:
+      sections: comma-separated subset of summary,by_subject,daily,weekly,heatmap (default: all)
+      start_date/end_date: summary and by-subject range
+      week_start_date: weekly start (default: start_date, else this week's Monday)
+      daily_start_date/daily_end_date: daily range (default: last 30 days)
+      heatmap_start_date/heatmap_end_date: heatmap range (default: Jan 1 through today)
+      subject_id: filters summary, daily and weekly (by-subject and heatmap always cover all subjects)
+      daily_subject_id: filters daily only, overriding subject_id there
+    """
+    subject_id = request.args.get("subject_id", type=int)
+    daily_subject_id = request.args.get("daily_subject_id", subject_id, type=int)
+    
+    sections_param = request.args.get("sections")
+    if sections_param:
+        sections = [s.strip() for s in sections_param.split(",") if s.strip()]
+        unknown = [s for s in sections if s not in DASHBOARD_SECTIONS]
+        if unknown:
+            return jsonify({"error": f"Unknown sections: {', '.join(unknown)}"}), 400
+    else:
+        sections = list(DASHBOARD_SECTIONS)
+    
+    zone = user_zone(target_user)
+    today = local_today(zone)
+    
+    # Resolve every requested range up front so one rollup scan can cover them all
+    ranges = {}
+    try:
+        if "summary" in sections or "by_subject" in sections:
+            ranges["range"] = get_date_range(
+                request.args.get("start_date"),
+                request.args.get("end_date"),
+                today=today
+            )
+        if "daily" in sections:
+            ranges["daily"] = get_date_range(
+                request.args.get("daily_start_date"),
+                request.args.get("daily_end_date"),
+                default_days=30,
+                today=today
+            )
+        if "weekly" in sections:
+            week_start = get_week_start(request.args.get("week_start_date") or request.args.get("start_date"), today)
+            ranges["prev_week"] = (week_start - timedelta(days=7), week_start - timedelta(days=1))
+        if "heatmap" in sections:
+            ranges["heatmap"] = get_heatmap_range(
+                request.args.get("heatmap_start_date"),
+                request.args.get("heatmap_end_date"),
+                today
+            )
+    except ValueError:
+        return jsonify({"error": "Invalid date format"}), 400
+    if any(start is None for start, _ in ranges.values()):
+        return jsonify({"error": "Invalid date format"}), 400
+    for key, max_days in (("range", None), ("daily", MAX_DAYS_SPAN), ("heatmap", MAX_DAYS_SPAN)):
+        error = key in ranges and range_error(*ranges[key], max_days)
+        if error:
+            return jsonify({"error": f"{key}: {error}"}), 400
+    
+    rows = []
+    if ranges:
+        rows = rollup_rows(
+            target_user.id,
+            min(start for start, _ in ranges.values()),
+            max(end for _, end in ranges.values())
+        )
+    
+    def in_range(row, key, subject_filter=None):
+        start, end = ranges[key]
+        if not (start <= row.local_day <= end):
+            return False
+        return subject_filter is None or row.subject_id == subject_filter
+    
+    def day_totals(key, subject_filter=None):
+        totals = {}
+        for row in rows:
+            if in_range(row, key, subject_filter):
+                totals[row.local_day] = totals.get(row.local_day, 0) + row.total_ms
+        return totals
+    
+    result = {}
+    
+    if "summary" in sections:
+        selected = [row for row in rows if in_range(row, "range", subject_id)]
+        streak_days, longest_streak_days = compute_streaks(target_user.id, today)
+        result["summary"] = build_summary(
+            sum(row.total_ms for row in selected),
+            sum(row.session_count for row in selected),
+            streak_days,
+            longest_streak_days
+        )
+    
+    if "by_subject" in sections:
+        totals, subject_info = {}, {}
+        for row in rows:
+            if in_range(row, "range"):
+                totals[row.subject_id] = totals.get(row.subject_id, 0) + row.total_ms
+                subject_info[row.subject_id] = (row.subject_name, row.subject_color)
+        ordered = sorted(totals, key=lambda sid: (sid is not None, sid or 0))
+        result["by_subject"] = build_by_subject([
+            SubjectTotal(sid, *subject_info[sid], totals[sid]) for sid in ordered
+        ])
+    
+    if "daily" in sections:
+        start_date, end_date = ranges["daily"]
+        result["daily"] = build_days(day_totals("daily", daily_subject_id), start_date, end_date)
+    
+    if "weekly" in sections:
+        prev_total_ms = sum(day_totals("prev_week").values())
+        result["weekly"] = build_weekly(target_user, zone, week_start, subject_id, prev_total_ms)
+    
+    if "heatmap" in sections:
+        start_date, end_date = ranges["heatmap"]
+        result["heatmap"] = build_days(day_totals("heatmap"), start_date, end_date)
+    
+    return jsonify(result), 200
+
+@stats_bp.route("/cache", methods=["GET"])
+@jwt_required()
+def get_cache_stats():
+    """Hit/miss counters for the stats response cache (this worker's view). Only with STATS_CACHE_ENDPOINT set."""
+    if not current_app.config.get("STATS_CACHE_ENDPOINT"):
+        return jsonify({"error": "Not found"}), 404
+    return jsonify(get_stats_cache().stats()), 200
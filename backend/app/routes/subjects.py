@@ -2,7 +2,10 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import User, Subject
-from app.models import utc_now
+from app.models import utc_now, bump_data_version
+from app.cache import invalidate_user_stats
+from app.access import resolve_target
+from app.rollups import move_subject_rollups
 
 subjects_bp = Blueprint("subjects", __name__)
 
@@ -37,8 +40,7 @@ def get_subjects():
     
     # If username is provided, get that user's subjects (with privacy check)
     if username:
-        from app.routes.stats import get_target_user
-        target_user = get_target_user(current_user, username, None)
+        target_user = resolve_target(current_user, username)
         if not target_user:
             return jsonify({"error": "User not found or not accessible"}), 404
         user = target_user
@@ -114,7 +116,10 @@ def update_subject(id):
         subject.color = data["color"]
         print(f"🎨 Updated subject {subject.id} ({subject.name}) color from '{old_color}' to '{subject.color}'")
     
+    # Subject names and colors appear in stats and session payloads
+    bump_data_version(user.id)
     db.session.commit()
+    invalidate_user_stats(user.id)
     print(f"✅ Subject {subject.id} updated successfully")
     return jsonify(subject.to_dict()), 200
 
@@ -135,9 +140,12 @@ def delete_subject(id):
     # Set sessions' subject_id to null (cascade to "All Subjects")
     from app.models import FocusSession
     sessions_updated = FocusSession.query.filter_by(subject_id=subject.id).update({"subject_id": None})
+    move_subject_rollups(user.id, subject.id)
+    bump_data_version(user.id)
     
     db.session.delete(subject)
     db.session.commit()
+    invalidate_user_stats(user.id)
     
     print(f"🗑️ Deleted subject '{subject.name}' (id={subject.id}) for user {user.id}, updated {sessions_updated} sessions")
     
@@ -3,8 +3,13 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import timedelta
 from sqlalchemy import func
 from app import db
-from app.models import User, FocusSession
-from app.models import utc_now
+from app.models import User, UserDailyTotal
+from app.models import utc_now, bump_data_version
+from app.cache import invalidate_user_stats
+from app.access import can_view
+from app.periods import is_valid_timezone
+from app.rollups import rebuild_user_rollups
+from app.leaderboard_store import weekly_user_changed
 
 # Try to import better-profanity for content filtering
 try:
@@ -53,6 +58,10 @@ def update_me():
     if not data:
         return jsonify({"error": "No JSON data provided"}), 400
     
+    # Set when a change alters this user's stats responses
+    stats_changed = False
+    privacy_changed = False
+    
     # Update display_name (allow null or empty to clear)
     if "display_name" in data:
         new_display_name = data["display_name"] if data["display_name"] else None
@@ -68,11 +77,23 @@ def update_me():
         tz = data["timezone"]
         if not tz or not isinstance(tz, str):
             return jsonify({"error": "timezone must be a non-empty string"}), 400
-        user.timezone = tz
+        if not is_valid_timezone(tz):
+            return jsonify({"error": f"Unknown timezone: {tz}"}), 400
+        if tz != user.timezone:
+            user.timezone = tz
+            # Local days shift with the timezone, so re-bucket this user's rollups
+            rebuild_user_rollups(user)
+            bump_data_version(user.id)
+            stats_changed = True
     
     # Update privacy_opt_in
     if "privacy_opt_in" in data:
-        user.privacy_opt_in = bool(data["privacy_opt_in"])
+        new_privacy = bool(data["privacy_opt_in"])
+        if new_privacy != user.privacy_opt_in:
+            user.privacy_opt_in = new_privacy
+            bump_data_version(user.id)
+            stats_changed = True
+            privacy_changed = True
     
     # Update username (with restrictions)
     if "username" in data:
@@ -118,6 +139,11 @@ def update_me():
     
     try:
         db.session.commit()
+        if stats_changed:
+            invalidate_user_stats(user.id)
+        if privacy_changed:
+            # Public users appear on the global and domain boards, private ones don't
+            weekly_user_changed(user.id, user.email_domain, user.privacy_opt_in)
         return jsonify(user.to_dict()), 200
     except Exception as e:
         db.session.rollback()
@@ -149,35 +175,12 @@ def get_user_by_username(username):
         print(f"🔓 Not authenticated: {e}")
         requester_id = None
     
-    # Privacy check - same logic as get_target_user in stats.py
-    if requester_id == user.id:
-        print(f"✅ Requester is the user, allowing access")
-        return jsonify(user.to_dict()), 200
+    # Privacy check - shared with the stats and subjects endpoints
+    if not can_view(requester_id, user):
+        print(f"❌ User {user.id} is private and not visible to {requester_id}, denying access")
+        return jsonify({"error": "User not found"}), 404
     
-    if not user.privacy_opt_in:
-        # User is private, check if they're friends
-        print(f"🔒 User is private, checking friendship...")
-        if requester_id:
-            from app.models import Friend
-            is_friend = Friend.query.filter(
-                Friend.status == "accepted",
-                ((Friend.requester_id == requester_id) & (Friend.addressee_id == user.id)) |
-                ((Friend.requester_id == user.id) & (Friend.addressee_id == requester_id))
-            ).first()
-            if is_friend:
-                print(f"✅ Users are friends, allowing access")
-                return jsonify(user.to_dict()), 200
-            else:
-                print(f"❌ Users are not friends, denying access")
-                return jsonify({"error": "User not found"}), 404
-        else:
-            # Not authenticated and user is private
-            print(f"❌ Not authenticated and user is private, denying access")
-            return jsonify({"error": "User not found"}), 404
-    else:
-        # User is public
-        print(f"✅ User is public, allowing access")
-        return jsonify(user.to_dict()), 200
+    return jsonify(user.to_dict()), 200
 
 @users_bp.route("/search", methods=["GET"])
 @jwt_required()
@@ -222,8 +225,8 @@ def get_global_stats():
     """Get global stats: total users and total hours studied (public endpoint)."""
     user_count = User.query.count()
     
-    # Get total minutes studied across all users
-    total_ms = db.session.query(func.sum(FocusSession.duration_ms)).scalar() or 0
+    # Total minutes studied across all users, from the daily totals (they keep archived months)
+    total_ms = db.session.query(func.sum(UserDailyTotal.total_ms)).scalar() or 0
     total_minutes = int(total_ms / 60000)
     total_hours = round(total_minutes / 60, 1)
     
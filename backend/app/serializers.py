@@ -0,0 +1,77 @@
+from sqlalchemy.orm import joinedload, selectinload
+from app.models import FocusSession, Friend
+
+class Serializer:
+    """
+    Turns model instances into response dicts, and declares the relationships
+    dump() reads so list queries load them up front instead of once per row.
+
+    Many-to-one relationships are joined into the same query (joinedload);
+    collections get one extra IN query (selectinload).
+    """
+    model = None
+    relations = ()
+
+    @classmethod
+    def loader_options(cls):
+        options = []
+        for name in cls.relations:
+            attribute = getattr(cls.model, name)
+            strategy = selectinload if attribute.property.uselist else joinedload
+            options.append(strategy(attribute))
+        return options
+
+    @classmethod
+    def query(cls, query):
+        """Add this serializer's eager loads to a query of cls.model."""
+        return query.options(*cls.loader_options())
+
+    @classmethod
+    def dump(cls, obj, **context):
+        return obj.to_dict()
+
+    @classmethod
+    def dump_all(cls, query, **context):
+        """Run the query with eager loads and serialize every row."""
+        return [cls.dump(obj, **context) for obj in cls.query(query)]
+
+class SessionSerializer(Serializer):
+    model = FocusSession
+    relations = ("subject",)
+
+class FriendSerializer(Serializer):
+    """An accepted friendship, from the point of view of viewer_id."""
+    model = Friend
+    relations = ("requester", "addressee")
+
+    @classmethod
+    def dump(cls, friendship, viewer_id=None):
+        friend = friendship.addressee if friendship.requester_id == viewer_id else friendship.requester
+        return {
+            "id": friendship.id,
+            "user": friend.to_dict()
+        }
+
+class IncomingRequestSerializer(Serializer):
+    model = Friend
+    relations = ("requester",)
+
+    @classmethod
+    def dump(cls, request, **context):
+        return {
+            "id": request.id,
+            "requester": request.requester.to_dict(),
+            "created_at": request.created_at
+        }
+
+class OutgoingRequestSerializer(Serializer):
+    model = Friend
+    relations = ("addressee",)
+
+    @classmethod
+    def dump(cls, request, **context):
+        return {
+            "id": request.id,
+            "addressee": request.addressee.to_dict(),
+            "created_at": request.created_at
+        }
@@ -0,0 +1,51 @@
+from datetime import date, datetime, timezone
+from sqlalchemy import Date, Integer, case, cast, func, literal, select
+from app import db
+from app.models import DailyRollup
+
+EPOCH = date(1970, 1, 1)
+
+def day_number(day_column):
+    """SQL expression turning a DATE column into an integer day count (days since epoch)."""
+    if db.engine.dialect.name == "postgresql":
+        return cast(day_column, Date) - literal(EPOCH, Date)
+    # SQLite stores dates as ISO strings; julianday() differences are whole numbers
+    return cast(func.julianday(day_column) - func.julianday(EPOCH.isoformat()), Integer)
+
+def active_days_query(user_id):
+    """Distinct local-day numbers on which the user logged any focus time (read from daily rollups)."""
+    day = day_number(DailyRollup.local_day)
+    return select(day.label("day")).where(
+        DailyRollup.user_id == user_id,
+        DailyRollup.total_ms > 0
+    ).distinct()
+
+def compute_streaks(user_id, end_date=None):
+    """
+    Return (current_streak, longest_streak) for a user in a single query.
+
+    Uses the gaps-and-islands trick: for a sorted run of consecutive days,
+    day - ROW_NUMBER() is constant, so grouping on it yields one row per run.
+    The current streak is the run that ends on end_date (0 if end_date is empty).
+    Pass end_date as the user's local today; it defaults to the UTC date.
+    """
+    if end_date is None:
+        end_date = datetime.now(timezone.utc).date()
+    end_day = (end_date - EPOCH).days
+
+    days = active_days_query(user_id).subquery("days")
+    islands = select(
+        days.c.day,
+        (days.c.day - func.row_number().over(order_by=days.c.day)).label("grp")
+    ).where(days.c.day <= end_day).subquery("islands")
+    runs = select(
+        func.max(islands.c.day).label("last_day"),
+        func.count().label("length")
+    ).group_by(islands.c.grp).subquery("runs")
+
+    row = db.session.execute(select(
+        func.max(runs.c.length).label("longest"),
+        func.max(case((runs.c.last_day == end_day, runs.c.length), else_=0)).label("current")
+    )).one()
+
+    return int(row.current or 0), int(row.longest or 0)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON response encoding on realistic payloads.
+Compares Flask's default provider (with isoformat() per field, as the routes used to do)
+against the app's providers with native datetimes.
+Usage: python bench_json.py [rounds]
+"""
+import sys
+import timeit
+import tracemalloc
+from datetime import date, datetime, timedelta, timezone
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app.json_provider import StdlibJSONProvider, OrjsonProvider
+
+rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+app = Flask("bench")
+now = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+subjects = ["All Subjects", "Math", "Biology", "History", "Chemistry"]
+
+def session_rows(count):
+    rows = []
+    for i in range(count):
+        started_at = now - timedelta(minutes=47 * i)
+        rows.append((i + 1, i % 5 or None, 1500000 + i, started_at, started_at + timedelta(milliseconds=1500000 + i)))
+    return rows
+
+def build_sessions(rows, iso):
+    """Session list (GET /api/sessions, export) - shape of FocusSession.to_dict()."""
+    return [{
+        "id": session_id,
+        "subject_id": subject_id,
+        "subject": subjects[subject_id or 0],
+        "duration_ms": duration_ms,
+        "started_at": started_at.isoformat() if iso else started_at,
+        "ended_at": ended_at.isoformat() if iso else ended_at
+    } for session_id, subject_id, duration_ms, started_at, ended_at in rows]
+
+def build_heatmap(days, iso):
+    """A year of GET /api/stats/heatmap."""
+    start = date(2025, 10, 18)
+    result = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        result.append({"date": day.isoformat() if iso else day, "minutes": (offset * 37) % 240})
+    return result
+
+def build_leaderboard(count, iso):
+    """Leaderboard entries with embedded user dicts."""
+    return [{
+        "rank": i + 1,
+        "minutes": 5000 - i * 3,
+        "user": {
+            "id": i + 1,
+            "username": f"student{i}",
+            "display_name": f"Student Number {i}",
+            "email_domain": "university.edu",
+            "privacy_opt_in": True,
+            "timezone": "America/New_York",
+            "username_changed_at": (now.isoformat() if iso else now) if i % 3 == 0 else None
+        }
+    } for i in range(count)]
+
+rows = session_rows(5000)
+payloads = {
+    "sessions x5000": lambda iso: build_sessions(rows, iso),
+    "heatmap x365": lambda iso: build_heatmap(365, iso),
+    "leaderboard x1000": lambda iso: build_leaderboard(1000, iso),
+}
+
+providers = [("flask default + isoformat", DefaultJSONProvider(app), True),
+             ("stdlib, native datetimes", StdlibJSONProvider(app), False),
+             ("orjson, native datetimes", OrjsonProvider(app), False)]
+
+def encode(provider, build, iso):
+    # Build the payload and produce the response body, as a route would
+    return provider.response(build(iso)).get_data()
+
+def measure(provider, build, iso):
+    seconds = min(timeit.repeat(lambda: encode(provider, build, iso), number=1, repeat=rounds))
+    tracemalloc.start()
+    encode(provider, build, iso)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+with app.app_context():
+    for payload_name, build in payloads.items():
+        print("\n" + "=" * 60)
+        print(payload_name.upper())
+        print("=" * 60)
+        baseline = None
+        for provider_name, provider, iso in providers:
+            seconds, peak = measure(provider, build, iso)
+            baseline = baseline or seconds
+            size = len(encode(provider, build, iso))
+            print(f"{provider_name:28} {seconds * 1000:8.2f} ms  {peak / 1024:8.1f} KiB peak  "
+                  f"{size / 1024:7.1f} KiB body  x{baseline / seconds:.1f}")
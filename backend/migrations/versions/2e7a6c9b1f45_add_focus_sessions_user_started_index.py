@@ -0,0 +1,24 @@
+"""Add (user_id, started_at, id) index on focus_sessions
+
+Revision ID: 2e7a6c9b1f45
+Revises: 9c4f2d81e6a3
+Create Date: 2026-10-17 14:12:48.309514
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e7a6c9b1f45'
+down_revision = '9c4f2d81e6a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_focus_sessions_user_started', 'focus_sessions', ['user_id', 'started_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_focus_sessions_user_started', table_name='focus_sessions')
@@ -0,0 +1,40 @@
+"""Add daily_rollups table
+
+Revision ID: 5b1e9a3c7d20
+Revises: 83241b7d4e16
+Create Date: 2026-10-17 09:12:44.318502
+
+Run `flask rollups backfill` after upgrading to populate rollups for
+existing sessions; new sessions maintain them automatically.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1e9a3c7d20'
+down_revision = '83241b7d4e16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('subject_id', sa.Integer(), nullable=True),
+    sa.Column('local_day', sa.Date(), nullable=False),
+    sa.Column('total_ms', sa.BigInteger(), nullable=False),
+    sa.Column('session_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['subject_id'], ['subjects.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'subject_id', 'local_day', name='unique_daily_rollup')
+    )
+    op.create_index('ix_daily_rollups_user_day', 'daily_rollups', ['user_id', 'local_day'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_daily_rollups_user_day', table_name='daily_rollups')
+    op.drop_table('daily_rollups')
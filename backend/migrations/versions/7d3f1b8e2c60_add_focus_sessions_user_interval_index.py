@@ -0,0 +1,24 @@
+"""Add (user_id, started_at, ended_at) index on focus_sessions for overlap checks
+
+Revision ID: 7d3f1b8e2c60
+Revises: 2e7a6c9b1f45
+Create Date: 2026-10-17 15:03:27.640118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3f1b8e2c60'
+down_revision = '2e7a6c9b1f45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_focus_sessions_user_interval', 'focus_sessions', ['user_id', 'started_at', 'ended_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_focus_sessions_user_interval', table_name='focus_sessions')
@@ -0,0 +1,26 @@
+"""Add users.data_version
+
+Revision ID: 9c4f2d81e6a3
+Revises: 5b1e9a3c7d20
+Create Date: 2026-10-17 11:40:03.772190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4f2d81e6a3'
+down_revision = '5b1e9a3c7d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
@@ -0,0 +1,37 @@
+"""Add frozen_leaderboard_weeks
+
+Revision ID: a2c6e8f04d19
+Revises: f1b8d6a2c493
+Create Date: 2026-10-18 14:22:09.517302
+
+Marks weeks as frozen even when their boards were empty, so `flask leaderboard
+snapshot` doesn't redo them and /history lists them. Existing snapshots are
+marked from their rows.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2c6e8f04d19'
+down_revision = 'f1b8d6a2c493'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('frozen_leaderboard_weeks',
+    sa.Column('week_start', sa.Date(), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('frozen_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('week_start')
+    )
+    op.execute(
+        "INSERT INTO frozen_leaderboard_weeks (week_start, row_count, frozen_at) "
+        "SELECT week_start, COUNT(*), CURRENT_TIMESTAMP FROM leaderboard_snapshots GROUP BY week_start"
+    )
+
+
+def downgrade():
+    op.drop_table('frozen_leaderboard_weeks')
@@ -0,0 +1,42 @@
+"""Add indexes for hot query paths
+
+Revision ID: a41c5e7f9b32
+Revises: 7d3f1b8e2c60
+Create Date: 2026-10-17 15:48:51.205733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41c5e7f9b32'
+down_revision = '7d3f1b8e2c60'
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns). focus_sessions(user_id, started_at) is already
+# covered by ix_focus_sessions_user_started / ix_focus_sessions_user_interval.
+INDEXES = [
+    ('ix_focus_sessions_started', 'focus_sessions', ['started_at']),
+    ('ix_focus_sessions_subject', 'focus_sessions', ['subject_id']),
+    ('ix_friends_addressee_status', 'friends', ['addressee_id', 'status']),
+    ('ix_users_domain_privacy', 'users', ['email_domain', 'privacy_opt_in']),
+    ('ix_subjects_user_name', 'subjects', ['user_id', 'name']),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction; on Postgres this
+    # builds each index without blocking writes. SQLite ignores the flag.
+    # if_not_exists lets a partially applied run be retried (a failed concurrent
+    # build leaves an INVALID index behind, which must be dropped by hand first).
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
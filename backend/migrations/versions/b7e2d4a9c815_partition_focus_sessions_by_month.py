@@ -0,0 +1,128 @@
+"""Optionally partition focus_sessions by month (Postgres)
+
+Revision ID: b7e2d4a9c815
+Revises: a41c5e7f9b32
+Create Date: 2026-10-17 16:35:12.480267
+
+Only runs on Postgres with PARTITION_FOCUS_SESSIONS=1 set when upgrading;
+otherwise (and always on SQLite) focus_sessions stays a plain table.
+Afterwards run `flask partitions create` regularly to add future months.
+
+"""
+import os
+from datetime import date, datetime, timezone
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2d4a9c815'
+down_revision = 'a41c5e7f9b32'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+# Indexes on focus_sessions as of the previous revisions; recreated on the new parent table
+INDEXES = [
+    ('ix_focus_sessions_user_started', ['user_id', 'started_at', 'id']),
+    ('ix_focus_sessions_user_interval', ['user_id', 'started_at', 'ended_at']),
+    ('ix_focus_sessions_started', ['started_at']),
+    ('ix_focus_sessions_subject', ['subject_id']),
+]
+
+COLUMNS = "id, user_id, subject_id, started_at, ended_at, duration_ms"
+
+
+def _enabled():
+    bind = op.get_bind()
+    return bind.dialect.name == 'postgresql' and os.getenv('PARTITION_FOCUS_SESSIONS') == '1'
+
+
+def _is_partitioned():
+    return bool(op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('focus_sessions')"
+    )).scalar())
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _drop_indexes(table):
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def _create_indexes():
+    for name, columns in INDEXES:
+        op.create_index(name, 'focus_sessions', columns, unique=False)
+
+
+def upgrade():
+    if not _enabled() or _is_partitioned():
+        return
+
+    bind = op.get_bind()
+    op.rename_table('focus_sessions', 'focus_sessions_unpartitioned')
+    # Index names (including the primary key's) are schema-wide, so free them for the new table
+    op.execute("ALTER TABLE focus_sessions_unpartitioned RENAME CONSTRAINT focus_sessions_pkey TO focus_sessions_unpartitioned_pkey")
+    _drop_indexes('focus_sessions_unpartitioned')
+
+    # The partition key must be part of the primary key
+    op.execute("""
+        CREATE TABLE focus_sessions (
+            id INTEGER NOT NULL DEFAULT nextval('focus_sessions_id_seq'),
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            subject_id INTEGER REFERENCES subjects (id),
+            started_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            ended_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            duration_ms INTEGER NOT NULL,
+            PRIMARY KEY (id, started_at)
+        ) PARTITION BY RANGE (started_at)
+    """)
+    # Keep the id sequence alive when the old table is dropped
+    op.execute("ALTER SEQUENCE focus_sessions_id_seq OWNED BY focus_sessions.id")
+
+    # One partition per month from the oldest session through MONTHS_AHEAD, plus a
+    # default partition so an insert outside the created range never fails
+    oldest = bind.execute(sa.text("SELECT MIN(started_at) FROM focus_sessions_unpartitioned")).scalar()
+    today = datetime.now(timezone.utc).date()
+    month = date((oldest or today).year, (oldest or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE focus_sessions_y{month.year:04d}m{month.month:02d} PARTITION OF focus_sessions "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{_add_months(month, 1).isoformat()} 00:00:00+00')"
+        )
+        month = _add_months(month, 1)
+    op.execute("CREATE TABLE focus_sessions_default PARTITION OF focus_sessions DEFAULT")
+
+    op.execute(f"INSERT INTO focus_sessions ({COLUMNS}) SELECT {COLUMNS} FROM focus_sessions_unpartitioned")
+    op.drop_table('focus_sessions_unpartitioned')
+    _create_indexes()
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql' or not _is_partitioned():
+        return
+
+    # Note: partitions already moved to the archive schema are not copied back
+    op.rename_table('focus_sessions', 'focus_sessions_partitioned')
+    op.execute("ALTER TABLE focus_sessions_partitioned RENAME CONSTRAINT focus_sessions_pkey TO focus_sessions_partitioned_pkey")
+    _drop_indexes('focus_sessions_partitioned')
+    op.execute("""
+        CREATE TABLE focus_sessions (
+            id INTEGER NOT NULL DEFAULT nextval('focus_sessions_id_seq') PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            subject_id INTEGER REFERENCES subjects (id),
+            started_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            ended_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            duration_ms INTEGER NOT NULL
+        )
+    """)
+    op.execute("ALTER SEQUENCE focus_sessions_id_seq OWNED BY focus_sessions.id")
+    op.execute(f"INSERT INTO focus_sessions ({COLUMNS}) SELECT {COLUMNS} FROM focus_sessions_partitioned")
+    op.drop_table('focus_sessions_partitioned')
+    _create_indexes()
@@ -0,0 +1,42 @@
+"""Copy display names into leaderboard_snapshots
+
+Revision ID: b8d3f5a17e62
+Revises: a2c6e8f04d19
+Create Date: 2026-10-18 15:40:33.208145
+
+Frozen boards showed each user's current name. Names are now copied when a week
+is frozen; existing rows get the names users have at upgrade time.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d3f5a17e62'
+down_revision = 'a2c6e8f04d19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('leaderboard_snapshots', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('username', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('display_name', sa.String(length=80), nullable=True))
+        batch_op.add_column(sa.Column('email_domain', sa.String(length=255), nullable=True))
+    op.execute(
+        "UPDATE leaderboard_snapshots SET "
+        "username = (SELECT username FROM users WHERE users.id = leaderboard_snapshots.user_id), "
+        "display_name = (SELECT display_name FROM users WHERE users.id = leaderboard_snapshots.user_id), "
+        "email_domain = (SELECT email_domain FROM users WHERE users.id = leaderboard_snapshots.user_id)"
+    )
+    with op.batch_alter_table('leaderboard_snapshots', schema=None) as batch_op:
+        batch_op.alter_column('username', existing_type=sa.String(length=32), nullable=False)
+        batch_op.alter_column('email_domain', existing_type=sa.String(length=255), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('leaderboard_snapshots', schema=None) as batch_op:
+        batch_op.drop_column('email_domain')
+        batch_op.drop_column('display_name')
+        batch_op.drop_column('username')
@@ -0,0 +1,36 @@
+"""Add user_daily_totals table
+
+Revision ID: c3f8a1d5e7b2
+Revises: b7e2d4a9c815
+Create Date: 2026-10-17 20:41:09.275613
+
+Run `flask rollups backfill` after upgrading to populate daily totals for
+existing sessions; new sessions maintain them automatically.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f8a1d5e7b2'
+down_revision = 'b7e2d4a9c815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_daily_totals',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('total_ms', sa.BigInteger(), nullable=False),
+    sa.Column('cumulative_ms', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'day', name='unique_user_daily_total')
+    )
+
+
+def downgrade():
+    op.drop_table('user_daily_totals')
@@ -0,0 +1,24 @@
+"""Add day index on user_daily_totals for whole-board builds
+
+Revision ID: d94b6e2a0c17
+Revises: c3f8a1d5e7b2
+Create Date: 2026-10-17 21:58:30.614927
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd94b6e2a0c17'
+down_revision = 'c3f8a1d5e7b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_user_daily_totals_day_user', 'user_daily_totals', ['day', 'user_id', 'total_ms'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_user_daily_totals_day_user', table_name='user_daily_totals')
@@ -0,0 +1,42 @@
+"""Add leaderboard_snapshots table
+
+Revision ID: e5a7c3f91b48
+Revises: d94b6e2a0c17
+Create Date: 2026-10-17 23:12:51.840366
+
+Run `flask leaderboard snapshot --weeks N` after upgrading to freeze past weeks;
+afterwards schedule `flask leaderboard snapshot` to run after each week ends.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c3f91b48'
+down_revision = 'd94b6e2a0c17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('leaderboard_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('week_start', sa.Date(), nullable=False),
+    sa.Column('board', sa.String(length=16), nullable=False),
+    sa.Column('board_key', sa.String(length=255), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total_ms', sa.BigInteger(), nullable=False),
+    sa.Column('tier', sa.String(length=20), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('week_start', 'board', 'board_key', 'position', name='unique_snapshot_position')
+    )
+    op.create_index('ix_leaderboard_snapshots_user', 'leaderboard_snapshots', ['week_start', 'board', 'board_key', 'user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_leaderboard_snapshots_user', table_name='leaderboard_snapshots')
+    op.drop_table('leaderboard_snapshots')
@@ -0,0 +1,52 @@
+"""Key daily_rollups on a non-null subject_key so upserts can target it
+
+Revision ID: f1b8d6a2c493
+Revises: e5a7c3f91b48
+Create Date: 2026-10-18 10:05:17.392846
+
+unique_daily_rollup on (user_id, subject_id, local_day) let concurrent writes
+create duplicate "All Subjects" rows, since nulls never conflict. Rollups now
+key on subject_key (subject_id, or 0 for null); existing duplicates are merged.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b8d6a2c493'
+down_revision = 'e5a7c3f91b48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('daily_rollups', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('subject_key', sa.Integer(), server_default='0', nullable=False))
+    op.execute("UPDATE daily_rollups SET subject_key = COALESCE(subject_id, 0)")
+
+    # Fold duplicate rows into the oldest one before the new constraint goes on
+    bind = op.get_bind()
+    duplicates = bind.execute(sa.text(
+        "SELECT MIN(id), user_id, subject_key, local_day, SUM(total_ms), SUM(session_count) "
+        "FROM daily_rollups GROUP BY user_id, subject_key, local_day HAVING COUNT(*) > 1"
+    )).all()
+    for keep_id, user_id, subject_key, local_day, total_ms, session_count in duplicates:
+        bind.execute(sa.text(
+            "DELETE FROM daily_rollups WHERE user_id = :user_id AND subject_key = :subject_key "
+            "AND local_day = :local_day AND id <> :keep_id"
+        ), {"user_id": user_id, "subject_key": subject_key, "local_day": local_day, "keep_id": keep_id})
+        bind.execute(sa.text(
+            "UPDATE daily_rollups SET total_ms = :total_ms, session_count = :session_count WHERE id = :keep_id"
+        ), {"total_ms": total_ms, "session_count": session_count, "keep_id": keep_id})
+
+    with op.batch_alter_table('daily_rollups', schema=None) as batch_op:
+        batch_op.drop_constraint('unique_daily_rollup', type_='unique')
+        batch_op.create_unique_constraint('unique_daily_rollup', ['user_id', 'subject_key', 'local_day'])
+
+
+def downgrade():
+    with op.batch_alter_table('daily_rollups', schema=None) as batch_op:
+        batch_op.drop_constraint('unique_daily_rollup', type_='unique')
+        batch_op.create_unique_constraint('unique_daily_rollup', ['user_id', 'subject_id', 'local_day'])
+        batch_op.drop_column('subject_key')
@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app, db
+from app.config import Config
+from app.models import User
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    STATS_CACHE_URL = "memory://"
+    PRESENCE_URL = "memory://"
+    LEADERBOARD_URL = "memory://"
+
+@pytest.fixture
+def app():
+    """App on a fresh in-memory SQLite database; models create every index the migrations do."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def make_user(app):
+    def make(username, domain="example.edu", **fields):
+        user = User(email=f"{username}@{domain}", email_domain=domain, username=username, **fields)
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make
+
+def auth(user):
+    return {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+def log_session(client, user, started_at, minutes, **fields):
+    """POST one session for user and return the response."""
+    return client.post("/api/sessions", headers=auth(user), json={
+        "duration_ms": minutes * 60000,
+        "started_at": started_at.isoformat(),
+        "ended_at": (started_at + timedelta(minutes=minutes)).isoformat(),
+        **fields,
+    })
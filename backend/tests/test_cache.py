@@ -0,0 +1,59 @@
+import fakeredis
+import pytest
+
+from app.cache import MemoryCache, RedisCache
+from app.redis_client import get_redis
+
+@pytest.fixture
+def client():
+    return fakeredis.FakeRedis()
+
+def test_get_redis_ignores_non_redis_urls():
+    assert get_redis("memory://") is None
+    assert get_redis("") is None
+
+def test_redis_cache_round_trip(client):
+    cache = RedisCache(client, ttl=60)
+    assert cache.get(1, "etag") is None
+    cache.set(1, "etag", b'{"a": 1}')
+    assert cache.get(1, "etag") == b'{"a": 1}'
+    assert client.ttl("stats:1:etag") == 60
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_redis_cache_invalidates_one_user(client):
+    cache = RedisCache(client)
+    cache.set(1, "a", b"1")
+    cache.set(1, "b", b"2")
+    cache.set(2, "a", b"3")
+    cache.invalidate_user(1)
+    assert cache.get(1, "a") is None
+    assert cache.get(1, "b") is None
+    assert cache.get(2, "a") == b"3"
+
+def test_redis_cache_clear_keeps_other_prefixes(client):
+    cache = RedisCache(client)
+    client.set("presence:active", "x")
+    cache.set(1, "a", b"1")
+    cache.clear()
+    assert cache.get(1, "a") is None
+    assert client.get("presence:active") == b"x"
+
+def test_redis_cache_errors_are_misses():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    cache = RedisCache(fakeredis.FakeRedis(server=server))
+    cache.set(1, "a", b"1")
+    assert cache.get(1, "a") is None
+    cache.invalidate_user(1)
+    assert cache.stats()["errors"] == 3
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set(1, "a", b"1")
+    cache.set(1, "b", b"2")
+    cache.get(1, "a")
+    cache.set(2, "c", b"3")
+    assert cache.get(1, "b") is None
+    assert cache.get(1, "a") == b"1"
+    assert cache.stats()["evictions"] == 1
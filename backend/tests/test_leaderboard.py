@@ -0,0 +1,109 @@
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+
+from app import db
+from app.leaderboard_store import BoardUnavailable, current_week_start
+from app.models import UserDailyTotal
+from app.rollups import add_daily_total, rebuild_daily_totals
+from conftest import auth, log_session
+
+def running_totals(user):
+    rows = UserDailyTotal.query.filter_by(user_id=user.id).order_by(UserDailyTotal.day).all()
+    return [(row.day, row.total_ms, row.cumulative_ms) for row in rows]
+
+def test_earlier_days_shift_every_later_running_total(app, make_user):
+    user = make_user("alice")
+    for day, total_ms in ((date(2025, 1, 3), 30), (date(2025, 1, 5), 20), (date(2025, 1, 1), 100), (date(2025, 1, 4), 5),
+                          (date(2025, 1, 3), 1)):
+        add_daily_total(user.id, day, total_ms)
+    db.session.commit()
+    expected = [
+        (date(2025, 1, 1), 100, 100),
+        (date(2025, 1, 3), 31, 131),
+        (date(2025, 1, 4), 5, 136),
+        (date(2025, 1, 5), 20, 156),
+    ]
+    assert running_totals(user) == expected
+
+def test_backdated_sessions_keep_running_totals_consistent(client, make_user):
+    user = make_user("alice")
+    for day in (6, 8, 2, 7):
+        log_session(client, user, datetime(2025, 1, day, 12, tzinfo=timezone.utc), 30)
+    incremental = running_totals(user)
+    assert [cumulative for _, _, cumulative in incremental] == [30 * 60000 * n for n in range(1, 5)]
+
+    rebuild_daily_totals(user.id)
+    db.session.commit()
+    assert running_totals(user) == incremental
+
+@pytest.fixture
+def window_users(client, make_user):
+    """alice: 60 min today and 2h ten days ago; bob: 90 min three days ago."""
+    today = datetime.combine(datetime.now(timezone.utc).date(), time(0), tzinfo=timezone.utc)
+    alice = make_user("alice")
+    bob = make_user("bob")
+    log_session(client, alice, today, 60)
+    log_session(client, alice, today - timedelta(days=10), 120)
+    log_session(client, bob, today - timedelta(days=3), 90)
+    return alice, bob
+
+@pytest.mark.parametrize("days, expected", [
+    ("1", [("alice", 60)]),
+    ("7", [("bob", 90), ("alice", 60)]),
+    ("30", [("alice", 180), ("bob", 90)]),
+    ("all", [("alice", 180), ("bob", 90)]),
+])
+def test_rolling_windows(client, window_users, days, expected):
+    response = client.get(f"/api/leaderboard/global?days={days}")
+    assert response.status_code == 200
+    assert [(row["username"], row["minutes"]) for row in response.get_json()] == expected
+
+def test_rolling_window_per_week_figures(client, window_users):
+    rows = client.get("/api/leaderboard/global?days=14").get_json()
+    assert rows[0]["hoursPerWeek"] == 1.5  # 3h over two weeks
+    assert client.get("/api/leaderboard/global?days=all").get_json()[0]["hoursPerWeek"] is None
+
+@pytest.mark.parametrize("days", ["0", "367", "week"])
+def test_bad_windows(client, days):
+    assert client.get(f"/api/leaderboard/global?days={days}").status_code == 400
+
+class DownBoards:
+    """Board store that is always unavailable, so routes take the SQL fallback."""
+    def __getattr__(self, name):
+        def unavailable(*args, **kwargs):
+            raise BoardUnavailable()
+        return unavailable
+
+@pytest.fixture
+def week_users(client, make_user):
+    """alice 2h and bob 1h this week; idle is public with no time, hidden is private."""
+    week_start = datetime.combine(current_week_start(), time(0), tzinfo=timezone.utc)
+    alice = make_user("alice")
+    bob = make_user("bob")
+    idle = make_user("idle")
+    hidden = make_user("hidden", privacy_opt_in=False)
+    log_session(client, alice, week_start, 120)
+    log_session(client, bob, week_start + timedelta(hours=3), 60)
+    log_session(client, hidden, week_start, 30)
+    return alice, bob, idle
+
+@pytest.fixture(params=["store", "fallback", "window"])
+def board_path(request, app):
+    """How the week's board is served: the board store, the SQL fallback, or a ?days window."""
+    if request.param == "fallback":
+        app.extensions["leaderboards"] = DownBoards()
+    return "?days=7" if request.param == "window" else "?limit=10"
+
+@pytest.mark.parametrize("board", ["global", "domain"])
+def test_boards_list_public_users_with_time(client, week_users, board_path, board):
+    alice, _, idle = week_users
+    rows = client.get(f"/api/leaderboard/{board}{board_path}", headers=auth(alice)).get_json()
+    assert [(row["username"], row["rank"]) for row in rows] == [("alice", 1), ("bob", 2)]
+
+    # A caller who is not on the board has no neighbourhood
+    around = client.get(f"/api/leaderboard/{board}{board_path}&around=me", headers=auth(idle))
+    assert around.status_code == 200
+    assert around.get_json() == []
+    around = client.get(f"/api/leaderboard/{board}{board_path}&around=me&radius=1", headers=auth(alice)).get_json()
+    assert [row["username"] for row in around] == ["alice", "bob"]
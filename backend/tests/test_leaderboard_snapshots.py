@@ -0,0 +1,85 @@
+from datetime import datetime, time, timedelta, timezone
+
+import pytest
+
+from app import db
+from app.leaderboard_snapshots import finished_weeks, is_snapshotted, snapshot_week
+from app.leaderboard_store import current_week_start
+from app.models import Friend, LeaderboardSnapshot
+from conftest import auth, log_session
+
+@pytest.fixture
+def frozen_week(client, make_user):
+    """Last week frozen with alice 3h, bob 1h (alice's friend), a private user 2h and a public user with no time."""
+    week = finished_weeks(1)[0]
+    monday = datetime.combine(week + timedelta(days=1), time(9), tzinfo=timezone.utc)
+    alice = make_user("alice")
+    bob = make_user("bob")
+    hidden = make_user("hidden", privacy_opt_in=False)
+    make_user("idle", domain="other.edu")
+    db.session.add(Friend(requester_id=alice.id, addressee_id=bob.id, status="accepted"))
+    db.session.commit()
+    for user, minutes in ((alice, 180), (bob, 60), (hidden, 120)):
+        assert log_session(client, user, monday, minutes).status_code == 201
+
+    assert snapshot_week(week) > 0
+    db.session.commit()
+    return week, alice, bob
+
+def test_finished_weeks_end_before_the_current_week():
+    weeks = finished_weeks(3)
+    assert weeks[-1] == current_week_start() - timedelta(days=7)
+    assert [later - earlier for earlier, later in zip(weeks, weeks[1:])] == [timedelta(days=7)] * 2
+
+def test_snapshot_week_freezes_each_board_once(app, frozen_week):
+    week, alice, bob = frozen_week
+    assert is_snapshotted(week)
+    assert snapshot_week(week) is None
+
+    rows = LeaderboardSnapshot.query.filter_by(week_start=week).all()
+    boards = {(row.board, row.board_key) for row in rows}
+    assert boards == {("global", ""), ("domain", "example.edu"), ("friends", str(alice.id)), ("friends", str(bob.id))}
+    global_rows = sorted((row.position, row.username, row.rank) for row in rows if row.board == "global")
+    assert global_rows == [(1, "alice", 1), (2, "bob", 2)]
+
+def test_history_lists_frozen_weeks(client, frozen_week):
+    week = frozen_week[0]
+    response = client.get("/api/leaderboard/history")
+    assert response.get_json() == [week.isoformat()]
+
+def test_frozen_page_reads_back_with_tiers(client, frozen_week):
+    week = frozen_week[0]
+    response = client.get(f"/api/leaderboard/history/{week.isoformat()}/global")
+    assert response.status_code == 200
+    entries = response.get_json()
+    assert [(e["username"], e["rank"], e["hours"], e["tier"]) for e in entries] == [
+        ("alice", 1, 3.0, "Baus"),
+        ("bob", 2, 1.0, "Baus"),
+    ]
+    assert response.headers["Cache-Control"] == "public, no-cache"
+    revalidated = client.get(f"/api/leaderboard/history/{week.isoformat()}/global",
+                             headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+def test_users_who_go_private_are_anonymized_but_keep_their_rank(client, frozen_week):
+    week, alice, bob = frozen_week
+    before = client.get(f"/api/leaderboard/history/{week.isoformat()}/global")
+    bob.privacy_opt_in = False
+    db.session.commit()
+
+    response = client.get(f"/api/leaderboard/history/{week.isoformat()}/global",
+                          headers={"If-None-Match": before.headers["ETag"]})
+    assert response.status_code == 200
+    entries = response.get_json()
+    assert entries[0]["username"] == "alice"
+    assert entries[1] == {**entries[1], "name": "Private user", "username": None, "email_domain": None,
+                          "rank": 2, "hours": 1.0}
+
+    # Friends still see them by name on private pages
+    friends = client.get(f"/api/leaderboard/history/{week.isoformat()}/friends", headers=auth(alice)).get_json()
+    assert [e["username"] for e in friends] == ["alice", "bob"]
+
+def test_unknown_or_misaligned_weeks(client, frozen_week):
+    week = frozen_week[0]
+    assert client.get(f"/api/leaderboard/history/{(week - timedelta(days=7)).isoformat()}/global").status_code == 404
+    assert client.get(f"/api/leaderboard/history/{(week + timedelta(days=1)).isoformat()}/global").status_code == 400
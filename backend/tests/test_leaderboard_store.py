@@ -0,0 +1,139 @@
+import fakeredis
+import pytest
+
+from app.leaderboard_store import DOMAINS, GLOBAL, BoardUnavailable, MemoryBoards, RedisBoards
+
+PERIOD = "week:2025-01-05"
+
+@pytest.fixture
+def client():
+    return fakeredis.FakeRedis()
+
+@pytest.fixture(params=["memory", "redis"])
+def boards(request):
+    if request.param == "memory":
+        return MemoryBoards()
+    return RedisBoards(fakeredis.FakeRedis())
+
+def test_replace_then_read(boards):
+    assert not boards.exists(PERIOD, GLOBAL)
+    assert boards.replace(PERIOD, GLOBAL, [(1, 300), (2, 500), (3, 300)]) == 3
+    assert boards.exists(PERIOD, GLOBAL)
+    assert boards.top(PERIOD, GLOBAL, 1) == [(2, 500)]
+    # Ties share a rank; their order within the tie is up to the backend
+    assert sorted(boards.top(PERIOD, GLOBAL, 2, offset=1)) == [(1, 300), (3, 300)]
+    assert boards.rank(PERIOD, GLOBAL, 3) == (2, 300)
+    assert boards.rank(PERIOD, GLOBAL, 1) == (2, 300)
+    assert boards.rank(PERIOD, GLOBAL, 4) is None
+    assert boards.rank_of(PERIOD, GLOBAL, 300) == 2
+    assert boards.position(PERIOD, GLOBAL, 2) == 0
+    assert boards.size(PERIOD, GLOBAL) == 3
+
+def test_writes_apply_to_built_boards_only(boards):
+    assert boards.add(PERIOD, GLOBAL, 1, 100) is None
+    boards.replace(PERIOD, GLOBAL, [(1, 100)])
+    assert boards.add(PERIOD, GLOBAL, 1, 50) == 150
+    assert boards.add(PERIOD, GLOBAL, 2, 10) == 10
+    boards.set(PERIOD, GLOBAL, 2, 0)
+    assert boards.top(PERIOD, GLOBAL, 10) == [(1, 150)]
+    boards.discard(PERIOD, GLOBAL)
+    assert not boards.exists(PERIOD, GLOBAL)
+
+def test_empty_build_marks_board_built(boards):
+    assert boards.replace(PERIOD, GLOBAL, []) == 0
+    assert boards.exists(PERIOD, GLOBAL)
+    assert boards.top(PERIOD, GLOBAL, 10) == []
+
+def test_increments_during_a_build_are_replayed(client):
+    boards = RedisBoards(client)
+
+    def entries():
+        yield 1, 100
+        # Another worker commits sessions while this one is still loading the board
+        assert boards.add(PERIOD, GLOBAL, 1, 20) is None
+        assert boards.add(PERIOD, GLOBAL, 2, 5) is None
+        yield 3, 50
+
+    assert boards.replace(PERIOD, GLOBAL, entries(), chunk_size=1) == 3
+    assert boards.top(PERIOD, GLOBAL, 10) == [(1, 120), (3, 50), (2, 5)]
+    assert not client.exists(f"leaderboard:{PERIOD}:global:pending")
+    assert not client.exists(f"leaderboard:{PERIOD}:global:lock")
+
+def test_one_build_at_a_time(client):
+    boards = RedisBoards(client)
+    other = RedisBoards(client)
+    consumed = []
+
+    def other_entries():
+        consumed.append(True)
+        yield 9, 1
+
+    def entries():
+        yield 1, 100
+        assert other.replace(PERIOD, GLOBAL, other_entries()) is None
+        yield 2, 50
+
+    assert boards.replace(PERIOD, GLOBAL, entries()) == 2
+    assert consumed == []
+    assert boards.top(PERIOD, GLOBAL, 10) == [(1, 100), (2, 50)]
+
+def test_builds_stage_into_their_own_keys(client):
+    boards = RedisBoards(client)
+    staging = []
+
+    def entries():
+        yield 1, 100
+        staging.extend(key.decode() for key in client.scan_iter(match="*:staging:*"))
+        yield 2, 50
+
+    boards.replace(PERIOD, GLOBAL, entries(), chunk_size=1)
+    assert len(staging) == 1
+    assert staging[0].startswith(f"leaderboard:{PERIOD}:global:staging:")
+    assert list(client.scan_iter(match="*:staging:*")) == []
+
+def test_set_during_a_build_makes_it_stale(client):
+    boards = RedisBoards(client)
+
+    def entries():
+        yield 1, 100
+        boards.set(PERIOD, GLOBAL, 1, 0)  # e.g. the user went private mid-build
+        yield 2, 50
+
+    assert boards.replace(PERIOD, GLOBAL, entries()) is None
+    assert not boards.exists(PERIOD, GLOBAL)
+    assert boards.replace(PERIOD, GLOBAL, [(2, 50)]) == 1
+
+def test_failed_build_releases_the_lock(client):
+    boards = RedisBoards(client)
+
+    def entries():
+        yield 1, 100
+        raise RuntimeError("database went away")
+
+    with pytest.raises(RuntimeError):
+        boards.replace(PERIOD, GLOBAL, entries(), chunk_size=1)
+    assert list(client.scan_iter(match="leaderboard:*")) == []
+    assert boards.replace(PERIOD, GLOBAL, [(1, 100)]) == 1
+
+def test_redis_errors_raise_board_unavailable():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    boards = RedisBoards(fakeredis.FakeRedis(server=server))
+    with pytest.raises(BoardUnavailable):
+        boards.exists(PERIOD, GLOBAL)
+    with pytest.raises(BoardUnavailable):
+        boards.top(PERIOD, GLOBAL, 10)
+    with pytest.raises(BoardUnavailable):
+        boards.replace(PERIOD, GLOBAL, [(1, 100)])
+    # Writes happen after the session is committed and never fail the request
+    assert boards.add(PERIOD, GLOBAL, 1, 100) is None
+    boards.discard(PERIOD, GLOBAL)
+
+def test_ties_on_boards_keyed_by_name(boards):
+    # The domains board ranks email domains, so members are strings
+    boards.replace(PERIOD, DOMAINS, [("a.edu", 300), ("b.edu", 500), ("c.edu", 300), ("d.edu", 100)])
+    assert boards.rank(PERIOD, DOMAINS, "c.edu") == (2, 300)
+    assert boards.rank(PERIOD, DOMAINS, "a.edu") == (2, 300)
+    assert boards.rank_of(PERIOD, DOMAINS, 300) == 2
+    assert boards.rank_of(PERIOD, DOMAINS, 100) == 4
+    assert sorted(boards.position(PERIOD, DOMAINS, domain) for domain in ("a.edu", "c.edu")) == [1, 2]
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import db
+from app.models import FocusSession
+from app.overlaps import MAX_SESSION_SPAN, existing_intervals, find_overlap, overlapping_interval
+from conftest import log_session
+
+NINE = datetime(2025, 1, 6, 9, tzinfo=timezone.utc)
+
+def add_session(user, started_at, minutes):
+    session = FocusSession(user_id=user.id, started_at=started_at, ended_at=started_at + timedelta(minutes=minutes),
+                           duration_ms=minutes * 60000)
+    db.session.add(session)
+    db.session.commit()
+    return session.id
+
+def probe(user, started_at, minutes):
+    """find_overlap and overlapping_interval for the same interval; they must agree on whether it overlaps."""
+    ended_at = started_at + timedelta(minutes=minutes)
+    found = find_overlap(user.id, started_at, ended_at)
+    walked = overlapping_interval(existing_intervals(user.id, started_at, ended_at), started_at, ended_at)
+    assert (found is None) == (walked is None)
+    return found and found.id, walked
+
+@pytest.mark.parametrize("offset, minutes, status", [
+    (-60, 60, 201),   # ends as the stored session starts
+    (60, 60, 201),    # starts as it ends
+    (-60, 61, 409),
+    (59, 30, 409),
+    (10, 20, 409),    # inside it
+    (-10, 80, 409),   # around it
+])
+def test_create_session_overlap_boundaries(client, make_user, offset, minutes, status):
+    user = make_user("alice")
+    stored = log_session(client, user, NINE, 60).get_json()["session"]
+    response = log_session(client, user, NINE + timedelta(minutes=offset), minutes)
+    assert response.status_code == status
+    if status == 409:
+        assert response.get_json()["conflict"]["id"] == stored["id"]
+
+def test_look_back_reaches_a_full_length_session(app, make_user):
+    user = make_user("alice")
+    longest = add_session(user, NINE - MAX_SESSION_SPAN, 600)
+    assert probe(user, NINE - timedelta(minutes=1), 5) == (longest, longest)
+    # Touching its end is fine; nothing can start earlier and still reach NINE
+    assert probe(user, NINE, 5) == (None, None)
+
+def test_stored_overlaps_do_not_hide_each_other(app, make_user):
+    # Legacy data can already overlap: a short session starting inside a long one
+    user = make_user("alice")
+    long_id = add_session(user, NINE, 8 * 60)
+    add_session(user, NINE + timedelta(hours=1), 30)
+    found, walked = probe(user, NINE + timedelta(hours=5), 10)
+    assert found == long_id
+    assert walked == long_id
+
+def test_other_users_sessions_never_conflict(client, make_user):
+    alice = make_user("alice")
+    bob = make_user("bob")
+    assert log_session(client, alice, NINE, 60).status_code == 201
+    assert log_session(client, bob, NINE, 60).status_code == 201
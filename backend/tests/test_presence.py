@@ -0,0 +1,91 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import fakeredis
+import pytest
+
+from app import db
+from app.models import FocusSession, utc_now
+from app.overlaps import MAX_SESSION_SPAN
+from app.presence import MemoryPresence, PresenceError, RedisPresence, get_presence, new_entry
+from conftest import auth
+
+@pytest.fixture(params=["memory", "redis"])
+def presence(request):
+    if request.param == "memory":
+        return MemoryPresence(ttl=90)
+    return RedisPresence(fakeredis.FakeRedis(), ttl=90)
+
+def entry(subject_id=None, subject="Math"):
+    return new_entry(subject_id, subject, datetime(2025, 1, 6, 9, tzinfo=timezone.utc))
+
+def test_start_get_stop(presence):
+    presence.start(1, entry(7))
+    assert presence.get(1)["subject_id"] == 7
+    assert presence.count() == 1
+    stopped = presence.stop(1)
+    assert stopped["subject"] == "Math"
+    assert presence.get(1) is None
+    assert presence.stop(1) is None
+    assert presence.count() == 0
+
+def test_heartbeat_refreshes_last_seen(presence):
+    started = entry()
+    started["last_seen"] -= 60
+    presence.start(1, started)
+    refreshed = presence.heartbeat(1)
+    assert refreshed["last_seen"] > started["last_seen"]
+    assert presence.get(1)["last_seen"] == refreshed["last_seen"]
+
+def test_heartbeat_does_not_resurrect_a_stopped_session(presence):
+    presence.start(1, entry())
+    presence.stop(1)
+    assert presence.heartbeat(1) is None
+    assert presence.get(1) is None
+
+def test_active_returns_only_live_users(presence):
+    presence.start(1, entry(1))
+    presence.start(3, entry(3))
+    assert sorted(presence.active([1, 2, 3])) == [1, 3]
+    assert presence.active([]) == {}
+
+def test_count_drops_expired_sessions():
+    client = fakeredis.FakeRedis()
+    presence = RedisPresence(client, ttl=90)
+    stale = entry()
+    stale["last_seen"] = time.time() - 120
+    presence.start(1, stale)
+    presence.start(2, entry())
+    assert presence.count() == 1
+    assert client.zrange("presence:active", 0, -1) == [b"2"]
+
+def test_redis_errors_raise_presence_error():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    presence = RedisPresence(fakeredis.FakeRedis(server=server))
+    with pytest.raises(PresenceError):
+        presence.get(1)
+    with pytest.raises(PresenceError):
+        presence.count()
+
+def test_stop_saves_the_live_session(client, make_user):
+    user = make_user("alice")
+    get_presence().start(user.id, new_entry(None, None, utc_now() - timedelta(minutes=25)))
+    response = client.post("/api/presence/stop", headers=auth(user))
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body["capped"] is False
+    assert 25 * 60000 <= body["session"]["duration_ms"] < 26 * 60000
+    assert get_presence().get(user.id) is None
+
+def test_stop_caps_sessions_that_ran_past_the_limit(client, make_user):
+    user = make_user("alice")
+    started_at = utc_now().replace(microsecond=0) - MAX_SESSION_SPAN - timedelta(hours=2)
+    get_presence().start(user.id, new_entry(None, None, started_at))
+    response = client.post("/api/presence/stop", headers=auth(user))
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body["capped"] is True
+    assert body["session"]["duration_ms"] == MAX_SESSION_SPAN.total_seconds() * 1000
+    stored = db.session.get(FocusSession, body["session"]["id"])
+    assert stored.ended_at.replace(tzinfo=timezone.utc) == started_at + MAX_SESSION_SPAN
@@ -0,0 +1,106 @@
+import re
+from contextlib import contextmanager
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import Friend, utc_now
+from conftest import auth, log_session
+
+# Read paths whose queries must be answered from indexes. Routes that are full scans
+# by design (user search with ILIKE '%q%', /api/users/count, /api/users/stats) are not listed.
+ROUTE_CHECKS = [
+    "/api/sessions?limit=50",
+    "/api/sessions?start_date={week_ago}&end_date={today}",
+    "/api/stats/summary",
+    "/api/stats/by-subject",
+    "/api/stats/daily",
+    "/api/stats/weekly",
+    "/api/stats/heatmap",
+    "/api/stats/dashboard",
+    "/api/stats/summary?username={other}",
+    "/api/subjects",
+    "/api/friends",
+    "/api/friends/requests/incoming",
+    "/api/friends/requests/outgoing",
+    "/api/users/{other}",
+    "/api/leaderboard/global",
+    "/api/leaderboard/rank",
+    "/api/leaderboard/domain",
+    "/api/leaderboard/friends",
+    "/api/leaderboard/domains",
+]
+
+# Tables a route may scan in full on purpose, e.g. {"/api/some/route": {"users"}}
+ALLOWED_SCANS = {}
+
+@contextmanager
+def capture_statements():
+    """Collect (sql, params) for every SELECT executed while the block runs."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+def full_scans(statement, parameters):
+    """Real tables the plan reads in full (subquery/CTE scans are fine)."""
+    rows = db.session.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    found = set()
+    for row in rows:
+        # "SCAN focus_sessions" or "SCAN focus_sessions USING [COVERING] INDEX ..." - both read every row
+        match = re.match(r"SCAN (\w+)", row[-1].strip())
+        if match and match.group(1) in db.metadata.tables:
+            found.add(match.group(1))
+    return found
+
+def assert_indexed(statements, allowed=frozenset()):
+    assert statements, "no queries captured"
+    problems = [(table, " ".join(sql.split()))
+                for sql, parameters in statements
+                for table in full_scans(sql, parameters) - allowed]
+    assert problems == []
+
+@pytest.fixture
+def seeded(client, make_user):
+    user = make_user("alice")
+    other = make_user("bob")
+    stranger = make_user("carol")
+    db.session.add_all([
+        Friend(requester_id=user.id, addressee_id=other.id, status="accepted"),
+        Friend(requester_id=stranger.id, addressee_id=user.id, status="pending"),
+    ])
+    db.session.commit()
+    now = utc_now()
+    for person in (user, other, stranger):
+        for days_ago in range(3):
+            started = now - timedelta(days=days_ago, hours=2)
+            assert log_session(client, person, started, 30).status_code == 201
+    return user, other
+
+@pytest.mark.parametrize("route", ROUTE_CHECKS)
+def test_read_paths_use_indexes(app, client, seeded, route):
+    user, other = seeded
+    today = utc_now().date()
+    path = route.format(week_ago=today - timedelta(days=7), today=today, other=other.username)
+    with capture_statements() as statements:
+        response = client.get(path, headers=auth(user))
+    assert response.status_code == 200
+    assert_indexed(statements, ALLOWED_SCANS.get(route.split("?")[0], frozenset()))
+
+def test_overlap_probes_use_indexes(app, seeded):
+    from app.overlaps import existing_intervals, find_overlap
+    user, _ = seeded
+    now = utc_now()
+    with capture_statements() as statements:
+        find_overlap(user.id, now - timedelta(hours=1), now)
+        existing_intervals(user.id, now - timedelta(days=1), now)
+    assert_indexed(statements)
@@ -0,0 +1,47 @@
+from datetime import date, datetime, timezone
+
+from app import db
+from app.models import DailyRollup
+from app.rollups import rebuild_user_rollups
+from conftest import auth, log_session
+
+def rollup_days(user):
+    rows = db.session.query(DailyRollup.local_day, DailyRollup.total_ms, DailyRollup.session_count).filter(
+        DailyRollup.user_id == user.id
+    ).order_by(DailyRollup.local_day).all()
+    return [tuple(row) for row in rows]
+
+def test_sessions_roll_up_by_local_day(client, make_user):
+    user = make_user("alice", timezone="Asia/Tokyo")
+    # 20:00 UTC is 05:00 the next day in Tokyo
+    log_session(client, user, datetime(2025, 1, 6, 20, tzinfo=timezone.utc), 60)
+    log_session(client, user, datetime(2025, 1, 7, 1, tzinfo=timezone.utc), 30)
+    assert rollup_days(user) == [(date(2025, 1, 7), 90 * 60000, 2)]
+
+def test_timezone_change_rebuckets_rollups(client, make_user):
+    user = make_user("alice", timezone="UTC")
+    log_session(client, user, datetime(2025, 1, 6, 20, tzinfo=timezone.utc), 60)
+    log_session(client, user, datetime(2025, 1, 7, 1, tzinfo=timezone.utc), 30)
+    assert rollup_days(user) == [(date(2025, 1, 6), 60 * 60000, 1), (date(2025, 1, 7), 30 * 60000, 1)]
+    before = client.get("/api/stats/summary?start_date=2025-01-07&end_date=2025-01-07", headers=auth(user))
+
+    response = client.patch("/api/users/me", headers=auth(user), json={"timezone": "Asia/Tokyo"})
+    assert response.status_code == 200
+    assert rollup_days(user) == [(date(2025, 1, 7), 90 * 60000, 2)]
+
+    # The data version moved, so the cached summary is not reused
+    after = client.get("/api/stats/summary?start_date=2025-01-07&end_date=2025-01-07", headers=auth(user))
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert after.get_json()["totalMinutes"] == 90
+
+def test_rebuild_matches_incremental_rollups(client, make_user):
+    user = make_user("alice", timezone="America/Los_Angeles")
+    subject = client.post("/api/subjects", headers=auth(user), json={"name": "Math"}).get_json()
+    for hour, subject_id in ((3, None), (9, subject["id"]), (23, subject["id"])):
+        log_session(client, user, datetime(2025, 3, 9, hour, tzinfo=timezone.utc), 20, subject_id=subject_id)
+    incremental = rollup_days(user)
+
+    # (general, Mar 8) and (Math, Mar 9): 23:00 UTC is still Mar 9 in Los Angeles
+    assert rebuild_user_rollups(user) == 2
+    db.session.commit()
+    assert rollup_days(user) == incremental
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+
+from app import db
+from app.models import FocusSession
+from conftest import auth
+
+START = datetime(2025, 1, 6, 9, tzinfo=timezone.utc)
+
+def add_sessions(user, *starts, minutes=10):
+    sessions = [FocusSession(user_id=user.id, started_at=started, ended_at=started + timedelta(minutes=minutes),
+                             duration_ms=minutes * 60000) for started in starts]
+    db.session.add_all(sessions)
+    db.session.commit()
+    return [session.id for session in sessions]
+
+def all_pages(client, user, limit):
+    ids, pages, cursor = [], 0, None
+    while True:
+        path = f"/api/sessions?limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(path, headers=auth(user))
+        assert response.status_code == 200
+        ids += [session["id"] for session in response.get_json()]
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids, pages
+
+def test_cursor_pages_walk_every_session_once(client, make_user):
+    user = make_user("alice")
+    ids = add_sessions(user, *(START + timedelta(hours=n) for n in range(7)))
+    assert all_pages(client, user, 3) == (ids[::-1], 3)
+
+def test_cursor_breaks_started_at_ties_by_id(client, make_user):
+    # Imported or legacy rows can share a start time; pages split inside the tie must not skip or repeat
+    user = make_user("alice")
+    ids = add_sessions(user, START, START, START, START + timedelta(hours=1), START - timedelta(hours=1))
+    expected = [ids[3], ids[2], ids[1], ids[0], ids[4]]
+    for limit in (1, 2, 3):
+        assert all_pages(client, user, limit)[0] == expected
+
+def test_last_full_page_has_no_cursor(client, make_user):
+    user = make_user("alice")
+    add_sessions(user, START, START + timedelta(hours=1))
+    response = client.get("/api/sessions?limit=2", headers=auth(user))
+    assert "X-Next-Cursor" not in response.headers
+
+def test_bad_cursor_and_limit(client, make_user):
+    user = make_user("alice")
+    assert client.get("/api/sessions?limit=2&cursor=nope", headers=auth(user)).status_code == 400
+    assert client.get("/api/sessions?limit=0", headers=auth(user)).status_code == 400
+
+def batch_item(started_at, minutes=10, **fields):
+    return {"duration_ms": minutes * 60000, "started_at": started_at.isoformat(),
+            "ended_at": (started_at + timedelta(minutes=minutes)).isoformat(), **fields}
+
+def test_batch_maps_returned_ids_to_items(client, make_user):
+    user = make_user("alice")
+    subject = client.post("/api/subjects", headers=auth(user), json={"name": "Math"}).get_json()
+    # Items out of start order, alternating subjects
+    items = [batch_item(START + timedelta(hours=n), subject_id=subject["id"] if n % 2 else None) for n in (3, 0, 2, 1)]
+    response = client.post("/api/sessions/batch", headers=auth(user), json={"sessions": items})
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body["ok"] and body["errors"] == []
+    for created in body["created"]:
+        stored = db.session.get(FocusSession, created["session"]["id"])
+        item = items[created["index"]]
+        assert stored.started_at.replace(tzinfo=timezone.utc).isoformat() == item["started_at"]
+        assert stored.subject_id == item.get("subject_id")
+        assert created["session"]["subject"] == ("Math" if item.get("subject_id") else "All Subjects")
+
+def test_batch_reports_errors_per_item(client, make_user):
+    user = make_user("alice")
+    add_sessions(user, START)
+    items = [
+        batch_item(START + timedelta(hours=1)),
+        {"duration_ms": 600000},  # no timestamps
+        batch_item(START + timedelta(minutes=5)),  # overlaps the stored session
+        batch_item(START + timedelta(hours=1, minutes=5)),  # overlaps item 0
+        batch_item(START + timedelta(hours=2), subject_id=999),
+        batch_item(START + timedelta(hours=3), minutes=0),
+    ]
+    response = client.post("/api/sessions/batch", headers=auth(user), json={"sessions": items})
+    assert response.status_code == 201
+    body = response.get_json()
+    assert [created["index"] for created in body["created"]] == [0]
+    errors = {error["index"]: error["error"] for error in body["errors"]}
+    assert sorted(errors) == [1, 2, 3, 4, 5]
+    assert errors[1] == "started_at and ended_at are required"
+    assert errors[2].startswith("Overlaps existing session")
+    assert errors[3] == "Overlaps session 0 in this batch"
+
+def test_batch_without_timestamps_is_rejected(client, make_user):
+    user = make_user("alice")
+    response = client.post("/api/sessions/batch", headers=auth(user),
+                           json={"sessions": [{"duration_ms": 600000}, {"duration_ms": 900000}]})
+    assert response.status_code == 400
+    assert [error["error"] for error in response.get_json()["errors"]] == ["started_at and ended_at are required"] * 2
+    assert FocusSession.query.count() == 0
@@ -0,0 +1,37 @@
+from datetime import date
+
+import pytest
+
+from app import db
+from app.cache import get_stats_cache
+from app.rollups import add_daily_total
+from conftest import auth
+
+@pytest.mark.parametrize("path", ["/api/stats/summary", "/api/stats/by-subject", "/api/stats/dashboard"])
+@pytest.mark.parametrize("start, end", [("2025-13-01", "2025-01-07"), ("2025-01-07", "2025-01-01")])
+def test_bad_ranges_are_rejected_and_not_cached(client, make_user, path, start, end):
+    user = make_user("alice")
+    response = client.get(f"{path}?start_date={start}&end_date={end}", headers=auth(user))
+    assert response.status_code == 400
+    assert "ETag" not in response.headers
+    assert get_stats_cache().stats()["entries"] == 0
+
+def test_totals_ranges_are_not_capped(client, make_user):
+    user = make_user("alice")
+    response = client.get("/api/stats/summary?start_date=2020-01-01&end_date=2025-01-01", headers=auth(user))
+    assert response.status_code == 200
+
+def test_cache_counters_are_off_by_default(app, client, make_user):
+    user = make_user("alice")
+    assert client.get("/api/stats/cache", headers=auth(user)).status_code == 404
+    app.config["STATS_CACHE_ENDPOINT"] = True
+    response = client.get("/api/stats/cache", headers=auth(user))
+    assert response.status_code == 200
+    assert response.get_json()["backend"] == "memory"
+
+def test_global_stats_come_from_daily_totals(client, make_user):
+    user = make_user("alice")
+    # Daily totals outlive raw sessions archived out of focus_sessions
+    add_daily_total(user.id, date(2024, 1, 1), 90 * 60000)
+    db.session.commit()
+    assert client.get("/api/users/stats").get_json() == {"userCount": 1, "totalHours": 1.5, "totalMinutes": 90}
@@ -0,0 +1,58 @@
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy import literal, select, Date
+
+from app import db
+from app.models import DailyRollup
+from app.streaks import EPOCH, compute_streaks, day_number
+from conftest import auth, log_session
+
+def rollups(user, *days, total_ms=60000):
+    db.session.add_all(DailyRollup(user_id=user.id, subject_key=0, local_day=day, total_ms=total_ms, session_count=1)
+                       for day in days)
+    db.session.commit()
+
+@pytest.mark.parametrize("day", [date(1970, 1, 1), date(2024, 2, 29), date(2025, 3, 9), date(2025, 11, 2), date(2038, 1, 20)])
+def test_day_number_counts_days_since_epoch(app, day):
+    assert db.session.scalar(select(day_number(literal(day, Date)))) == (day - EPOCH).days
+
+def test_day_number_on_postgres_subtracts_dates(app, monkeypatch):
+    from sqlalchemy.dialects import postgresql
+    monkeypatch.setattr(db.engine.dialect, "name", "postgresql")
+    sql = str(day_number(DailyRollup.local_day).compile(dialect=postgresql.dialect()))
+    # date - date is an integer number of days in Postgres
+    assert sql == "CAST(daily_rollups.local_day AS DATE) - %(param_1)s::DATE"
+
+def test_islands_give_current_and_longest(app, make_user):
+    user = make_user("alice")
+    start = date(2025, 1, 1)
+    rollups(user, *(start + timedelta(days=n) for n in (0, 1, 2, 4, 5)))
+    assert compute_streaks(user.id, date(2025, 1, 6)) == (2, 3)
+    # Nothing on the end day means no current streak
+    assert compute_streaks(user.id, date(2025, 1, 7)) == (0, 3)
+    # Days after end_date are ignored
+    assert compute_streaks(user.id, date(2025, 1, 3)) == (3, 3)
+
+def test_empty_days_and_other_users_do_not_count(app, make_user):
+    user = make_user("alice")
+    other = make_user("bob")
+    rollups(user, date(2025, 1, 1), date(2025, 1, 3))
+    rollups(user, date(2025, 1, 2), total_ms=0)
+    rollups(other, date(2025, 1, 2))
+    assert compute_streaks(user.id, date(2025, 1, 3)) == (1, 1)
+    assert compute_streaks(make_user("carol").id, date(2025, 1, 3)) == (0, 0)
+
+def test_streak_runs_across_a_dst_change(client, make_user):
+    # New York springs forward on 2025-03-09; late-evening sessions are on the next UTC day
+    user = make_user("alice", timezone="America/New_York")
+    zone = ZoneInfo("America/New_York")
+    for day in (7, 8, 9, 10):
+        started = datetime(2025, 3, day, 22, 30, tzinfo=zone).astimezone(timezone.utc)
+        assert log_session(client, user, started, 45).status_code == 201
+    assert compute_streaks(user.id, date(2025, 3, 10)) == (4, 4)
+
+    summary = client.get("/api/stats/summary?start_date=2025-03-07&end_date=2025-03-10", headers=auth(user)).get_json()
+    assert summary["sessionsCount"] == 4
+    assert summary["longestStreakDays"] == 4
@@ -16,7 +16,6 @@ interface LeaderboardEntry {
   rank: number
   name: string
   username: string
-  email: string
   email_domain: string
   hoursPerWeek: number
   minutesPerWeek: number
@@ -34,20 +33,18 @@ function LeaderboardPageContent() {
     const loadLeaderboard = async () => {
       setLoading(true)
       try {
-        let data: LeaderboardEntry[] = []
-        if (scope === "global") {
-          data = await getLeaderboardGlobal()
-        } else if (scope === "domain") {
-          data = await getLeaderboardDomain()
-        } else {
-          data = await getLeaderboardFriends()
-        }
+        const load = scope === "global" ? getLeaderboardGlobal : scope === "domain" ? getLeaderboardDomain : getLeaderboardFriends
+        const data: LeaderboardEntry[] = await load()
         setLeaderboard(data)
         
-        // Find user's rank
+        // Find user's rank (the board is paged, so ask for it when it's not on this page)
         if (user?.username) {
-          const rank = data.findIndex(entry => entry.username === user.username)
-          setUserRank(rank >= 0 ? rank + 1 : null)
+          let mine = data.find(entry => entry.username === user.username)
+          if (!mine) {
+            const around: LeaderboardEntry[] = await load({ around: "me", radius: 0 })
+            mine = around.find(entry => entry.username === user.username)
+          }
+          setUserRank(mine ? mine.rank : null)
         } else {
           setUserRank(null)
         }
@@ -228,7 +225,7 @@ function LeaderboardPageContent() {
             <h3 className="text-xl font-bold text-white mb-1">
               {top3[1]?.name} {user?.username === top3[1]?.username && "(You)"}
             </h3>
-            <p className="text-sm text-gray-400 mb-2">{top3[1]?.email}</p>
+            <p className="text-sm text-gray-400 mb-2">@{top3[1]?.username}</p>
             <p className="text-2xl font-bold text-white">{top3[1]?.minutesPerWeek ? minutesToHhMm(top3[1].minutesPerWeek) : "0m"}</p>
             <Link href={`/profile/${top3[1]?.username}`} className="mt-4">
               <Button className="bg-gray-700 text-white hover:bg-gray-600">
@@ -249,7 +246,7 @@ function LeaderboardPageContent() {
             <h3 className="text-2xl font-bold text-white mb-1">
               {top3[0]?.name} {user?.username === top3[0]?.username && "(You)"}
             </h3>
-            <p className="text-sm text-gray-400 mb-2">{top3[0]?.email}</p>
+            <p className="text-sm text-gray-400 mb-2">@{top3[0]?.username}</p>
             <p className="text-3xl font-bold text-yellow-500">{top3[0]?.minutesPerWeek ? minutesToHhMm(top3[0].minutesPerWeek) : "0m"}</p>
             <Link href={`/profile/${top3[0]?.username}`} className="mt-4">
               <Button className="bg-yellow-600 text-black hover:bg-yellow-500">
@@ -270,7 +267,7 @@ function LeaderboardPageContent() {
             <h3 className="text-xl font-bold text-white mb-1">
               {top3[2]?.name} {user?.username === top3[2]?.username && "(You)"}
             </h3>
-            <p className="text-sm text-gray-400 mb-2">{top3[2]?.email}</p>
+            <p className="text-sm text-gray-400 mb-2">@{top3[2]?.username}</p>
             <p className="text-2xl font-bold text-white">{top3[2]?.minutesPerWeek ? minutesToHhMm(top3[2].minutesPerWeek) : "0m"}</p>
             <Link href={`/profile/${top3[2]?.username}`} className="mt-4">
               <Button className="bg-orange-700 text-white hover:bg-orange-600">
@@ -288,7 +285,7 @@ function LeaderboardPageContent() {
                 <tr>
                   <th className="px-6 py-4 text-left text-sm font-semibold text-gray-400">Rank</th>
                   <th className="px-6 py-4 text-left text-sm font-semibold text-gray-400">Name</th>
-                  <th className="px-6 py-4 text-left text-sm font-semibold text-gray-400">Email</th>
+                  <th className="px-6 py-4 text-left text-sm font-semibold text-gray-400">Username</th>
                   <th className="px-6 py-4 text-left text-sm font-semibold text-gray-400">Hours/Week</th>
                   <th className="px-6 py-4 text-left text-sm font-semibold text-gray-400">Profile</th>
                 </tr>
@@ -312,7 +309,7 @@ function LeaderboardPageContent() {
                       <td className={`px-6 py-4 text-sm font-medium ${isCurrentUser ? "text-yellow-500" : "text-white"}`}>
                         {entry.name} {isCurrentUser && "(You)"}
                       </td>
-                      <td className="px-6 py-4 text-sm text-gray-400">{entry.email}</td>
+                      <td className="px-6 py-4 text-sm text-gray-400">@{entry.username}</td>
                       <td className={`px-6 py-4 text-sm ${isCurrentUser ? "text-yellow-500 font-bold" : "text-white"}`}>
                         {entry.minutesPerWeek ? minutesToHhMm(entry.minutesPerWeek) : "0m"}
                       </td>
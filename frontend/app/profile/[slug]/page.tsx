@@ -10,11 +10,7 @@ import { Progress } from "@/components/ui/progress"
 import { ScrollArea } from "@/components/ui/scroll-area"
 import {
   getUserByUsername,
-  getStatsSummary,
-  getStatsBySubject,
-  getStatsWeekly,
-  getStatsDaily,
-  getStatsHeatmap,
+  getStatsDashboard,
   getSubjects,
   sendFriendRequest,
   getFriends,
@@ -128,30 +124,23 @@ export default function ProfilePage({ params }: { params: Promise<{ slug: string
         // Store current subjectId for use in rendering
         setCurrentSubjectId(subjectId)
         
-        // Now load the rest of the data with the subject filter
-        const [summaryData, subjectData, weeklyDataResult, dailyDataResult, heatmapDataResult] =
-          await Promise.all([
-            getStatsSummary({ username, start_date: startDate, end_date: endDate, subject_id: subjectId }).catch((err) => {
-              console.error("❌ Failed to load summary:", err)
-              return null
-            }),
-            getStatsBySubject({ username, start_date: startDate, end_date: endDate }).catch((err) => {
-              console.error("❌ Failed to load subject stats:", err)
-              return []
-            }),
-            getStatsWeekly({ username, start_date: startDate, subject_id: subjectId }).catch((err) => {
-              console.error("❌ Failed to load weekly data:", err)
-              return null
-            }),
-            getStatsDaily({ username, subject_id: subjectId }).catch((err) => {
-              console.error("❌ Failed to load daily data:", err)
-              return []
-            }),
-            getStatsHeatmap({ username, start_date: yearStartStr, end_date: yearEndStr }).catch((err) => {
-              console.error("❌ Failed to load heatmap:", err)
-              return []
-            }),
-          ])
+        // Now load the rest of the data with the subject filter (one request for every stats view)
+        const dashboard = await getStatsDashboard({
+          username,
+          start_date: startDate,
+          end_date: endDate,
+          subject_id: subjectId,
+          heatmap_start_date: yearStartStr,
+          heatmap_end_date: yearEndStr,
+        }).catch((err) => {
+          console.error("❌ Failed to load profile stats:", err)
+          return null
+        })
+        const summaryData = dashboard?.summary ?? null
+        const subjectData = dashboard?.by_subject ?? []
+        const weeklyDataResult = dashboard?.weekly ?? null
+        const dailyDataResult = dashboard?.daily ?? []
+        const heatmapDataResult = dashboard?.heatmap ?? []
 
         console.log("✅ Profile data loaded:", {
           user: !!userData,
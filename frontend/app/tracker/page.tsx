@@ -6,7 +6,7 @@ import { useRouter } from "next/navigation"
 import { Button } from "@/components/ui/button"
 import { ArrowLeft } from "lucide-react"
 import { useFilterStore } from "@/lib/store"
-import { getSubjects, createSession } from "@/lib/api"
+import { getSubjects, createSession, startLiveSession, heartbeatLiveSession, stopLiveSession } from "@/lib/api"
 import { toast } from "sonner"
 import { ProtectedRoute } from "@/components/protected-route"
 
@@ -271,6 +271,21 @@ function TrackerPageContent() {
     }
   }, [isRunning, startTimestamp])
 
+  // Keep the server-side live session alive while the timer runs
+  // (re-registers it if it expired, e.g. after a restored session or a server restart)
+  useEffect(() => {
+    if (!isRunning) return
+    
+    const beat = () => {
+      heartbeatLiveSession().catch(() => {
+        startLiveSession(selectedSubjectId).catch(() => {})
+      })
+    }
+    beat()
+    const heartbeatInterval = setInterval(beat, 30000)
+    return () => clearInterval(heartbeatInterval)
+  }, [isRunning, selectedSubjectId])
+
   // Recover any pending sessions on mount (from previous tab close)
   useEffect(() => {
     if (!isHydrated) return
@@ -538,6 +553,7 @@ function TrackerPageContent() {
           const now = Date.now()
           setIsRunning(true)
           setStartTimestamp(now)
+          startLiveSession(selectedSubjectId).catch((err) => console.error("❌ Failed to start live session:", err))
         } else {
           // Stop tracking - check duration first
           const actualDuration = Date.now() - (startTimestamp || Date.now())
@@ -545,6 +561,7 @@ function TrackerPageContent() {
           if (actualDuration < 30000) {
             // Session under 30 seconds - show error, reset immediately, no cooldown
             toast.error("I am not paying for this short ahh session in my database 💀")
+            stopLiveSession({ discard: true }).catch(() => {})
             setIsRunning(false)
             setDisplayMilliseconds(0)
             setStartTimestamp(null)
@@ -9,12 +9,22 @@ import { minutesToHhMm } from "@/lib/utils"
 import type { DailyStats } from "@/lib/types"
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from "recharts"
 
-export default function Last30Line({ username }: { username?: string } = {}) {
-  const [data, setData] = useState<DailyStats[]>([])
-  const [loading, setLoading] = useState(true)
+interface Last30LineProps {
+  username?: string
+  // The dashboard's daily slice from the parent (null while it loads); without it the chart fetches its own
+  data?: DailyStats[] | null
+}
+
+export default function Last30Line({ username, data: dashboardDays }: Last30LineProps = {}) {
+  const [fetchedData, setData] = useState<DailyStats[]>([])
+  const [fetching, setLoading] = useState(true)
   const { selectedSubject, subjects, showAllSubjects, timezone } = useFilterStore()
+  const provided = dashboardDays !== undefined
+  const data = provided ? dashboardDays ?? [] : fetchedData
+  const loading = provided ? dashboardDays === null : fetching
 
   useEffect(() => {
+    if (provided) return
     const load = async () => {
       setLoading(true)
       try {
@@ -37,7 +47,7 @@ export default function Last30Line({ username }: { username?: string } = {}) {
       }
     }
     load()
-  }, [selectedSubject, subjects, showAllSubjects, username, timezone])
+  }, [selectedSubject, subjects, showAllSubjects, username, timezone, provided])
 
   const subjectMap = new Map(subjects.map((s) => [s.id, s]))
   const selectedSubjectData = selectedSubject ? subjectMap.get(selectedSubject) : null
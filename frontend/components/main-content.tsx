@@ -1,19 +1,75 @@
 "use client"
 
+import { useEffect, useRef, useState } from "react"
 import { ScrollArea } from "@/components/ui/scroll-area"
 import TopRow from "./top-row"
 import SubjectBar from "./subject-bar"
 import WeeklyCalendar from "./weekly-calendar"
 import Last30Line from "./last-30-line"
 import YearHeatmap from "./year-heatmap"
+import { getStatsDashboard } from "@/lib/api"
+import { useFilterStore } from "@/lib/store"
+
+const toDateString = (d: Date) => d.toISOString().split("T")[0]
+
+// Week ranges the widgets show: Monday-Sunday UTC for the top row, Sunday UTC for the calendar
+function dashboardRanges() {
+  const today = new Date()
+  const todayUTC = new Date(Date.UTC(today.getUTCFullYear(), today.getUTCMonth(), today.getUTCDate()))
+  const monday = new Date(todayUTC)
+  monday.setUTCDate(todayUTC.getUTCDate() - ((todayUTC.getUTCDay() + 6) % 7))
+  const sunday = new Date(monday)
+  sunday.setUTCDate(monday.getUTCDate() + 6)
+  const calendarStart = new Date(todayUTC)
+  calendarStart.setUTCDate(todayUTC.getUTCDate() - todayUTC.getUTCDay())
+  return {
+    start_date: toDateString(monday),
+    end_date: toDateString(sunday),
+    week_start_date: toDateString(calendarStart),
+    heatmap_start_date: toDateString(new Date(today.getFullYear(), 0, 1)),
+    heatmap_end_date: toDateString(today),
+  }
+}
 
 export default function MainContent() {
+  // null while loading; each widget gets its slice of one /stats/dashboard response
+  const [dashboard, setDashboard] = useState<any>(null)
+  const { selectedSubject, subjects, showAllSubjects, timezone } = useFilterStore()
+  const loadedTimezone = useRef<string | null>(null)
+
+  // Only the 30-day line follows the subject filter
+  let dailySubjectId: number | undefined = undefined
+  if (!showAllSubjects && selectedSubject) {
+    const subject = subjects.find(s => String(s.id) === String(selectedSubject))
+    if (subject) dailySubjectId = Number(subject.id)
+  }
+
+  useEffect(() => {
+    // Everything on first load or timezone change; afterwards a filter change only refetches daily
+    const full = loadedTimezone.current !== timezone
+    const load = async () => {
+      try {
+        const data = await getStatsDashboard({
+          ...dashboardRanges(),
+          sections: full ? ["summary", "by_subject", "weekly", "daily", "heatmap"] : ["daily"],
+          daily_subject_id: dailySubjectId,
+        })
+        loadedTimezone.current = timezone
+        setDashboard((previous: any) => (full ? data : { ...previous, daily: data.daily }))
+      } catch (err) {
+        console.error("Failed to load dashboard stats:", err)
+        setDashboard((previous: any) => previous ?? {})
+      }
+    }
+    load()
+  }, [timezone, dailySubjectId])
+
   return (
     <ScrollArea className="flex-1 w-full bg-black">
       <div className="p-6 space-y-6 max-w-full">
         {/* Top Row: Pie Chart, XP/Rank, Streak */}
         <div className="animate-in fade-in-50 duration-500">
-          <TopRow />
+          <TopRow summary={dashboard && (dashboard.summary ?? {})} bySubject={dashboard && (dashboard.by_subject ?? [])} />
         </div>
 
         {/* Subject Bar for filtering */}
@@ -22,16 +78,16 @@ export default function MainContent() {
         </div>
 
         <div className="animate-in fade-in-50 duration-700">
-          <WeeklyCalendar />
+          <WeeklyCalendar week={dashboard && (dashboard.weekly ?? {})} />
         </div>
 
         {/* 30-day trend */}
         <div className="animate-in fade-in-50 duration-700">
-          <Last30Line />
+          <Last30Line data={dashboard && (dashboard.daily ?? [])} />
         </div>
 
         <div className="animate-in fade-in-50 duration-700">
-          <YearHeatmap />
+          <YearHeatmap data={dashboard && (dashboard.heatmap ?? [])} />
         </div>
       </div>
     </ScrollArea>
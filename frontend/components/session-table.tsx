@@ -7,29 +7,33 @@ import { Button } from "@/components/ui/button"
 import { Skeleton } from "@/components/ui/skeleton"
 import { ScrollArea } from "@/components/ui/scroll-area"
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@/components/ui/table"
-import { getSessions } from "@/lib/api"
+import { getSessionsPage } from "@/lib/api"
 import type { FocusSession } from "@/lib/types"
 import { minutesToHhMm } from "@/lib/utils"
 
 type SortField = "startTime" | "duration" | "subject"
 
+const PAGE_SIZE = 8
+
 export default function SessionTable() {
   const [sessions, setSessions] = useState<FocusSession[]>([])
   const [filteredSessions, setFilteredSessions] = useState<FocusSession[]>([])
   const [loading, setLoading] = useState(true)
   const [sortField, setSortField] = useState<SortField>("startTime")
   const [sortOrder, setSortOrder] = useState<"asc" | "desc">("desc")
+  // cursors[i] is the cursor that loads page i (page 0 has none)
+  const [cursors, setCursors] = useState<(string | null)[]>([null])
+  const [page, setPage] = useState(0)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
 
   useEffect(() => {
     const load = async () => {
+      setLoading(true)
       try {
-        // Get sessions from last year to now
-        const now = new Date()
-        const oneYearAgo = new Date(now.getFullYear() - 1, 0, 1)
-        
-        const apiSessions = await getSessions({
-          start_date: oneYearAgo.toISOString().split("T")[0],
-          end_date: now.toISOString().split("T")[0],
+        // Only the visible page is fetched; the server seeks straight to it with the cursor
+        const { sessions: apiSessions, nextCursor } = await getSessionsPage({
+          limit: PAGE_SIZE,
+          cursor: cursors[page],
         })
         
         // Transform API response to match FocusSession type
@@ -43,6 +47,7 @@ export default function SessionTable() {
         }))
         
         setSessions(transformed)
+        setNextCursor(nextCursor)
       } catch (err) {
         console.error("Failed to load sessions:", err)
       } finally {
@@ -50,7 +55,17 @@ export default function SessionTable() {
       }
     }
     load()
-  }, [])
+  }, [page, cursors])
+
+  const goNext = () => {
+    if (!nextCursor) return
+    setCursors((prev) => [...prev.slice(0, page + 1), nextCursor])
+    setPage(page + 1)
+  }
+
+  const goPrevious = () => {
+    if (page > 0) setPage(page - 1)
+  }
 
   useEffect(() => {
     const sorted = [...sessions]
@@ -132,7 +147,7 @@ export default function SessionTable() {
                 </TableCell>
               </TableRow>
             ) : (
-              filteredSessions.slice(0, 8).map((session) => (
+              filteredSessions.map((session) => (
                 <TableRow key={session.id} className="border-white/10 hover:bg-white/5">
                   <TableCell className="text-sm text-white">
                     {new Date(session.startTime).toLocaleTimeString("en-US", {
@@ -160,13 +175,25 @@ export default function SessionTable() {
 
       <div className="mt-4 flex items-center justify-between text-sm text-gray-400">
         <span>
-          Showing {Math.min(8, filteredSessions.length)} of {filteredSessions.length} sessions
+          Page {page + 1} · {filteredSessions.length} sessions
         </span>
         <div className="flex gap-2">
-          <Button variant="outline" size="sm" disabled className="border-white/10 text-gray-400 bg-transparent">
+          <Button
+            variant="outline"
+            size="sm"
+            disabled={page === 0}
+            onClick={goPrevious}
+            className="border-white/10 text-gray-400 bg-transparent"
+          >
             Previous
           </Button>
-          <Button variant="outline" size="sm" disabled className="border-white/10 text-gray-400 bg-transparent">
+          <Button
+            variant="outline"
+            size="sm"
+            disabled={!nextCursor}
+            onClick={goNext}
+            className="border-white/10 text-gray-400 bg-transparent"
+          >
             Next
           </Button>
         </div>
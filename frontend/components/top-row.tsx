@@ -83,12 +83,40 @@ export function getRankByHours(weeklyHours: number) {
   }
 }
 
-export default function TopRow() {
+interface TopRowProps {
+  // Slices of /stats/dashboard from the parent (null while it loads); without them the row fetches its own
+  summary?: any | null
+  bySubject?: any[] | null
+}
+
+export default function TopRow({ summary, bySubject }: TopRowProps = {}) {
   const [stats, setStats] = useState<SummaryStats | null>(null)
   const [subjectStats, setSubjectStats] = useState<SubjectStats[]>([])
-  const [loading, setLoading] = useState(true)
+  const [fetching, setFetching] = useState(true)
   const [displayName, setDisplayName] = useState<string>("")
   const { timezone, subjects } = useFilterStore()
+  const provided = summary !== undefined
+  const loading = provided ? !(summary && bySubject) : fetching
+
+  const applyStats = (summaryData: any, subjectData: any[]) => {
+    setStats({
+      totalMinutes: Math.round(summaryData.totalMinutes || 0),
+      sessionsCount: summaryData.sessionsCount || 0,
+      avgSessionMinutes: Math.round((summaryData.totalMinutes || 0) / (summaryData.sessionsCount || 1)),
+      streakDays: summaryData.streakDays || 0,
+    })
+    
+    setSubjectStats(subjectData.map((s: any) => ({
+      subject: s.subject,
+      minutes: Math.round(s.minutes || 0),
+    })))
+  }
+
+  useEffect(() => {
+    if (provided && summary && bySubject) {
+      applyStats(summary, bySubject)
+    }
+  }, [provided, summary, bySubject])
 
   useEffect(() => {
     const load = async () => {
@@ -111,23 +139,15 @@ export default function TopRow() {
         const startDate = weekStartUTC.toISOString().split("T")[0]
         const endDate = weekEndUTC.toISOString().split("T")[0]
 
-        const [summary, subjectData, user] = await Promise.all([
-          getStatsSummary({ start_date: startDate, end_date: endDate }),
-          getStatsBySubject({ start_date: startDate, end_date: endDate }),
+        const [summaryData, subjectData, user] = await Promise.all([
+          provided ? null : getStatsSummary({ start_date: startDate, end_date: endDate }),
+          provided ? null : getStatsBySubject({ start_date: startDate, end_date: endDate }),
           getCurrentUser().catch(() => null),
         ])
         
-        setStats({
-          totalMinutes: Math.round(summary.totalMinutes || 0),
-          sessionsCount: summary.sessionsCount || 0,
-          avgSessionMinutes: Math.round((summary.totalMinutes || 0) / (summary.sessionsCount || 1)),
-          streakDays: summary.streakDays || 0,
-        })
-        
-        setSubjectStats(subjectData.map((s: any) => ({
-          subject: s.subject,
-          minutes: Math.round(s.minutes || 0),
-        })))
+        if (!provided) {
+          applyStats(summaryData, subjectData)
+        }
 
         if (user) {
           setDisplayName(user.display_name || user.username || "")
@@ -135,11 +155,11 @@ export default function TopRow() {
       } catch (err) {
         console.error("Failed to load stats:", err)
       } finally {
-        setLoading(false)
+        setFetching(false)
       }
     }
     load()
-  }, [timezone])
+  }, [timezone, provided])
 
   if (loading) {
     return (
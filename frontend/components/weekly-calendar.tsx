@@ -30,9 +30,11 @@ interface DaySchedule {
 
 interface WeeklyCalendarProps {
   username?: string // Optional username for viewing other users' profiles
+  // The dashboard's weekly slice for the current week (null while the parent loads it); other weeks are fetched here
+  week?: any | null
 }
 
-export default function WeeklyCalendar({ username }: WeeklyCalendarProps = {}) {
+export default function WeeklyCalendar({ username, week }: WeeklyCalendarProps = {}) {
   const [data, setData] = useState<DaySchedule[]>([])
   const [loading, setLoading] = useState(true)
   const { selectedSubject, showAllSubjects, subjects, timezone } = useFilterStore()
@@ -95,7 +97,12 @@ export default function WeeklyCalendar({ username }: WeeklyCalendarProps = {}) {
 
   useEffect(() => {
     const load = async () => {
+      const weekStartDate = weekStart.toISOString().split("T")[0]
+      const isDashboardWeek = week !== undefined && weekStartDate === getSundayUTC(new Date()).toISOString().split("T")[0]
       setLoading(true)
+      if (isDashboardWeek && week === null) {
+        return // the parent's dashboard request is still in flight
+      }
       try {
         // If viewing someone else's profile, fetch their subjects first
         let fetchedProfileSubjects: any[] = []
@@ -112,10 +119,12 @@ export default function WeeklyCalendar({ username }: WeeklyCalendarProps = {}) {
           setProfileSubjects([]) // Clear when viewing own profile
         }
         
-        const weekData = await getStatsWeekly({ 
-          start_date: weekStart.toISOString().split("T")[0],
-          username: username // Pass username if viewing someone else's profile
-        })
+        const weekData = isDashboardWeek && week.weekStart === weekStartDate
+          ? week
+          : await getStatsWeekly({ 
+              start_date: weekStartDate,
+              username: username // Pass username if viewing someone else's profile
+            })
         console.log("📅 Weekly data received:", weekData, "for username:", username || "current user")
         
         if (!weekData || !weekData.days || !Array.isArray(weekData.days)) {
@@ -426,7 +435,7 @@ export default function WeeklyCalendar({ username }: WeeklyCalendarProps = {}) {
       }
     }
     load()
-  }, [weekStart, subjects, selectedSubject, showAllSubjects, timezone, username])
+  }, [weekStart, subjects, selectedSubject, showAllSubjects, timezone, username, week])
 
   // Calculate current time indicator on load
   useEffect(() => {
@@ -3,17 +3,26 @@
 import { useEffect, useState } from "react"
 import { Card } from "@/components/ui/card"
 import { Skeleton } from "@/components/ui/skeleton"
-import { getStatsHeatmap } from "@/lib/api"
+import { getStatsHeatmapCompact } from "@/lib/api"
 import { useFilterStore } from "@/lib/store"
 import { minutesToHhMm } from "@/lib/utils"
 import type { DailyStats } from "@/lib/types"
 
-export default function YearHeatmap() {
-  const [data, setData] = useState<DailyStats[]>([])
-  const [loading, setLoading] = useState(true)
+interface YearHeatmapProps {
+  // The dashboard's heatmap slice from the parent (null while it loads); without it the heatmap fetches its own
+  data?: DailyStats[] | null
+}
+
+export default function YearHeatmap({ data: dashboardDays }: YearHeatmapProps = {}) {
+  const [fetchedData, setData] = useState<DailyStats[]>([])
+  const [fetching, setLoading] = useState(true)
   const { selectedSubject, subjects } = useFilterStore()
+  const provided = dashboardDays !== undefined
+  const data = provided ? dashboardDays ?? [] : fetchedData
+  const loading = provided ? dashboardDays === null : fetching
 
   useEffect(() => {
+    if (provided) return
     const load = async () => {
       try {
         const token = typeof window !== "undefined" ? localStorage.getItem("access_token") : null
@@ -24,7 +33,7 @@ export default function YearHeatmap() {
         
         const today = new Date()
         const yearStart = new Date(today.getFullYear(), 0, 1)
-        const yearData = await getStatsHeatmap({
+        const yearData = await getStatsHeatmapCompact({
           start_date: yearStart.toISOString().split("T")[0],
           end_date: today.toISOString().split("T")[0],
         })
@@ -40,7 +49,7 @@ export default function YearHeatmap() {
       }
     }
     load()
-  }, [])
+  }, [provided])
 
   const subjectMap = new Map(subjects.slice(1).map((s) => [s.id, s]))
   const selectedSubjectData = selectedSubject ? subjectMap.get(selectedSubject) : null
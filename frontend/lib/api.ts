@@ -11,6 +11,12 @@ export function getAccessToken(): string | null {
 
 // Generic API fetch helper
 async function apiFetch(path: string, options: RequestInit = {}): Promise<any> {
+  const { data } = await apiFetchWithHeaders(path, options)
+  return data
+}
+
+// Like apiFetch, but also returns the response headers (e.g. pagination cursors)
+async function apiFetchWithHeaders(path: string, options: RequestInit = {}): Promise<{ data: any; headers: Headers }> {
   const token = getAccessToken()
   const headers: Record<string, string> = {
     "Content-Type": "application/json",
@@ -39,7 +45,7 @@ async function apiFetch(path: string, options: RequestInit = {}): Promise<any> {
       throw new Error(errorMessage)
     }
 
-    return response.json()
+    return { data: await response.json(), headers: response.headers }
   } catch (err: any) {
     // Handle network errors
     const isNetworkError = 
@@ -270,6 +276,48 @@ export async function createSession(data: {
   })
 }
 
+// Flush several sessions (e.g. queued while offline) in one request.
+// Accepted items come back in `created`, rejected ones in `errors`, both keyed by index.
+export async function createSessionsBatch(sessions: {
+  subject_id?: number | null
+  duration_ms: number
+  started_at: string
+  ended_at: string
+}[]) {
+  return apiFetch("/sessions/batch", {
+    method: "POST",
+    body: JSON.stringify({ sessions }),
+  })
+}
+
+// Live sessions: lets the server answer "who is studying right now".
+// Saving the session with createSession also ends the live session.
+export async function startLiveSession(subject_id?: number | null) {
+  return apiFetch("/presence/start", {
+    method: "POST",
+    body: JSON.stringify({ subject_id }),
+  })
+}
+
+export async function heartbeatLiveSession() {
+  return apiFetch("/presence/heartbeat", { method: "POST" })
+}
+
+export async function stopLiveSession(options?: { discard?: boolean }) {
+  return apiFetch("/presence/stop", {
+    method: "POST",
+    body: JSON.stringify(options || {}),
+  })
+}
+
+export async function getStudyingNow() {
+  return apiFetch("/presence/now")
+}
+
+export async function getFriendsStudying() {
+  return apiFetch("/presence/friends")
+}
+
 export async function getSessions(params?: {
   start_date?: string
   end_date?: string
@@ -284,6 +332,24 @@ export async function getSessions(params?: {
   return apiFetch(`/sessions${queryString ? `?${queryString}` : ""}`)
 }
 
+// One page of sessions (newest first); pass nextCursor back to get the following page
+export async function getSessionsPage(params: {
+  limit: number
+  cursor?: string | null
+  start_date?: string
+  end_date?: string
+  subject_id?: number
+}): Promise<{ sessions: any[]; nextCursor: string | null }> {
+  const query = new URLSearchParams({ limit: String(params.limit) })
+  if (params.cursor) query.append("cursor", params.cursor)
+  if (params.start_date) query.append("start_date", params.start_date)
+  if (params.end_date) query.append("end_date", params.end_date)
+  if (params.subject_id !== undefined) query.append("subject_id", String(params.subject_id))
+  
+  const { data, headers } = await apiFetchWithHeaders(`/sessions?${query.toString()}`)
+  return { sessions: data, nextCursor: headers.get("X-Next-Cursor") }
+}
+
 // Stats API
 export async function getStatsSummary(params?: { username?: string; start_date?: string; end_date?: string; subject_id?: number }) {
   const query = new URLSearchParams()
@@ -384,6 +450,61 @@ export async function getStatsHeatmap(params?: { username?: string; start_date?:
   return apiFetch(`/stats/heatmap${queryString ? `?${queryString}` : ""}`)
 }
 
+// Compact heatmap: per-day minutes packed as base64 uint16 (little-endian), decoded to DailyStats
+export async function getStatsHeatmapCompact(params?: { username?: string; start_date?: string; end_date?: string }): Promise<DailyStats[]> {
+  const query = new URLSearchParams({ format: "compact" })
+  if (params?.username) query.append("username", params.username)
+  if (params?.start_date) query.append("start_date", params.start_date)
+  if (params?.end_date) query.append("end_date", params.end_date)
+  
+  const packed = await apiFetch(`/stats/heatmap?${query.toString()}`)
+  const bytes = Uint8Array.from(atob(packed.minutes), (c) => c.charCodeAt(0))
+  const view = new DataView(bytes.buffer)
+  const start = new Date(packed.start + "T00:00:00Z")
+  
+  const days: DailyStats[] = []
+  for (let i = 0; i < packed.days; i++) {
+    const date = new Date(start)
+    date.setUTCDate(start.getUTCDate() + i)
+    days.push({
+      date: date.toISOString().split("T")[0],
+      minutes: view.getUint16(i * 2, true),
+    })
+  }
+  return days
+}
+
+// Composite stats: any of summary, by_subject, daily, weekly, heatmap in one request
+export async function getStatsDashboard(params?: {
+  username?: string
+  sections?: string[]
+  start_date?: string
+  end_date?: string
+  week_start_date?: string
+  subject_id?: number
+  daily_subject_id?: number
+  daily_start_date?: string
+  daily_end_date?: string
+  heatmap_start_date?: string
+  heatmap_end_date?: string
+}) {
+  const query = new URLSearchParams()
+  if (params?.username) query.append("username", params.username)
+  if (params?.sections?.length) query.append("sections", params.sections.join(","))
+  if (params?.start_date) query.append("start_date", params.start_date)
+  if (params?.end_date) query.append("end_date", params.end_date)
+  if (params?.week_start_date) query.append("week_start_date", params.week_start_date)
+  if (params?.subject_id !== undefined) query.append("subject_id", String(params.subject_id))
+  if (params?.daily_subject_id !== undefined) query.append("daily_subject_id", String(params.daily_subject_id))
+  if (params?.daily_start_date) query.append("daily_start_date", params.daily_start_date)
+  if (params?.daily_end_date) query.append("daily_end_date", params.daily_end_date)
+  if (params?.heatmap_start_date) query.append("heatmap_start_date", params.heatmap_start_date)
+  if (params?.heatmap_end_date) query.append("heatmap_end_date", params.heatmap_end_date)
+  
+  const queryString = query.toString()
+  return apiFetch(`/stats/dashboard${queryString ? `?${queryString}` : ""}`)
+}
+
 // Friends API
 export async function getFriends() {
   return apiFetch("/friends")
@@ -423,14 +544,50 @@ export async function removeFriend(id: number) {
 }
 
 // Leaderboard API
-export async function getLeaderboardGlobal(days: number = 7) {
-  return apiFetch(`/leaderboard/global?days=${days}`)
+// Boards are paged: { limit, offset } for a page (default: top 100),
+// or { around: "me", radius } for the current user and their neighbours.
+export interface LeaderboardPageParams {
+  days?: number | "all"  // rolling window; omit for the current week
+  limit?: number
+  offset?: number
+  around?: "me"
+  radius?: number
+}
+
+function leaderboardQuery(params: LeaderboardPageParams = {}) {
+  const query = new URLSearchParams()
+  if (params.days !== undefined) query.append("days", String(params.days))
+  if (params.limit !== undefined) query.append("limit", String(params.limit))
+  if (params.offset !== undefined) query.append("offset", String(params.offset))
+  if (params.around) query.append("around", params.around)
+  if (params.radius !== undefined) query.append("radius", String(params.radius))
+  return query.toString()
+}
+
+export async function getLeaderboardGlobal(params?: LeaderboardPageParams) {
+  return apiFetch(`/leaderboard/global?${leaderboardQuery(params)}`)
+}
+
+export async function getLeaderboardDomain(params?: LeaderboardPageParams) {
+  return apiFetch(`/leaderboard/domain?${leaderboardQuery(params)}`)
+}
+
+export async function getLeaderboardFriends(params?: LeaderboardPageParams) {
+  return apiFetch(`/leaderboard/friends?${leaderboardQuery(params)}`)
+}
+
+export async function getLeaderboardHistoryWeeks() {
+  return apiFetch("/leaderboard/history")
 }
 
-export async function getLeaderboardDomain(days: number = 7) {
-  return apiFetch(`/leaderboard/domain?days=${days}`)
+// week is the Sunday (YYYY-MM-DD) a finished week started on; see getLeaderboardHistoryWeeks
+export async function getLeaderboardHistory(week: string, scope: "global" | "domain" | "friends", params?: LeaderboardPageParams) {
+  return apiFetch(`/leaderboard/history/${week}/${scope}?${leaderboardQuery({ ...params, days: undefined })}`)
 }
 
-export async function getLeaderboardFriends(days: number = 7) {
-  return apiFetch(`/leaderboard/friends?days=${days}`)
+export async function getDomainRanking(sort: "total" | "per_capita" | "active" = "total", params?: { limit?: number; offset?: number }) {
+  const query = new URLSearchParams({ sort })
+  if (params?.limit !== undefined) query.append("limit", String(params.limit))
+  if (params?.offset !== undefined) query.append("offset", String(params.offset))
+  return apiFetch(`/leaderboard/domains?${query.toString()}`)
 }
@@ -32,6 +32,7 @@ export interface SummaryStats {
   sessionsCount: number
   avgSessionMinutes: number
   streakDays: number
+  longestStreakDays?: number
 }
 
 export interface Badge {